@@ -7,14 +7,12 @@ Output: LoanExtractedData (structured model)
 
 from app.schemas import LoanExtractedData
 from app.core.gemini import run_gemini
-from pathlib import Path
+from app.core.prompt_registry import prompts
 import json
 
-PROMPT_PATH = "app/agents/loan/prompts/clause_prompt.txt"
-
 
 async def load_prompt() -> str:
-    return Path(PROMPT_PATH).read_text()
+    return prompts.get("loan.clause_extractor")
 
 
 async def run_clause_extractor(raw_text: str, language: str) -> LoanExtractedData:
@@ -28,7 +26,7 @@ async def run_clause_extractor(raw_text: str, language: str) -> LoanExtractedDat
         },
     }
 
-    llm_response = await run_gemini(payload)
+    llm_response = await run_gemini(payload, stage="loan.clause_extractor")
 
     try:
         return LoanExtractedData.model_validate(llm_response)
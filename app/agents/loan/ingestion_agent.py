@@ -13,18 +13,18 @@ This version is simplified for a hackathon:
 from pathlib import Path
 from typing import Any, Dict
 
+from app.core.prompt_registry import prompts
 from app.schemas import LoanIngestionRequest
 
 # If you keep using Gemini Vision later, you can import run_gemini again.
 # from app.core.gemini import run_gemini
 
 
-PROMPT_PATH = Path("app/agents/loan/prompts/ingestion_prompt.txt")
 SAMPLES_DIR = Path("app/data/loan_samples")
 
 
 async def load_prompt() -> str:
-    return PROMPT_PATH.read_text(encoding="utf-8")
+    return prompts.get("loan.ingestion")
 
 
 def _json_to_text(sample: Dict[str, Any]) -> str:
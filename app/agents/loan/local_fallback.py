@@ -0,0 +1,144 @@
+"""
+Local Loan Fallback
+-------------------
+LLM-free stand-ins for the clause extractor, risk scorer and narrator, used
+while the LLM circuit is open (degraded mode).
+
+- extract_fields_locally(raw_text) → LoanExtractedData   (regex over "Field: value" lines)
+- score_locally(extracted)         → LoanRiskData        (rules of risk_prompt.txt)
+- summarize_locally(...)           → LoanSummaryResponse (no narration)
+
+Works best on the "Field: value" text produced by the ingestion agent for
+loan samples; free-form documents mostly yield partial fields.
+"""
+
+import re
+from typing import List, Optional
+
+from app.schemas import (
+    LoanClause,
+    LoanExtractedData,
+    LoanRiskData,
+    LoanSummaryResponse,
+)
+
+_FIELD_PATTERNS = {
+    "principal_amount": r"(?:principal|loan amount|credit limit)\s*[:\-]\s*([^\n]+)",
+    "interest_rate": r"interest(?: rate)?\s*[:\-]\s*([^\n]+)",
+    "processing_fee": r"processing fee\s*[:\-]\s*([^\n]+)",
+    "prepayment_charges": r"(?:prepayment|foreclosure)[^:\n]*[:\-]\s*([^\n]+)",
+    "late_payment_penalty": r"late (?:fee|payment)[^:\n]*[:\-]\s*([^\n]+)",
+}
+_TENURE_MONTHS = re.compile(r"tenure\s*[:\-]?\s*(\d+)\s*months?", re.IGNORECASE)
+_CLAUSE_WORDS = (
+    "penalty", "fee", "charge", "recovery", "contacts", "gallery", "hidden", "coercive", "auto-debit",
+)
+_HIGH_RISK_WORDS = (
+    "penalty", "contacts", "gallery", "harass", "threat", "coercive", "hidden", "daily",
+)
+_PERCENT = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+
+
+def _find(pattern: str, text: str) -> Optional[str]:
+    match = re.search(pattern, text, flags=re.IGNORECASE)
+    return match.group(1).strip() if match else None
+
+
+def _max_percent(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    found = [float(p) for p in _PERCENT.findall(value)]
+    return max(found) if found else None
+
+
+def extract_fields_locally(raw_text: str) -> LoanExtractedData:
+    fields = {name: _find(pattern, raw_text) for name, pattern in _FIELD_PATTERNS.items()}
+    tenure = _TENURE_MONTHS.search(raw_text)
+
+    clauses: List[LoanClause] = []
+    for line in raw_text.splitlines():
+        line = line.strip("-• ").strip()
+        lowered = line.lower()
+        if not line or not any(w in lowered for w in _CLAUSE_WORDS):
+            continue
+        clauses.append(
+            LoanClause(
+                title=line[:40],
+                summary=line,
+                risk_level="high" if any(w in lowered for w in _HIGH_RISK_WORDS) else "medium",
+                raw_text_snippet=line[:120],
+            )
+        )
+
+    return LoanExtractedData(
+        tenure_months=int(tenure.group(1)) if tenure else None,
+        important_clauses=clauses,
+        **fields,
+    )
+
+
+def score_locally(extracted: LoanExtractedData) -> LoanRiskData:
+    reasons: List[str] = []
+    score = 0.1
+
+    fee = _max_percent(extracted.processing_fee)
+    if fee is not None and fee > 2:
+        score += 0.2
+        reasons.append(f"Processing fee above 2% ({extracted.processing_fee}).")
+
+    interest = _max_percent(extracted.interest_rate)
+    if interest is not None and interest >= 24:
+        score += 0.3
+        reasons.append(f"Very high interest rate ({extracted.interest_rate}).")
+
+    if extracted.prepayment_charges:
+        score += 0.1
+        reasons.append("Prepayment / foreclosure charges apply.")
+
+    flagged = [c for c in extracted.important_clauses if c.risk_level == "high"]
+    if flagged:
+        score += min(0.3, 0.1 * len(flagged))
+        reasons.append(f"{len(flagged)} clause(s) look risky.")
+
+    score = min(score, 1.0)
+    level = "high" if score >= 0.6 else "medium" if score >= 0.3 else "low"
+    return LoanRiskData(
+        risk_score=round(score, 2),
+        overall_risk_level=level,
+        flagged_clauses=flagged,
+        explanation=" ".join(reasons) or "No obvious risk factors found by the local rules.",
+    )
+
+
+def summarize_locally(
+    extracted: LoanExtractedData,
+    risk: LoanRiskData,
+    language: str,
+) -> LoanSummaryResponse:
+    key_numbers = [
+        f"{label}: {value}"
+        for label, value in (
+            ("Principal", extracted.principal_amount),
+            ("Interest rate", extracted.interest_rate),
+            ("Tenure", f"{extracted.tenure_months} months" if extracted.tenure_months else None),
+            ("Processing fee", extracted.processing_fee),
+            ("Late payment penalty", extracted.late_payment_penalty),
+        )
+        if value
+    ]
+    return LoanSummaryResponse(
+        language=language,
+        extracted=extracted,
+        risk=risk,
+        plain_summary=(
+            f"Quick check only: this document looks {risk.overall_risk_level} risk "
+            f"(score {risk.risk_score:.2f}). A detailed explanation is unavailable right now."
+        ),
+        key_numbers=key_numbers,
+        risk_explanation=[risk.explanation] if risk.explanation else [],
+        suggested_questions_for_bank=[
+            "What is the total cost of the loan including all fees (APR)?",
+            "Are there any charges for early repayment?",
+            "Can I get the Key Fact Statement in writing?",
+        ],
+    )
@@ -11,15 +11,12 @@ from app.schemas import (
     LoanRiskData,
     LoanSummaryResponse,
 )
-from app.core.gemini import run_gemini
-from pathlib import Path
-
-
-PROMPT_PATH = "app/agents/loan/prompts/narration_prompt.txt"
+from app.core.gemini import run_gemini_streamed
+from app.core.prompt_registry import prompts
 
 
 async def load_prompt() -> str:
-    return Path(PROMPT_PATH).read_text()
+    return prompts.get("loan.narrator")
 
 
 async def run_narrator(
@@ -39,7 +36,7 @@ async def run_narrator(
         },
     }
 
-    llm_response = await run_gemini(payload)
+    llm_response = await run_gemini_streamed(payload, stage="loan.narrator")
 
     try:
         return LoanSummaryResponse.model_validate(llm_response)
@@ -6,44 +6,78 @@ This glues together:
 2. Clause extraction
 3. Risk scoring
 4. Narration
+
+The steps are declared as agents_runtime stages (LOAN_PIPELINE). With
+local_only=True (LLM circuit open) LOAN_LOCAL_PIPELINE runs instead: steps
+2-3 use the regex / rule fallbacks in local_fallback.py and narration is
+replaced by a template summary.
 """
 
+import os
+from typing import Optional
+
+from app.core.agents_runtime import Pipeline, Stage, run_agents
 from app.schemas import (
     LoanIngestionRequest,
     LoanSummaryResponse,
-    LoanExtractedData,
-    LoanRiskData,
 )
 
 from .ingestion_agent import run_ingestion_agent
 from .clause_extractor import run_clause_extractor
 from .risk_scorer import run_risk_scorer
 from .narrator import run_narrator
+from .local_fallback import extract_fields_locally, score_locally, summarize_locally
 
+# Ingested text is reused for repeated uploads / sample documents.
+INGESTION_MEMO_TTL = float(os.getenv("LOAN_INGESTION_MEMO_TTL_SECONDS", "300"))
 
-async def run_loan_pipeline(request: LoanIngestionRequest) -> LoanSummaryResponse:
-    """
-    End-to-end pipeline for loan/insurance understanding.
-    """
+_INGESTION = Stage(
+    "loan.ingestion", run_ingestion_agent,
+    inputs=["request"], output="raw_text", memo_ttl=INGESTION_MEMO_TTL,
+)
 
-    # 1. INGESTION → raw text
-    raw_text = await run_ingestion_agent(request)
+LOAN_PIPELINE = Pipeline("loan", [
+    _INGESTION,
+    Stage("loan.clause_extractor", run_clause_extractor,
+          inputs=["raw_text", "language"], output="extracted"),
+    Stage("loan.risk_scorer", run_risk_scorer,
+          inputs=["extracted", "language"], output="risk"),
+    Stage("loan.narrator", run_narrator,
+          inputs=["extracted", "risk", "language"], output="summary"),
+], result="summary")
 
-    # 2. CLAUSE EXTRACTION
-    extracted: LoanExtractedData = await run_clause_extractor(
-        raw_text=raw_text, language=request.language
-    )
+LOAN_LOCAL_PIPELINE = Pipeline("loan.local", [
+    _INGESTION,
+    Stage("loan.local_extractor", extract_fields_locally,
+          inputs=["raw_text"], output="local_extracted"),
+    Stage("loan.local_risk_scorer", score_locally,
+          inputs={"extracted": "local_extracted"}, output="risk"),
+    Stage("loan.local_summary", summarize_locally,
+          inputs={"extracted": "local_extracted", "risk": "risk", "language": "language"},
+          output="summary"),
+], result="summary")
 
-    # 3. RISK SCORING
-    risk: LoanRiskData = await run_risk_scorer(
-        extracted=extracted, language=request.language
-    )
 
-    # 4. NARRATION → final output
-    summary: LoanSummaryResponse = await run_narrator(
-        extracted=extracted,
-        risk=risk,
+async def run_loan_pipeline(
+    request: LoanIngestionRequest,
+    local_only: bool = False,
+    raw_text: Optional[str] = None,
+) -> LoanSummaryResponse:
+    """
+    End-to-end pipeline for loan/insurance understanding.
+
+    `raw_text` may be passed in when ingestion already ran speculatively.
+    """
+    if local_only:
+        return await run_agents(
+            LOAN_LOCAL_PIPELINE,
+            request=request,
+            language=request.language,
+            raw_text=raw_text,
+        )
+    return await run_agents(
+        LOAN_PIPELINE,
+        request=request,
         language=request.language,
+        raw_text=raw_text,
     )
-
-    return summary
@@ -7,14 +7,11 @@ Output: LoanRiskData
 
 from app.schemas import LoanExtractedData, LoanRiskData
 from app.core.gemini import run_gemini
-from pathlib import Path
-
-
-PROMPT_PATH = "app/agents/loan/prompts/risk_prompt.txt"
+from app.core.prompt_registry import prompts
 
 
 async def load_prompt() -> str:
-    return Path(PROMPT_PATH).read_text()
+    return prompts.get("loan.risk_scorer")
 
 
 async def run_risk_scorer(extracted: LoanExtractedData, language: str) -> LoanRiskData:
@@ -28,7 +25,7 @@ async def run_risk_scorer(extracted: LoanExtractedData, language: str) -> LoanRi
         },
     }
 
-    llm_response = await run_gemini(payload)
+    llm_response = await run_gemini(payload, stage="loan.risk_scorer")
 
     try:
         return LoanRiskData.model_validate(llm_response)
@@ -3,8 +3,12 @@ Master agent package.
 
 Exposes:
 - route_request()  -> main entry point used by FastAPI /guardian route
+- route_batch()    -> bounded, deduplicated bulk routing (/guardian/batch)
+- guardian_jobs    -> persistent job queue for /guardian/jobs
 """
 
 from .master_agent import route_request
+from .batch import route_batch
+from .jobs import guardian_jobs
 
-__all__ = ["route_request"]
+__all__ = ["route_request", "route_batch", "guardian_jobs"]
@@ -0,0 +1,73 @@
+"""
+Batch Routing
+-------------
+Runs many UserRequests through route_request() for /guardian/batch.
+
+- Identical requests (same JSON) are routed once; the result is reported
+  for every index that carried them.
+- At most `concurrency` requests are in flight per batch (a fixed pool of
+  workers, so a batch of thousands never creates thousands of tasks);
+  Gemini-wide limits are still enforced by app.core.llm_scheduler.
+- Results are yielded in completion order.
+"""
+
+import asyncio
+import os
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from app.schemas import AgentResponse, UserRequest
+
+from .master_agent import route_request
+
+BATCH_CONCURRENCY = int(os.getenv("GUARDIAN_BATCH_CONCURRENCY", "8"))
+BATCH_MAX_ITEMS = int(os.getenv("GUARDIAN_BATCH_MAX_ITEMS", "1000"))
+
+BatchResult = Tuple[List[int], Union[AgentResponse, Exception]]
+
+
+def dedupe(requests: List[UserRequest]) -> List[Tuple[UserRequest, List[int]]]:
+    """Unique requests, in first-seen order, with the indices that carried them."""
+    groups: Dict[str, Tuple[UserRequest, List[int]]] = {}
+    for index, req in enumerate(requests):
+        key = req.model_dump_json()
+        if key in groups:
+            groups[key][1].append(index)
+        else:
+            groups[key] = (req, [index])
+    return list(groups.values())
+
+
+async def route_batch(
+    requests: List[UserRequest],
+    concurrency: int = BATCH_CONCURRENCY,
+) -> AsyncIterator[BatchResult]:
+    """
+    Yield (indices, AgentResponse or exception) as each unique request finishes.
+    Closing the iterator early cancels the remaining work.
+    """
+    jobs = dedupe(requests)
+    pending = iter(jobs)
+    results: "asyncio.Queue[Optional[BatchResult]]" = asyncio.Queue()
+
+    async def worker() -> None:
+        for req, indices in pending:
+            try:
+                outcome: Union[AgentResponse, Exception] = await route_request(req)
+            except Exception as exc:
+                outcome = exc
+            results.put_nowait((indices, outcome))
+        results.put_nowait(None)
+
+    n_workers = max(1, min(concurrency, len(jobs)))
+    workers = [asyncio.ensure_future(worker()) for _ in range(n_workers)]
+    try:
+        finished = 0
+        while finished < n_workers:
+            item = await results.get()
+            if item is None:
+                finished += 1
+                continue
+            yield item
+    finally:
+        for task in workers:
+            task.cancel()
@@ -0,0 +1,41 @@
+"""
+Guardian Jobs
+-------------
+Queue behind /guardian/jobs: each job is a UserRequest routed through
+route_request() by a background worker, so a long loan analysis doesn't
+occupy an API worker or an HTTP connection. The job result is the
+AgentResponse as JSON.
+
+The worker pool is started / stopped with the app (see app.main).
+"""
+
+from typing import Any, Dict
+
+from app.core import metrics
+from app.core.job_queue import JOB_QUEUE_PATH, JobQueue, SqliteJobStore
+from app.schemas import UserRequest
+
+from .master_agent import route_request
+
+
+async def run_guardian_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    response = await route_request(UserRequest.model_validate(payload))
+    return response.model_dump(mode="json")
+
+
+guardian_jobs = JobQueue(
+    run_guardian_job,
+    store=SqliteJobStore(JOB_QUEUE_PATH or ":memory:"),
+)
+
+
+def _jobs_collector():
+    yield (
+        "finpal_jobs",
+        "gauge",
+        "/guardian/jobs by status, plus worker pool size and busy workers.",
+        [({"field": k}, v) for k, v in guardian_jobs.stats().items()],
+    )
+
+
+metrics.REGISTRY.register_collector(_jobs_collector)
@@ -0,0 +1,75 @@
+"""
+Keyword Router
+--------------
+LLM-free version of the master router, used while the LLM circuit is open
+and as the rule half of the local fast-path classifier (local_classifier.py).
+
+Applies the rules of router_prompt.txt in the same order:
+1. payment / phishing keywords   → SCAM_CHECK
+2. file_id, loan / insurance     → LOAN_DOC
+3. questions about rules         → POLICY_QA
+4. otherwise                     → SCAM_CHECK (safest default)
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+from app.schemas.common import RouteEnum
+
+from .types import RouterDecision
+
+
+def _words(*words: str) -> Pattern[str]:
+    return re.compile(r"\b(?:" + "|".join(words) + r")\b", re.IGNORECASE)
+
+
+KEYWORD_RULES: List[Tuple[RouteEnum, Pattern[str], str]] = [
+    (
+        RouteEnum.SCAM_CHECK,
+        _words("upi", "refund", "scam", "link", "otp", "threat\\w*", "kyc"),
+        "Mentions payment/phishing keywords.",
+    ),
+    (
+        RouteEnum.LOAN_DOC,
+        _words("loan", "agreement", "insurance"),
+        "Refers to a loan or insurance document.",
+    ),
+    (
+        RouteEnum.POLICY_QA,
+        _words("rbi", "sebi", "rules?", "allowed", "regulations?", "what does \\w+ say"),
+        "Asks about regulations.",
+    ),
+]
+
+
+FILE_REASON = "A document was attached."
+DEFAULT_REASON = "Unsure; defaulting to scam check."
+
+
+def matched_rules(
+    text: Optional[str],
+    metadata: Optional[Dict[str, Any]] = None,
+    file_id: Optional[str] = None,
+) -> List[Tuple[RouteEnum, str]]:
+    """All rules that fire, in rule order, as (route, reason)."""
+    text = text or ""
+    has_file = bool(file_id or (metadata or {}).get("file_id"))
+    matches = []
+    for route, pattern, reason in KEYWORD_RULES:
+        if route == RouteEnum.LOAN_DOC and has_file:
+            matches.append((route, FILE_REASON))
+        elif pattern.search(text):
+            matches.append((route, reason))
+    return matches
+
+
+def classify_by_keywords(
+    text: Optional[str],
+    metadata: Optional[Dict[str, Any]] = None,
+    file_id: Optional[str] = None,
+) -> RouterDecision:
+    matches = matched_rules(text, metadata, file_id)
+    if matches:
+        route, reason = matches[0]
+        return RouterDecision(route=route, reason=reason)
+    return RouterDecision(route=RouteEnum.SCAM_CHECK, reason=DEFAULT_REASON)
@@ -0,0 +1,346 @@
+"""
+Local Intent Classifier
+-----------------------
+Fast path in front of classify_route(): routes a request without a Gemini
+round-trip when it is confident enough.
+
+Two signals are averaged into a distribution over routes:
+1. Keyword rules (keyword_router.py), i.e. the rules of router_prompt.txt.
+2. HashedNgramModel – a linear softmax model over hashed word uni/bigrams
+   and character trigrams (NumPy), trained from the LLM router decisions
+   that DecisionLog appends to ROUTER_DECISION_LOG.
+
+The decision log is opt-in (ROUTER_DECISION_LOG is empty by default). User
+texts are scam messages, so URLs, UPI ids / emails and digit runs (OTPs,
+phone and account numbers) are redacted before anything is written, and
+features are computed on redacted text as well. Records are written by a
+background thread and the file is trimmed to its newest records once it
+holds ROUTER_DECISION_LOG_MAX_ENTRIES.
+
+When the top route's probability is below ROUTER_LOCAL_THRESHOLD the master
+agent falls back to the LLM router. Train (or re-train) the model with:
+
+    python -m app.agents.master.local_classifier [decision_log] [model_path]
+"""
+
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.schemas import RouteEnum, UserRequest
+
+from .keyword_router import DEFAULT_REASON, matched_rules
+from .types import RouterDecision
+
+_CACHE_DIR = Path(__file__).resolve().parents[3] / ".cache"
+
+LOCAL_THRESHOLD = float(os.getenv("ROUTER_LOCAL_THRESHOLD", "0.8"))
+# The decision log is opt-in; set ROUTER_MODEL_PATH="" to never load a model.
+DECISION_LOG_PATH = os.getenv("ROUTER_DECISION_LOG", "")
+DECISION_LOG_MAX_ENTRIES = int(os.getenv("ROUTER_DECISION_LOG_MAX_ENTRIES", "20000"))
+MODEL_PATH = os.getenv("ROUTER_MODEL_PATH", str(_CACHE_DIR / "router_model.npz"))
+
+ROUTES: List[RouteEnum] = list(RouteEnum)
+N_FEATURES = 1 << 15
+# Probability mass a single matching keyword rule puts on its route.
+RULE_CONFIDENCE = 0.9
+
+_TOKEN = re.compile(r"\w+")
+_REDACTIONS = (
+    (re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE), " <url> "),
+    (re.compile(r"\S+@\S+"), " <upi> "),
+    (re.compile(r"\+?\d[\d\s-]*\d"), " <num> "),
+)
+
+
+def redact(text: str) -> str:
+    """Mask URLs, UPI ids / emails and multi-digit numbers (OTPs, phones, accounts)."""
+    for pattern, placeholder in _REDACTIONS:
+        text = pattern.sub(placeholder, text)
+    return " ".join(text.split())
+
+
+def _hash(gram: str) -> int:
+    return zlib.crc32(gram.encode("utf-8")) & (N_FEATURES - 1)
+
+
+def features(text: str) -> np.ndarray:
+    """Unique hashed feature ids: word unigrams, word bigrams, char trigrams."""
+    tokens = _TOKEN.findall(redact(text).lower())
+    grams = [f"w:{t}" for t in tokens]
+    grams += [f"b:{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for t in tokens:
+        padded = f"^{t}$"
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    if not grams:
+        return np.zeros(0, dtype=np.int64)
+    return np.unique(np.fromiter((_hash(g) for g in grams), dtype=np.int64, count=len(grams)))
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max())
+    return exp / exp.sum()
+
+
+class HashedNgramModel:
+    """Multinomial logistic regression over hashed n-gram features."""
+
+    def __init__(self, n_features: int = N_FEATURES, n_routes: int = len(ROUTES)):
+        self.weights = np.zeros((n_features, n_routes), dtype=np.float32)
+        self.bias = np.zeros(n_routes, dtype=np.float32)
+
+    def _logits(self, idx: np.ndarray) -> np.ndarray:
+        if idx.size == 0:
+            return self.bias.copy()
+        return self.weights[idx].sum(axis=0) / np.sqrt(idx.size) + self.bias
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        return _softmax(self._logits(features(text)))
+
+    def fit(
+        self,
+        texts: Sequence[str],
+        labels: Sequence[RouteEnum],
+        epochs: int = 20,
+        lr: float = 0.5,
+        seed: int = 0,
+    ) -> "HashedNgramModel":
+        """Plain per-example SGD on the cross-entropy loss."""
+        rows = [features(t) for t in texts]
+        targets = np.array([ROUTES.index(RouteEnum(l)) for l in labels])
+        rng = np.random.default_rng(seed)
+        for _ in range(epochs):
+            for i in rng.permutation(len(rows)):
+                idx = rows[i]
+                grad = _softmax(self._logits(idx))
+                grad[targets[i]] -= 1.0
+                if idx.size:
+                    self.weights[idx] -= (lr / np.sqrt(idx.size)) * grad
+                self.bias -= lr * 0.1 * grad
+        return self
+
+    def save(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f, weights=self.weights, bias=self.bias, routes=np.array([r.value for r in ROUTES])
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "HashedNgramModel":
+        data = np.load(path)
+        if [str(r) for r in data["routes"]] != [r.value for r in ROUTES]:
+            raise ValueError("Router model was trained for a different set of routes.")
+        model = cls(n_features=data["weights"].shape[0])
+        model.weights = data["weights"].astype(np.float32)
+        model.bias = data["bias"].astype(np.float32)
+        return model
+
+
+class DecisionLog:
+    """
+    Append-only JSONL log of LLM router decisions (the model's training data).
+
+    append() only queues the redacted record; a background thread writes it.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DECISION_LOG_PATH,
+        max_entries: int = DECISION_LOG_MAX_ENTRIES,
+    ):
+        self.path = path or None
+        self.max_entries = max_entries
+        self._queue: "queue.Queue[Dict[str, str]]" = queue.Queue()
+        self._write_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._count: Optional[int] = None
+
+    def append(self, user_req: UserRequest, decision: RouterDecision) -> None:
+        if not self.path or not user_req.text:
+            return
+        self._queue.put(
+            {"text": redact(user_req.text), "route": decision.route.value, "reason": decision.reason}
+        )
+        if self._writer is None:
+            with self._write_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(
+                        target=self._write_loop, name="router-decision-log", daemon=True
+                    )
+                    self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            records = [self._queue.get()]
+            self._write(records + self._drain())
+
+    def _drain(self) -> List[Dict[str, str]]:
+        records = []
+        while True:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                return records
+
+    def flush(self) -> None:
+        """Write every queued record before returning."""
+        records = self._drain()
+        if records:
+            self._write(records)
+        self._queue.join()
+
+    def _write(self, records: List[Dict[str, str]]) -> None:
+        try:
+            with self._write_lock:
+                if not self.path:
+                    return
+                path = Path(self.path)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                if self._count is None:
+                    self._count = 0
+                    if path.exists():
+                        with open(path, "rb") as f:
+                            self._count = sum(1 for _ in f)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+                self._count += len(records)
+                if self._count > self.max_entries:
+                    self._trim(path)
+        except OSError as exc:
+            logging.warning(f"Could not log router decisions: {exc}")
+        finally:
+            for _ in records:
+                self._queue.task_done()
+
+    def _trim(self, path: Path) -> None:
+        # Caller holds the write lock: keep the newest 3/4 of max_entries.
+        keep = self.max_entries * 3 // 4
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()[-keep:] if keep else []
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp, path)
+        self._count = len(lines)
+
+    def read(self) -> Tuple[List[str], List[RouteEnum]]:
+        self.flush()
+        texts: List[str] = []
+        labels: List[RouteEnum] = []
+        if not self.path or not Path(self.path).exists():
+            return texts, labels
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    labels.append(RouteEnum(record["route"]))
+                    texts.append(record["text"])
+                except (ValueError, KeyError):
+                    continue
+        return texts, labels
+
+
+class LocalClassifier:
+    def __init__(
+        self,
+        model: Optional[HashedNgramModel] = None,
+        threshold: float = LOCAL_THRESHOLD,
+        model_path: Optional[str] = MODEL_PATH,
+    ):
+        self.model = model
+        self.threshold = threshold
+        self.model_path = model_path or None
+        self._model_checked = model is not None
+
+    def _get_model(self) -> Optional[HashedNgramModel]:
+        if not self._model_checked:
+            self._model_checked = True
+            if self.model_path and Path(self.model_path).exists():
+                try:
+                    self.model = HashedNgramModel.load(self.model_path)
+                except Exception as exc:
+                    logging.warning(f"Could not load router model {self.model_path}: {exc}")
+        return self.model
+
+    def probabilities(
+        self,
+        text: Optional[str],
+        metadata: Optional[Dict[str, Any]] = None,
+        file_id: Optional[str] = None,
+    ) -> Tuple[Optional[np.ndarray], Dict[RouteEnum, str]]:
+        """Per-route probabilities (ROUTES order; None when no signal fired) and rule reasons."""
+        distributions = []
+        reasons: Dict[RouteEnum, str] = {}
+
+        matches = matched_rules(text, metadata, file_id)
+        if matches:
+            for route, reason in matches:
+                reasons.setdefault(route, reason)
+            rule_dist = np.full(len(ROUTES), (1.0 - RULE_CONFIDENCE) / len(ROUTES))
+            for route in reasons:
+                rule_dist[ROUTES.index(route)] += RULE_CONFIDENCE / len(reasons)
+            distributions.append(rule_dist)
+
+        model = self._get_model()
+        if model is not None and text:
+            distributions.append(model.predict_proba(text))
+
+        if not distributions:
+            return None, reasons
+        return np.mean(distributions, axis=0), reasons
+
+    def classify(
+        self,
+        text: Optional[str],
+        metadata: Optional[Dict[str, Any]] = None,
+        file_id: Optional[str] = None,
+    ) -> Tuple[RouterDecision, float]:
+        """Best local guess and its confidence (0 when no signal fired)."""
+        probs, reasons = self.probabilities(text, metadata, file_id)
+        if probs is None:
+            return RouterDecision(route=RouteEnum.SCAM_CHECK, reason=DEFAULT_REASON), 0.0
+
+        best = int(np.argmax(probs))
+        route = ROUTES[best]
+        reason = reasons.get(route, "Matches previously routed requests.")
+        return RouterDecision(route=route, reason=reason), float(probs[best])
+
+    def decide(self, user_req: UserRequest) -> Optional[RouterDecision]:
+        """The local decision if it clears the threshold, else None (ask the LLM)."""
+        decision, confidence = self.classify(user_req.text, user_req.metadata, user_req.file_id)
+        if confidence < self.threshold:
+            return None
+        return decision
+
+
+def train(log_path: str = DECISION_LOG_PATH, model_path: str = MODEL_PATH) -> HashedNgramModel:
+    if not log_path:
+        raise ValueError("No decision log: set ROUTER_DECISION_LOG or pass its path")
+    texts, labels = DecisionLog(log_path).read()
+    if not texts:
+        raise ValueError(f"No router decisions found in {log_path}")
+    model = HashedNgramModel().fit(texts, labels)
+    model.save(model_path)
+    return model
+
+
+local_classifier = LocalClassifier()
+decision_log = DecisionLog()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    log_arg = args[0] if args else DECISION_LOG_PATH
+    model_arg = args[1] if len(args) > 1 else MODEL_PATH
+    train(log_arg, model_arg)
+    print(f"Trained router model from {log_arg} → {model_arg}")
@@ -7,39 +7,54 @@ to execute: Scam, Loan, or Policy.
 
 It uses:
 - Optional route_hint from the UserRequest
-- LLM-based intent classification (router_prompt.txt)
+- A local fast-path classifier (local_classifier.py: keyword rules + hashed
+  n-gram model), when it is confident enough
+- LLM-based intent classification (router_prompt.txt) otherwise; those
+  decisions are logged as training data for the local model, and the cheap
+  local first steps of the likely routes run speculatively meanwhile
+  (speculation.py)
 - Returns a unified AgentResponse
 
+While the LLM circuit breaker (app.core.circuit_breaker) is open, requests
+are served in local-only mode: keyword routing (keyword_router.py) and
+LLM-free pipelines, with AgentResponse.degraded set.
+
+With UserRequest.defer_enrichment, routing never waits for the LLM router
+(local classifier, then keyword rules) and a scam check returns its local
+verdict immediately, with the educator's explanation generated in the
+background under AgentResponse.enrichment_token.
+
 NOTE: Right now this is a plain Python orchestrator.
 To integrate with Google ADK, you can wrap `route_request` in an ADK LlmAgent
 and use `adk web` to inspect it visually.
 """
 
 import json
-from pathlib import Path
-from typing import Any, Dict
+import time
+from typing import Any, Dict, Optional, Tuple
 
 from app.schemas import (
     UserRequest,
     AgentResponse,
     AgentError,
     RouteEnum,
-    LoanIngestionRequest,
     PolicyQARequest,
-    ScamAnalysisRequest,
 )
+from app.core import events, metrics
+from app.core.circuit_breaker import llm_degraded
 from app.core.gemini import run_gemini
+from app.core.prompt_registry import prompts
 from app.agents.loan.pipeline import run_loan_pipeline
 from app.agents.policy.pipeline import run_policy_pipeline
-from app.agents.scam.pipeline import run_scam_pipeline  # placeholder for teammate
+from app.agents.scam.pipeline import run_scam_pipeline, run_scam_two_phase
 
+from .keyword_router import classify_by_keywords
+from .local_classifier import decision_log, local_classifier
+from .speculation import Speculation, loan_request, scam_request, start_speculation
 from .types import RouterDecision
 
-ROUTER_PROMPT_PATH = Path("app/agents/master/router_prompt.txt")
-
-
 def _load_router_prompt() -> str:
-    return ROUTER_PROMPT_PATH.read_text(encoding="utf-8")
+    return prompts.get("master.router")
 
 
 async def classify_route(user_req: UserRequest) -> RouterDecision:
@@ -62,7 +77,7 @@ async def classify_route(user_req: UserRequest) -> RouterDecision:
         },
     }
 
-    llm_output = await run_gemini(payload)
+    llm_output = await run_gemini(payload, stage="master.router")
 
     if "error" in llm_output:
         raise RuntimeError(f"Router LLM error: {llm_output['error']}")
@@ -84,54 +99,104 @@ async def route_request(user_req: UserRequest) -> AgentResponse:
     Main entry point used by FastAPI.
 
     1. Uses route_hint if provided.
-    2. Otherwise calls classify_route().
+    2. Otherwise the local classifier, falling back to classify_route().
     3. Calls the appropriate pipeline.
+
+    Latency and outcome are recorded per final_route in app.core.metrics.
     """
 
+    started = time.perf_counter()
+    response = await _route_request(user_req)
+    metrics.observe_request(
+        response.final_route.value,
+        time.perf_counter() - started,
+        ok=response.error is None,
+    )
+    return response
+
+
+async def _classify(
+    user_req: UserRequest,
+    local_only: bool,
+) -> Tuple[RouterDecision, Optional[Speculation]]:
+    speculation = None
+    if not local_only:
+        decision = local_classifier.decide(user_req)
+        if decision is not None:
+            metrics.observe_router_decision("local")
+            return decision, None
+    if not local_only and not user_req.defer_enrichment:
+        speculation = start_speculation(user_req, local_classifier)
+        try:
+            decision = await classify_route(user_req)
+            decision_log.append(user_req, decision)
+            metrics.observe_router_decision("llm")
+            return decision, speculation
+        except Exception:
+            # The failure may just have tripped the breaker; if so, degrade.
+            if not llm_degraded():
+                if speculation is not None:
+                    speculation.cancel()
+                raise
+    metrics.observe_router_decision("keywords")
+    decision = classify_by_keywords(user_req.text, user_req.metadata, file_id=user_req.file_id)
+    return decision, speculation
+
+
+async def _route_request(user_req: UserRequest) -> AgentResponse:
+    local_only = llm_degraded()
+    speculation: Optional[Speculation] = None
     try:
         # 1. Use user-provided hint if available
         if user_req.route_hint:
             final_route = user_req.route_hint
             reason = "Used route_hint provided by client."
+            metrics.observe_router_decision("hint")
         else:
-            # 2. Otherwise classify with LLM
-            decision = await classify_route(user_req)
+            # 2. Otherwise classify locally / with LLM (keyword rules in local-only mode)
+            async with events.stage("master.router"):
+                decision, speculation = await _classify(user_req, local_only)
             final_route = decision.route
             reason = decision.reason
+            local_only = local_only or llm_degraded()
+
+        events.emit("route_selected", route=final_route.value, reason=reason)
+
+        # Inputs already computed speculatively for the chosen route, if any
+        prefetched: Dict[str, Any] = {}
+        if speculation is not None:
+            prefetched = await speculation.take(final_route) or {}
 
         # 3. Dispatch to the selected pipeline
+        enrichment_token: Optional[str] = None
         if final_route == RouteEnum.LOAN_DOC:
-            payload = LoanIngestionRequest(
-                language=user_req.language,
-                source={
-                    "file_id": user_req.file_id,
-                    "text_content": user_req.text,
-                },
+            result = await run_loan_pipeline(
+                loan_request(user_req), local_only=local_only, **prefetched
             )
-            result = await run_loan_pipeline(payload)
 
         elif final_route == RouteEnum.POLICY_QA:
             payload = PolicyQARequest(
                 question=user_req.text or "",
                 language=user_req.language,
             )
-            result = await run_policy_pipeline(payload)
+            result = await run_policy_pipeline(payload, local_only=local_only, **prefetched)
+
+        elif final_route == RouteEnum.SCAM_CHECK and user_req.defer_enrichment and not local_only:
+            result, enrichment_token = await run_scam_two_phase(
+                scam_request(user_req), **prefetched
+            )
 
         elif final_route == RouteEnum.SCAM_CHECK:
-            payload = ScamAnalysisRequest(
-                text=user_req.text or "",
-                language=user_req.language,
-                url=user_req.metadata.get("url"),
-                upi_id=user_req.metadata.get("upi_id"),
-                channel=user_req.metadata.get("channel"),
+            result = await run_scam_pipeline(
+                scam_request(user_req), local_only=local_only, **prefetched
             )
-            result = await run_scam_pipeline(payload)
 
         else:
             return AgentResponse(
                 final_route=final_route,
                 data=None,
                 error=AgentError(message="Unknown route selected by router."),
+                degraded=local_only,
                 debug_info={"reason": reason},
             )
 
@@ -139,14 +204,19 @@ async def route_request(user_req: UserRequest) -> AgentResponse:
         return AgentResponse(
             final_route=final_route,
             data=result,
+            degraded=local_only,
+            enrichment_token=enrichment_token,
             debug_info={"router_reason": reason},
         )
 
     except Exception as exc:
         # Catch-all failure
+        if speculation is not None:
+            speculation.cancel()
         return AgentResponse(
             final_route=user_req.route_hint or RouteEnum.SCAM_CHECK,
             data=None,
             error=AgentError(message=str(exc)),
+            degraded=local_only,
             debug_info={"router_failed": True},
         )
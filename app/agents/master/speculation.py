@@ -0,0 +1,167 @@
+"""
+Speculative Dispatch
+--------------------
+While the LLM router is still deciding, the cheap, LLM-free first step of the
+most likely routes is started in parallel:
+
+- SCAM_CHECK → risk_analyze()            (pattern match)
+- LOAN_DOC   → run_ingestion_agent()     (document text)
+- POLICY_QA  → fetch_local_documents()   (local policy file)
+
+Nothing that leaves the process is speculated: the RBI scrape stays in the
+policy pipeline, where its stage is memoized, and cancelling a losing branch
+cannot stop work already handed to a thread.
+
+Once the route is known, the winning branch's result is handed to its
+pipeline and the other branches are cancelled. Candidate routes come from
+the local classifier's distribution (at most SPECULATION_MAX_ROUTES routes
+with probability ≥ SPECULATION_MIN_PROB; SCAM_CHECK when nothing fired,
+matching the router's own default).
+
+Metrics (app.core.metrics):
+- finpal_speculation_branches_total{route, outcome=used|wasted|failed}
+- finpal_speculation_seconds_total{kind=saved|wasted}
+    saved  – winner's work finished before the router answered
+    wasted – work done by branches that lost
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core import metrics
+from app.schemas import (
+    LoanIngestionRequest,
+    RouteEnum,
+    ScamAnalysisRequest,
+    UserRequest,
+)
+from app.agents.loan.ingestion_agent import run_ingestion_agent
+from app.agents.policy.policy_fetch import fetch_local_documents
+from app.agents.scam.risk_analyzer import risk_analyze
+
+from .local_classifier import ROUTES, LocalClassifier
+
+SPECULATION_ENABLED = os.getenv("ROUTER_SPECULATION", "1") != "0"
+SPECULATION_MAX_ROUTES = int(os.getenv("SPECULATION_MAX_ROUTES", "2"))
+SPECULATION_MIN_PROB = float(os.getenv("SPECULATION_MIN_PROB", "0.2"))
+
+
+def loan_request(user_req: UserRequest) -> LoanIngestionRequest:
+    return LoanIngestionRequest(
+        language=user_req.language,
+        source={
+            "file_id": user_req.file_id,
+            "text_content": user_req.text,
+        },
+    )
+
+
+def scam_request(user_req: UserRequest) -> ScamAnalysisRequest:
+    return ScamAnalysisRequest(
+        text=user_req.text or "",
+        language=user_req.language,
+        url=user_req.metadata.get("url"),
+        upi_id=user_req.metadata.get("upi_id"),
+        channel=user_req.metadata.get("channel"),
+    )
+
+
+async def _scam_branch(user_req: UserRequest) -> Dict[str, Any]:
+    return {"base": await asyncio.to_thread(risk_analyze, scam_request(user_req))}
+
+
+async def _loan_branch(user_req: UserRequest) -> Dict[str, Any]:
+    return {"raw_text": await run_ingestion_agent(loan_request(user_req))}
+
+
+async def _policy_branch(user_req: UserRequest) -> Dict[str, Any]:
+    return {"local_docs": await fetch_local_documents()}
+
+
+BRANCHES: Dict[RouteEnum, Callable[[UserRequest], Awaitable[Dict[str, Any]]]] = {
+    RouteEnum.SCAM_CHECK: _scam_branch,
+    RouteEnum.LOAN_DOC: _loan_branch,
+    RouteEnum.POLICY_QA: _policy_branch,
+}
+
+
+def candidate_routes(
+    user_req: UserRequest,
+    classifier: LocalClassifier,
+    max_routes: int = SPECULATION_MAX_ROUTES,
+    min_prob: float = SPECULATION_MIN_PROB,
+) -> List[RouteEnum]:
+    probs, _ = classifier.probabilities(user_req.text, user_req.metadata, user_req.file_id)
+    if probs is None:
+        return [RouteEnum.SCAM_CHECK]
+    ranked = sorted(range(len(ROUTES)), key=lambda i: probs[i], reverse=True)
+    return [ROUTES[i] for i in ranked[:max_routes] if probs[i] >= min_prob]
+
+
+class _Branch:
+    def __init__(self, route: RouteEnum, coro: Awaitable[Dict[str, Any]]):
+        self.route = route
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.task = asyncio.ensure_future(coro)
+        self.task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Future) -> None:
+        self.finished = time.monotonic()
+        if not task.cancelled():
+            task.exception()  # losers may fail unobserved; don't warn about it
+
+    def work_until(self, moment: float) -> float:
+        end = self.finished if self.finished is not None else moment
+        return max(0.0, min(end, moment) - self.started)
+
+
+class Speculation:
+    """Speculative branches for one request; resolve with take(route)."""
+
+    def __init__(self, user_req: UserRequest, routes: List[RouteEnum]):
+        self.branches = {
+            route: _Branch(route, BRANCHES[route](user_req)) for route in routes if route in BRANCHES
+        }
+        self._resolved = False
+
+    async def take(self, route: RouteEnum) -> Optional[Dict[str, Any]]:
+        """
+        Prefetched inputs for `route`'s pipeline (None if it was not
+        speculated or its branch failed); every other branch is cancelled.
+        """
+        decided = time.monotonic()
+        winner = self.branches.get(route)
+        self._settle(decided, winner)
+        if winner is None:
+            return None
+        try:
+            result = await winner.task
+        except Exception:
+            metrics.observe_speculation(route.value, "failed", wasted=winner.work_until(time.monotonic()))
+            return None
+        metrics.observe_speculation(route.value, "used", saved=winner.work_until(decided))
+        return result
+
+    def cancel(self) -> None:
+        """Drop all branches (e.g. when routing failed)."""
+        self._settle(time.monotonic(), None)
+
+    def _settle(self, decided: float, winner: Optional[_Branch]) -> None:
+        if self._resolved:
+            return
+        self._resolved = True
+        for branch in self.branches.values():
+            if branch is winner:
+                continue
+            branch.task.cancel()
+            metrics.observe_speculation(branch.route.value, "wasted", wasted=branch.work_until(decided))
+
+
+def start_speculation(user_req: UserRequest, classifier: LocalClassifier) -> Optional[Speculation]:
+    if not SPECULATION_ENABLED:
+        return None
+    routes = candidate_routes(user_req, classifier)
+    return Speculation(user_req, routes) if routes else None
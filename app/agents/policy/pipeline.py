@@ -5,43 +5,93 @@ Policy & Rules Pipeline
 High-level orchestrator for the policy team.
 
 Master agent calls:  await run_policy_pipeline(PolicyQARequest)
+
+POLICY_PIPELINE (agents_runtime stages):
+    policy.fetch_local  ┐
+                        ├→ policy.collect → policy.summarizer → policy.qa
+    policy.fetch_remote ┘
+
+The two fetches run concurrently; the RBI scrape and the summaries are
+memoized, so repeat questions only pay for policy.qa. Degraded results are
+used for the current answer but not memoized: a scrape where some RBI page
+failed, summaries with fallback entries (LLM error, open circuit), and the
+empty remote set used once every RBI page failed (after one retry).
+
+With local_only=True (LLM circuit open) only the local policy file is used
+and the answer is built from the ranked PolicyEntry bullets.
 """
 
-from typing import List
+import os
+from typing import List, Optional
 
+from app.core.agents_runtime import Pipeline, Stage, Uncached, run_agents
 from app.schemas import (
+    PolicyEntry,
     PolicyQARequest,
     PolicyQAResponse,
     PolicyRawDocument,
-    PolicyEntry,
 )
 
-from .policy_fetch import run_policy_fetch
-from .policy_summarizer import run_policy_summarizer
-from .policy_qa import run_policy_qa
-from .policy_fetch import run_policy_fetch
+from .policy_fetch import RBI_SOURCES, fetch_local_documents, fetch_remote_documents
+from .policy_summarizer import summarize_documents, summarize_locally
+from .policy_qa import run_policy_qa, answer_locally
+
+REMOTE_FETCH_TIMEOUT = float(os.getenv("POLICY_REMOTE_FETCH_TIMEOUT_SECONDS", "20"))
+REMOTE_MEMO_TTL = float(os.getenv("POLICY_REMOTE_MEMO_TTL_SECONDS", "3600"))
+SUMMARY_MEMO_TTL = float(os.getenv("POLICY_SUMMARY_MEMO_TTL_SECONDS", "3600"))
+
+
+async def _fetch_remote() -> List[PolicyRawDocument]:
+    docs = await fetch_remote_documents()
+    return docs if len(docs) == len(RBI_SOURCES) else Uncached(docs)
+
+
+async def _summarize(raw_docs: List[PolicyRawDocument]) -> List[PolicyEntry]:
+    entries, fallbacks = await summarize_documents(raw_docs)
+    return Uncached(entries) if fallbacks else entries
 
 
+def _collect(local_docs: List[PolicyRawDocument], remote_docs: List[PolicyRawDocument]) -> List[PolicyRawDocument]:
+    return local_docs + remote_docs
 
-async def run_policy_pipeline(request: PolicyQARequest) -> PolicyQAResponse:
+
+_FETCH_LOCAL = Stage("policy.fetch_local", fetch_local_documents, inputs=[], output="local_docs")
+
+POLICY_PIPELINE = Pipeline("policy", [
+    _FETCH_LOCAL,
+    Stage("policy.fetch_remote", _fetch_remote, inputs=[], output="remote_docs",
+          timeout=REMOTE_FETCH_TIMEOUT, retries=1, memo_ttl=REMOTE_MEMO_TTL,
+          fallback=lambda: []),
+    Stage("policy.collect", _collect, inputs=["local_docs", "remote_docs"], output="raw_docs"),
+    Stage("policy.summarizer", _summarize,
+          inputs=["raw_docs"], output="policy_entries", memo_ttl=SUMMARY_MEMO_TTL),
+    Stage("policy.qa", run_policy_qa, inputs=["request", "policy_entries"], output="response"),
+], result="response")
+
+POLICY_LOCAL_PIPELINE = Pipeline("policy.local", [
+    _FETCH_LOCAL,
+    Stage("policy.local_summary", summarize_locally,
+          inputs={"raw_docs": "local_docs"}, output="policy_entries"),
+    Stage("policy.local_qa", answer_locally, inputs=["request", "policy_entries"], output="response"),
+], result="response")
+
+
+async def run_policy_pipeline(
+    request: PolicyQARequest,
+    local_only: bool = False,
+    local_docs: Optional[List[PolicyRawDocument]] = None,
+) -> PolicyQAResponse:
     """
     End-to-end policy QA pipeline.
 
     1. Fetch / load raw policy docs (can be static for hackathon).
     2. Summarize them into PolicyEntry objects.
     3. Answer the user's question using those entries.
-    """
-
-    # 1. Fetch raw docs (or load from local JSON)
-    raw_docs: List[PolicyRawDocument] = await run_policy_fetch()
-
-    # 2. Summarize into structured entries (FAQ-style)
-    policy_entries: List[PolicyEntry] = await run_policy_summarizer(raw_docs)
 
-    # 3. RAG-style QA
-    response: PolicyQAResponse = await run_policy_qa(
-        request=request,
-        policy_entries=policy_entries,
-    )
-
-    return response
+    `local_docs` may be passed in when the local policy file was already
+    loaded speculatively; remote docs always come from the memoized
+    policy.fetch_remote stage.
+    """
+    if local_only:
+        return await run_agents(POLICY_LOCAL_PIPELINE, request=request, local_docs=local_docs)
+    return await run_agents(POLICY_PIPELINE, request=request, local_docs=local_docs)
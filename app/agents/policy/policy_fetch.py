@@ -1,7 +1,11 @@
+import asyncio
 import json
 import requests
 from bs4 import BeautifulSoup
 from pathlib import Path
+from typing import List
+
+from app.schemas import PolicyRawDocument
 
 LOCAL_POLICY_FILE = Path("app/data/policies/rbi_sebi_policies.json")
 
@@ -17,6 +21,10 @@ def load_local_policies():
     return []
 
 
+class PolicyFetchError(RuntimeError):
+    """No RBI source could be fetched."""
+
+
 def scrape_rbi_page(url):
     """Fetch RBI text content from a URL safely."""
     try:
@@ -42,10 +50,10 @@ def fetch_live_rbi_guidelines():
     return results
 
 
-def fetch_all_policies():
+def fetch_all_policies(include_remote=True):
     """Main function called by policy_summarizer & policy_qa."""
     local = load_local_policies()
-    remote = fetch_live_rbi_guidelines()
+    remote = fetch_live_rbi_guidelines() if include_remote else []
 
     combined = []
 
@@ -56,9 +64,58 @@ def fetch_all_policies():
         combined.append(item)
 
     return combined
-def run_policy_fetch():
+
+
+def _to_raw_documents(items) -> List[PolicyRawDocument]:
+    docs = []
+    counts = {"local": 0, "remote": 0}
+    for item in items:
+        content = str(item["content"])
+        kind = "local" if item["source"] == "local" else "remote"
+        docs.append(
+            PolicyRawDocument(
+                id=f"{kind}-{counts[kind]}",
+                source="local" if kind == "local" else "RBI",
+                title=content[:80] if kind == "local" else item["source"],
+                raw_text=content,
+            )
+        )
+        counts[kind] += 1
+    return docs
+
+
+async def fetch_local_documents() -> List[PolicyRawDocument]:
+    """Policy docs from LOCAL_POLICY_FILE."""
+    rules = await asyncio.to_thread(load_local_policies)
+    return _to_raw_documents([{"source": "local", "content": rule} for rule in rules])
+
+
+async def fetch_remote_documents() -> List[PolicyRawDocument]:
+    """
+    Policy docs scraped from RBI_SOURCES. Pages that fail are skipped;
+    raises PolicyFetchError when every page failed.
+    """
+    results = await asyncio.to_thread(fetch_live_rbi_guidelines)
+    if RBI_SOURCES and not results:
+        raise PolicyFetchError(f"none of {len(RBI_SOURCES)} RBI sources could be fetched")
+    return _to_raw_documents(results)
+
+
+async def run_policy_fetch(include_remote: bool = True) -> List[PolicyRawDocument]:
     """
-    Backwards-compatible wrapper used by pipeline.py.
-    Returns combined local + remote policy docs.
+    Backwards-compatible wrapper.
+    Returns combined local + remote policy docs; include_remote=False skips
+    the RBI scraping (used in local-only mode).
     """
-    return fetch_all_policies()
+    if not include_remote:
+        return await fetch_local_documents()
+    local, remote = await asyncio.gather(
+        fetch_local_documents(), fetch_remote_documents(), return_exceptions=True
+    )
+    if isinstance(local, BaseException):
+        raise local
+    if isinstance(remote, PolicyFetchError):
+        remote = []
+    elif isinstance(remote, BaseException):
+        raise remote
+    return local + remote
@@ -12,20 +12,20 @@ Output:
 We do a very lightweight "RAG":
 - Filter / rank entries by simple keyword overlap
 - Send the most relevant ones to Gemini 3 with a QA prompt
+
+answer_locally() skips the LLM and answers straight from the ranked
+entries' bullets (degraded mode).
 """
 
 from typing import List
-from pathlib import Path
 
 from app.schemas import PolicyQARequest, PolicyQAResponse, PolicyEntry
 from app.core.gemini import run_gemini
-
-
-PROMPT_PATH = "app/agents/policy/prompts/qa_prompt.txt"
+from app.core.prompt_registry import prompts
 
 
 def _load_prompt() -> str:
-    return Path(PROMPT_PATH).read_text(encoding="utf-8")
+    return prompts.get("policy.qa")
 
 
 def _simple_rank_entries(question: str, entries: List[PolicyEntry], top_k: int = 3) -> List[PolicyEntry]:
@@ -61,6 +61,37 @@ def _simple_rank_entries(question: str, entries: List[PolicyEntry], top_k: int =
     return filtered[:top_k]
 
 
+DEFAULT_STEPS = [
+    "Contact your bank through the official app, website, or branch.",
+    "Do not share OTP, PIN, or passwords with anyone on calls or messages.",
+    "Check RBI or SEBI official website for updated rules.",
+]
+
+DEFAULT_DISCLAIMERS = [
+    "This is not legal advice.",
+    "Financial regulations can change; always verify with official sources.",
+]
+
+
+def answer_locally(request: PolicyQARequest, policy_entries: List[PolicyEntry]) -> PolicyQAResponse:
+    """Answer with the bullets of the best-matching entries, no LLM involved."""
+
+    top_entries = _simple_rank_entries(request.question, policy_entries, top_k=3)
+    bullets = [b for e in top_entries for b in e.summary_bullets]
+    steps = [a for e in top_entries for a in e.actions_if_affected] or list(DEFAULT_STEPS)
+
+    return PolicyQAResponse(
+        language=request.language,
+        answer=" ".join(bullets) if bullets else "No matching rule was found in the local policy list.",
+        steps=steps,
+        disclaimers=[
+            "Quick answer from the local policy list; a detailed explanation is unavailable right now.",
+            *DEFAULT_DISCLAIMERS,
+        ],
+        source_ids=[e.id for e in top_entries],
+    )
+
+
 async def run_policy_qa(
     request: PolicyQARequest,
     policy_entries: List[PolicyEntry],
@@ -84,7 +115,7 @@ async def run_policy_qa(
         },
     }
 
-    llm_response = await run_gemini(payload)
+    llm_response = await run_gemini(payload, stage="policy.qa")
 
     try:
         response = PolicyQAResponse.model_validate(llm_response)
@@ -98,15 +129,8 @@ async def run_policy_qa(
                 "However, you should immediately contact your bank's official customer support "
                 "and verify the latest RBI/SEBI guidelines on their official website."
             ),
-            steps=[
-                "Contact your bank through the official app, website, or branch.",
-                "Do not share OTP, PIN, or passwords with anyone on calls or messages.",
-                "Check RBI or SEBI official website for updated rules.",
-            ],
-            disclaimers=[
-                "This is not legal advice.",
-                "Financial regulations can change; always verify with official sources.",
-            ],
+            steps=list(DEFAULT_STEPS),
+            disclaimers=list(DEFAULT_DISCLAIMERS),
             source_ids=[e.id for e in top_entries],
         )
 
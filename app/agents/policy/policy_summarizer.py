@@ -8,60 +8,83 @@ Output: List[PolicyEntry]
 Uses Gemini 3 to:
 - Convert raw regulatory language into user-friendly bullets
 - Provide 'when it applies' and 'actions_if_affected'
+
+Documents are micro-batched (app.core.llm_batch), so N documents cost
+roughly N / LLM_BATCH_MAX_SIZE Gemini round-trips.
+
+summarize_locally() builds minimal entries without the LLM (degraded mode).
 """
 
-from typing import List
-from pathlib import Path
+from typing import List, Tuple
 
 from app.schemas import PolicyRawDocument, PolicyEntry
-from app.core.gemini import run_gemini
-
-PROMPT_PATH = "app/agents/policy/prompts/summarize_prompt.txt"
+from app.core.llm_batch import run_gemini_batch
+from app.core.prompt_registry import prompts
 
 
 def _load_prompt() -> str:
-    return Path(PROMPT_PATH).read_text(encoding="utf-8")
+    return prompts.get("policy.summarizer")
+
+
+def _fallback_entry(doc: PolicyRawDocument) -> PolicyEntry:
+    text = doc.raw_text if len(doc.raw_text) <= 200 else doc.raw_text[:200] + "..."
+    return PolicyEntry(
+        id=doc.id,
+        title=doc.title,
+        category="general",
+        target_user="general_public",
+        summary_bullets=[text],
+        when_it_applies=None,
+        actions_if_affected=[],
+    )
+
+
+def summarize_locally(raw_docs: List[PolicyRawDocument]) -> List[PolicyEntry]:
+    """One entry per document, with the (clipped) raw text as its only bullet."""
+    return [_fallback_entry(doc) for doc in raw_docs]
 
 
 async def run_policy_summarizer(raw_docs: List[PolicyRawDocument]) -> List[PolicyEntry]:
     """
     Summarize raw policy documents into structured PolicyEntry objects.
     """
+    entries, _ = await summarize_documents(raw_docs)
+    return entries
+
+
+async def summarize_documents(raw_docs: List[PolicyRawDocument]) -> Tuple[List[PolicyEntry], int]:
+    """
+    Same as run_policy_summarizer(), plus how many entries fell back to
+    _fallback_entry() because the LLM failed or returned an invalid entry.
+    """
 
     prompt = _load_prompt()
 
-    # You can summarize one-by-one for clarity (small number of docs)
     entries: List[PolicyEntry] = []
+    fallbacks = 0
 
-    for doc in raw_docs:
-        payload = {
-            "system_instruction": prompt,
-            "user": {
+    llm_responses = await run_gemini_batch(
+        [
+            {
                 "id": doc.id,
                 "title": doc.title,
                 "source": doc.source,
                 "raw_text": doc.raw_text,
-            },
-        }
-
-        llm_response = await run_gemini(payload)
+            }
+            for doc in raw_docs
+        ],
+        system_instruction=prompt,
+        stage="policy.summarizer",
+    )
 
+    for doc, llm_response in zip(raw_docs, llm_responses):
         try:
             entry = PolicyEntry.model_validate(llm_response)
             entries.append(entry)
         except Exception as exc:
             # If parsing fails, create a fallback entry with minimal info
             print(f"[PolicySummarizer] Failed to parse PolicyEntry for {doc.id}: {exc}")
-            entries.append(
-                PolicyEntry(
-                    id=doc.id,
-                    title=doc.title,
-                    category="general",
-                    target_user="general_public",
-                    summary_bullets=[doc.raw_text[:200] + "..."],
-                    when_it_applies=None,
-                    actions_if_affected=[],
-                )
-            )
+            entries.append(_fallback_entry(doc))
+            fallbacks += 1
 
-    return entries
+    return entries, fallbacks
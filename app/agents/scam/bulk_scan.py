@@ -0,0 +1,246 @@
+"""
+Bulk Scam Scan
+--------------
+Scans whole message exports (an SMS inbox, a telco feed) for scams without
+a /guardian round-trip or an LLM call per message. Used by
+POST /guardian/scam/scan.
+
+- Input is streamed: NDJSON (one {"text", "id"?, "language"?} object or
+  JSON string per line) or CSV with a header row containing a "text"
+  column (plus optional "id" / "language"). Nothing is buffered beyond one
+  batch.
+- Messages are analyzed SCAM_SCAN_BATCH_SIZE at a time with
+  risk_analyze_batch() (one sparse TF-IDF product per batch), off the event
+  loop.
+- One line per input message is yielded as soon as its batch is done:
+    {"index": i, "id": ..., "result": ScamAnalysisResult}
+    {"index": i, "id": ..., "error": {"message": "..."}}   unparseable input
+- educate=True (opt-in) runs the educator LLM on high-risk hits only
+  (risk_score ≥ SCAM_SCAN_EDUCATE_MIN_RISK). Hits with identical local
+  results share one call, at most SCAM_SCAN_EDUCATE_CONCURRENCY run at a
+  time and at most SCAM_SCAN_MAX_EDUCATE per scan; the rest keep their
+  local explanation. Educated lines are yielded when their call finishes,
+  so output is in completion order, not input order.
+
+Usage:
+    async for line in scan_stream(request.stream(), "csv", educate=True):
+        ...
+"""
+
+import asyncio
+import csv
+import json
+import os
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+
+from app.core import metrics
+from app.schemas.scam import ScamAnalysisRequest, ScamAnalysisResult
+
+from .educator import enrich_explanation
+from .risk_analyzer import risk_analyze_batch
+
+SCAN_BATCH_SIZE = int(os.getenv("SCAM_SCAN_BATCH_SIZE", "256"))
+EDUCATE_MIN_RISK = float(os.getenv("SCAM_SCAN_EDUCATE_MIN_RISK", "0.75"))
+EDUCATE_CONCURRENCY = int(os.getenv("SCAM_SCAN_EDUCATE_CONCURRENCY", "4"))
+MAX_EDUCATE = int(os.getenv("SCAM_SCAN_MAX_EDUCATE", "100"))
+
+FORMATS = ("ndjson", "csv")
+
+# (index, id, request or parse error)
+ScanItem = Tuple[int, Optional[str], Union[ScamAnalysisRequest, Exception]]
+
+
+class ScanInputError(ValueError):
+    """The upload cannot be scanned at all (unknown format, missing CSV column)."""
+
+
+async def _lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Decoded lines (with their line ending) from a stream of byte chunks."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *complete, pending = pending.split(b"\n")
+        for line in complete:
+            yield line.decode("utf-8", errors="replace") + "\n"
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
+def _request(record: Dict[str, Any], language: str) -> ScamAnalysisRequest:
+    text = record.get("text")
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("missing 'text'")
+    return ScamAnalysisRequest(text=text, language=record.get("language") or language)
+
+
+def _record_id(record: Dict[str, Any]) -> Optional[str]:
+    value = record.get("id")
+    return str(value) if value not in (None, "") else None
+
+
+async def parse_ndjson(chunks: AsyncIterable[bytes], language: str = "en") -> AsyncIterator[ScanItem]:
+    index = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        record: Any = None
+        try:
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"text": record}
+            if not isinstance(record, dict):
+                raise ValueError("expected an object or a string")
+            yield index, _record_id(record), _request(record, language)
+        except ValueError as exc:
+            ident = _record_id(record) if isinstance(record, dict) else None
+            yield index, ident, exc
+        index += 1
+
+
+async def parse_csv(chunks: AsyncIterable[bytes], language: str = "en") -> AsyncIterator[ScanItem]:
+    header: Optional[List[str]] = None
+    index = 0
+    buffer = ""
+    async for line in _lines(chunks):
+        buffer += line
+        if buffer.count('"') % 2:  # inside a quoted field that spans lines
+            continue
+        rows, buffer = list(csv.reader([buffer])), ""
+        if not rows or not any(cell.strip() for cell in rows[0]):
+            continue
+        row = rows[0]
+        if header is None:
+            header = [name.strip().lstrip("\ufeff").lower() for name in row]
+            if "text" not in header:
+                raise ScanInputError("CSV header must have a 'text' column")
+            continue
+        record = dict(zip(header, row))
+        try:
+            yield index, _record_id(record), _request(record, language)
+        except ValueError as exc:
+            yield index, _record_id(record), exc
+        index += 1
+    if buffer.strip():
+        yield index, None, ValueError("unterminated quoted field")
+
+
+def parse(chunks: AsyncIterable[bytes], fmt: str, language: str = "en") -> AsyncIterator[ScanItem]:
+    if fmt == "ndjson":
+        return parse_ndjson(chunks, language)
+    if fmt == "csv":
+        return parse_csv(chunks, language)
+    raise ScanInputError(f"Unknown format {fmt!r} (expected one of {', '.join(FORMATS)})")
+
+
+async def _batches(items: AsyncIterable[ScanItem], size: int) -> AsyncIterator[List[ScanItem]]:
+    batch: List[ScanItem] = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _line(index: int, ident: Optional[str], outcome: Union[ScamAnalysisResult, Exception]) -> Dict[str, Any]:
+    line: Dict[str, Any] = {"index": index}
+    if ident is not None:
+        line["id"] = ident
+    if isinstance(outcome, Exception):
+        line["error"] = {"message": str(outcome)}
+        metrics.observe_scam_scan("error")
+    else:
+        line["result"] = outcome.model_dump(mode="json")
+        metrics.observe_scam_scan("scam" if outcome.is_scam else "safe")
+    return line
+
+
+def _with_explanation(result: ScamAnalysisResult, educated: ScamAnalysisResult) -> ScamAnalysisResult:
+    return result.model_copy(update={
+        "short_warning": educated.short_warning,
+        "detailed_explanation": list(educated.detailed_explanation),
+        "recommended_action": educated.recommended_action,
+    })
+
+
+async def scan_messages(
+    items: AsyncIterable[ScanItem],
+    educate: bool = False,
+    batch_size: int = SCAN_BATCH_SIZE,
+    educate_min_risk: float = EDUCATE_MIN_RISK,
+    educate_concurrency: int = EDUCATE_CONCURRENCY,
+    max_educate: int = MAX_EDUCATE,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield one output line (a dict) per parsed item; see the module docstring.
+    Closing the iterator early cancels pending educator calls.
+    """
+    semaphore = asyncio.Semaphore(max(1, educate_concurrency))
+    # Local result JSON → the shared educator call and the lines waiting on it
+    educating: Dict[str, "asyncio.Task[ScamAnalysisResult]"] = {}
+    waiting: Dict["asyncio.Task[ScamAnalysisResult]", List[Tuple[int, Optional[str], ScamAnalysisResult]]] = {}
+    pending: Set["asyncio.Task[ScamAnalysisResult]"] = set()
+
+    async def educate_one(result: ScamAnalysisResult) -> ScamAnalysisResult:
+        async with semaphore:
+            return await enrich_explanation(result.model_copy(deep=True))
+
+    def explained(task: "asyncio.Task[ScamAnalysisResult]", result: ScamAnalysisResult) -> ScamAnalysisResult:
+        if task.cancelled() or task.exception() is not None:
+            return result  # keep the local explanation
+        return _with_explanation(result, task.result())
+
+    def finished(task: "asyncio.Task[ScamAnalysisResult]") -> List[Dict[str, Any]]:
+        pending.discard(task)
+        return [_line(index, ident, explained(task, result)) for index, ident, result in waiting.pop(task)]
+
+    try:
+        async for batch in _batches(items, max(1, batch_size)):
+            parsed = [(i, ident, req) for i, ident, req in batch if isinstance(req, ScamAnalysisRequest)]
+            results = await asyncio.to_thread(risk_analyze_batch, [req for _, _, req in parsed])
+            local = {i: result for (i, _, _), result in zip(parsed, results)}
+
+            for index, ident, req in batch:
+                result = local.get(index)
+                if result is None:
+                    yield _line(index, ident, req)
+                    continue
+                if educate and result.is_scam and result.risk_score >= educate_min_risk:
+                    key = result.model_dump_json()
+                    task = educating.get(key)
+                    if task is None and len(educating) < max_educate:
+                        task = educating[key] = asyncio.ensure_future(educate_one(result))
+                        waiting[task] = []
+                        pending.add(task)
+                    if task is not None and not task.done():
+                        waiting[task].append((index, ident, result))
+                        continue
+                    if task is not None:  # shared call already finished
+                        result = explained(task, result)
+                yield _line(index, ident, result)
+
+            for task in [t for t in pending if t.done()]:
+                for line in finished(task):
+                    yield line
+
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                for line in finished(task):
+                    yield line
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def scan_stream(
+    chunks: AsyncIterable[bytes],
+    fmt: str,
+    language: str = "en",
+    educate: bool = False,
+    **options: Any,
+) -> AsyncIterator[Dict[str, Any]]:
+    """parse() + scan_messages(): raw upload bytes in, output lines out."""
+    async for line in scan_messages(parse(chunks, fmt, language), educate=educate, **options):
+        yield line
@@ -1,18 +1,33 @@
+import asyncio
 import json
-from pathlib import Path
+import sys
+from typing import List, Optional
 
 from app.schemas.scam import ScamAnalysisResult
-from app.core.gemini import run_gemini
+from app.core.circuit_breaker import llm_breaker
+from app.core.gemini import run_gemini_streamed
+from app.core.prompt_registry import prompts
 
-EDUCATOR_PROMPT_PATH = Path(__file__).parent / "prompts" / "educator_prompt.txt"
-EDUCATOR_PROMPT = EDUCATOR_PROMPT_PATH.read_text(encoding="utf-8")
+from .explanation_store import LANGUAGES, Explanation, ExplanationStore, explanation_store
+from .pattern_index import pattern_index
 
+# Same prompt, budget and cache TTL as "scam.educator", but scheduled at
+# background priority and never hedged, so a bulk fill doesn't compete with
+# live scam checks.
+PREFILL_STAGE = "scam.educator.prefill"
 
-async def enrich_explanation(result: ScamAnalysisResult) -> ScamAnalysisResult:
+
+class EnrichmentError(RuntimeError):
+    """The educator LLM call failed or returned no usable explanation."""
+
+
+async def generate_explanation(
+    result: ScamAnalysisResult, stage: str = "scam.educator"
+) -> Optional[Explanation]:
     """
-    Calls LLM only to improve explanation — does NOT change risk score or classification.
+    One educator LLM call for `result`; None if the call or its JSON failed.
     """
-    prompt = EDUCATOR_PROMPT + "\n\nDATA:\n" + json.dumps(result.model_dump())
+    prompt = prompts.get("scam.educator") + "\n\nDATA:\n" + json.dumps(result.model_dump())
 
     payload = {
         "system_instruction": "You are a helpful financial safety educator.",
@@ -20,24 +35,89 @@ async def enrich_explanation(result: ScamAnalysisResult) -> ScamAnalysisResult:
     }
 
     try:
-        update = await run_gemini(payload)
+        update = await run_gemini_streamed(payload, stage=stage)
     except Exception:
-        return result  # fallback on any error
+        return None
 
     # If run_gemini gave raw text under 'raw_output', try JSON parse:
     if isinstance(update, dict) and "raw_output" in update:
         try:
             update = json.loads(update["raw_output"])
         except json.JSONDecodeError:
-            return result
+            return None
+
+    # run_gemini reports failures as {"error": ...}
+    if not isinstance(update, dict) or "short_warning" not in update:
+        return None
 
-    if not isinstance(update, dict):
-        return result
+    action = update.get("what_to_do_now", result.recommended_action)
+    if isinstance(action, list):
+        action = " ".join(str(a) for a in action)
+    return {
+        "short_warning": update.get("short_warning") or result.short_warning,
+        "detailed_explanation": update.get("detailed_explanation", result.detailed_explanation),
+        "recommended_action": action or result.recommended_action,
+    }
 
-    result.short_warning = update.get("short_warning", result.short_warning)
-    result.detailed_explanation = update.get(
-        "detailed_explanation", result.detailed_explanation
-    )
-    result.recommended_action = update.get("what_to_do_now", result.recommended_action)
 
+def apply_explanation(result: ScamAnalysisResult, explanation: Explanation) -> ScamAnalysisResult:
+    result.short_warning = explanation["short_warning"]
+    result.detailed_explanation = list(explanation["detailed_explanation"])
+    result.recommended_action = explanation["recommended_action"]
     return result
+
+
+async def enrich_explanation(result: ScamAnalysisResult) -> ScamAnalysisResult:
+    """
+    Improves the explanation only — does NOT change risk score or classification.
+
+    Served from the explanation store when the (pattern, language) is known;
+    otherwise calls the LLM and records the answer. Raises EnrichmentError
+    when the LLM gives no explanation; callers keep the local one.
+    """
+    subject, stored = explanation_store.lookup(result)
+    if stored is not None:
+        return apply_explanation(result, stored)
+
+    explanation = await generate_explanation(result)
+    if explanation is None:
+        raise EnrichmentError(f"no educator explanation for {result.classification!r}")
+    explanation_store.put(subject, result.language, explanation, label=result.classification)
+    return apply_explanation(result, explanation)
+
+
+async def prefill_explanations(
+    languages: Optional[List[str]] = None,
+    store: ExplanationStore = explanation_store,
+    concurrency: int = 4,
+) -> int:
+    """
+    Generate every missing (pattern, language) explanation of the current
+    pattern index; returns how many were added.
+
+    Calls run as PREFILL_STAGE. While the LLM circuit is degraded the
+    remaining entries are skipped (left for the next run), so the fill
+    neither adds to the failures nor takes the half-open probes.
+    """
+    todo = store.missing(pattern_index.snapshot(), languages or LANGUAGES)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fill(subject: str, result: ScamAnalysisResult) -> bool:
+        async with semaphore:
+            if llm_breaker.degraded():
+                return False
+            explanation = await generate_explanation(result, stage=PREFILL_STAGE)
+        if explanation is None:
+            return False
+        store.put(subject, result.language, explanation, label=result.classification)
+        return True
+
+    added = await asyncio.gather(*(fill(subject, result) for subject, result in todo))
+    return sum(added)
+
+
+if __name__ == "__main__":
+    # python -m app.agents.scam.educator [language ...]
+    added = asyncio.run(prefill_explanations(sys.argv[1:] or None))
+    explanation_store.flush()
+    print(f"added {added} explanation(s); {explanation_store.stats()['entries']} stored")
@@ -0,0 +1,99 @@
+"""
+Deferred Enrichment
+-------------------
+Second phase of a two-phase scam check (UserRequest.defer_enrichment): the
+local risk_analyze() verdict is returned at once, and the educator's
+explanation is generated in the background under an enrichment token.
+
+- submit(result) starts enrich_explanation() on a copy of `result` and
+  returns the token; get(token) reports pending / done / failed and, once
+  done, the enriched result; wait(token) awaits it (used by the SSE
+  endpoints).
+- Entries (and their results) are dropped SCAM_ENRICHMENT_TTL_SECONDS
+  after submission; past SCAM_ENRICHMENT_MAX_ENTRIES the oldest go first.
+  An expired entry that is still running is cancelled.
+
+Tokens live in this process's memory: with several workers, the follow-up
+request has to reach the same one (sticky sessions), like the job queue's
+one-pool-per-store assumption.
+
+Usage:
+    token = enrichments.submit(base)
+    enrichments.get(token)            → ScamEnrichment(status="pending" | "done" | "failed", ...)
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.schemas.scam import ScamAnalysisResult, ScamEnrichment
+
+from .educator import enrich_explanation
+
+ENRICHMENT_TTL_SECONDS = float(os.getenv("SCAM_ENRICHMENT_TTL_SECONDS", "600"))
+ENRICHMENT_MAX_ENTRIES = int(os.getenv("SCAM_ENRICHMENT_MAX_ENTRIES", "10000"))
+
+
+class EnrichmentRegistry:
+    def __init__(self, ttl: float = ENRICHMENT_TTL_SECONDS, max_entries: int = ENRICHMENT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        # token → (background task, submitted at, monotonic)
+        self._entries: "OrderedDict[str, Tuple[asyncio.Task[ScamAnalysisResult], float]]" = OrderedDict()
+
+    def submit(self, result: ScamAnalysisResult) -> str:
+        """Start enriching a copy of `result` on the running loop; returns its token."""
+        self._expire()
+        token = uuid.uuid4().hex
+        task = asyncio.ensure_future(enrich_explanation(result.model_copy(deep=True)))
+        task.add_done_callback(self._log_failure)
+        self._entries[token] = (task, time.monotonic())
+        while len(self._entries) > self.max_entries:
+            _, (oldest, _) = self._entries.popitem(last=False)
+            oldest.cancel()
+        return token
+
+    @staticmethod
+    def _log_failure(task: "asyncio.Task[ScamAnalysisResult]") -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logging.warning(f"Deferred scam enrichment failed: {task.exception()}")
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        while self._entries:
+            token, (task, submitted) = next(iter(self._entries.items()))
+            if submitted >= cutoff:
+                break
+            del self._entries[token]
+            task.cancel()
+
+    def get(self, token: str) -> Optional[ScamEnrichment]:
+        """Current state of an enrichment; None for unknown or expired tokens."""
+        self._expire()
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        task = entry[0]
+        if not task.done():
+            return ScamEnrichment(token=token, status="pending")
+        if task.cancelled() or task.exception() is not None:
+            return ScamEnrichment(token=token, status="failed")
+        return ScamEnrichment(token=token, status="done", result=task.result())
+
+    async def wait(self, token: str, timeout: Optional[float] = None) -> Optional[ScamEnrichment]:
+        """Wait (up to `timeout` seconds) for an enrichment to finish, then get() it."""
+        entry = self._entries.get(token)
+        if entry is not None and not entry[0].done():
+            await asyncio.wait([entry[0]], timeout=timeout)
+        return self.get(token)
+
+    def stats(self) -> Dict[str, int]:
+        pending = sum(1 for task, _ in self._entries.values() if not task.done())
+        return {"entries": len(self._entries), "pending": pending}
+
+
+enrichments = EnrichmentRegistry()
@@ -0,0 +1,234 @@
+"""
+Educator Explanation Store
+--------------------------
+Educator output (short_warning, detailed_explanation, recommended_action)
+generated ahead of time per (scam pattern, language), so enrich_explanation()
+answers known-pattern checks without an LLM call.
+
+- An entry is keyed on what the explanation depends on: the LLM backend,
+  the educator prompt version, the pattern (a fingerprint of its name,
+  modus operandi, red flags and recommended action, so editing a pattern
+  invalidates it) and the language. "probably safe" results share one
+  entry per language; a near-duplicate report label without a pattern is
+  keyed on the label.
+- prefill_explanations() (educator.py) generates every missing entry for
+  SCAM_EXPLANATION_LANGUAGES. Run it offline with
+      python -m app.agents.scam.educator [language ...]
+  The app runs it at startup and again every
+  SCAM_EXPLANATION_FILL_INTERVAL_SECONDS (start()/stop() in the lifespan;
+  negative disables), so patterns added to the index are covered before
+  users hit them.
+- A miss on the request path (novel pattern / language) still calls the
+  LLM, and the answer is recorded for next time.
+- Persisted as JSON to SCAM_EXPLANATIONS_PATH ("" keeps it in memory),
+  rewritten atomically by a background thread; puts made while a write is
+  running are batched into the next one. flush() (called by stop()) waits
+  for pending writes.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core import llm_backend, metrics
+from app.core.prompt_registry import prompts
+from app.schemas.scam import ScamAnalysisResult
+
+from .pattern_index import CompiledPattern, PatternSnapshot, pattern_index
+from .risk_analyzer import SAFE_CLASSIFICATION, pattern_result, safe_result
+
+_CACHE_DIR = Path(__file__).resolve().parents[3] / ".cache"
+
+STORE_PATH = os.getenv("SCAM_EXPLANATIONS_PATH", str(_CACHE_DIR / "scam_explanations.json"))
+LANGUAGES = [
+    lang.strip() for lang in os.getenv("SCAM_EXPLANATION_LANGUAGES", "en").split(",") if lang.strip()
+]
+FILL_INTERVAL_SECONDS = float(os.getenv("SCAM_EXPLANATION_FILL_INTERVAL_SECONDS", "300"))
+
+FIELDS = ("short_warning", "detailed_explanation", "recommended_action")
+
+Explanation = Dict[str, Any]  # FIELDS → value
+
+
+def _digest(*parts: Any) -> str:
+    blob = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def pattern_fingerprint(pattern: CompiledPattern) -> str:
+    return _digest(
+        pattern.scam_name, pattern.modus_operandi, list(pattern.red_flags), pattern.recommended_user_action
+    )
+
+
+def subject_for(result: ScamAnalysisResult, snapshot: PatternSnapshot) -> str:
+    """What `result`'s explanation is about: a pattern fingerprint, "safe" or a label."""
+    if not result.is_scam or result.classification == SAFE_CLASSIFICATION:
+        return "safe"
+    idx = snapshot.by_name.get(result.classification)
+    if idx is not None:
+        return pattern_fingerprint(snapshot.patterns[idx])
+    return "label:" + _digest(result.classification)
+
+
+class ExplanationStore:
+    def __init__(self, path: Optional[str] = STORE_PATH, fill_interval: float = FILL_INTERVAL_SECONDS):
+        self.path = path or None
+        self.fill_interval = fill_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._dirty = False
+        self._saver: Optional[threading.Thread] = None
+        self._save_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    @staticmethod
+    def key(subject: str, language: str) -> str:
+        backend = llm_backend.get_backend().name
+        return f"{backend}:{prompts.version('scam.educator')}:{subject}:{language}"
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            entries: Dict[str, Dict[str, Any]] = {}
+            if self.path and Path(self.path).exists():
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        entries = json.load(f)
+                except (OSError, ValueError) as exc:
+                    logging.warning(f"Could not load scam explanations {self.path}: {exc}")
+            self._entries = entries
+        return self._entries
+
+    def _save(self) -> None:
+        """Schedule a background write of the store."""
+        if not self.path:
+            return
+        with self._save_lock:
+            self._dirty = True
+            if self._saver is None:
+                self._saver = threading.Thread(target=self._save_loop, name="explanation-save", daemon=True)
+                self._saver.start()
+
+    def _save_loop(self) -> None:
+        while True:
+            with self._save_lock:
+                if not self._dirty:
+                    self._saver = None
+                    return
+                self._dirty = False
+            self._write()
+
+    def _write(self) -> None:
+        with self._lock:
+            if not self.path or self._entries is None:
+                return
+            path, entries = self.path, dict(self._entries)
+        with self._write_lock:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                tmp = f"{path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(entries, f, ensure_ascii=False, indent=1)
+                os.replace(tmp, path)
+            except OSError as exc:
+                logging.warning(f"Could not save scam explanations: {exc}")
+
+    def flush(self) -> None:
+        """Write pending puts now (shutdown, the offline prefill, tests)."""
+        saver = self._saver
+        if saver is not None:
+            saver.join()
+        with self._save_lock:
+            dirty, self._dirty = self._dirty, False
+        if dirty:
+            self._write()
+
+    def get(self, subject: str, language: str) -> Optional[Explanation]:
+        key = self.key(subject, language)
+        with self._lock:
+            entry = self._load().get(key)
+        return {f: entry[f] for f in FIELDS} if entry is not None else None
+
+    def put(self, subject: str, language: str, explanation: Explanation, label: str = "") -> None:
+        key = self.key(subject, language)
+        with self._lock:
+            self._load()[key] = {"label": label, "created_at": time.time(), **explanation}
+        self._save()
+
+    def lookup(self, result: ScamAnalysisResult) -> Tuple[str, Optional[Explanation]]:
+        """(subject, stored explanation or None) for a risk_analyze result."""
+        subject = subject_for(result, pattern_index.snapshot())
+        explanation = self.get(subject, result.language)
+        if explanation is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return subject, explanation
+
+    def missing(
+        self, snapshot: PatternSnapshot, languages: List[str]
+    ) -> List[Tuple[str, ScamAnalysisResult]]:
+        """(subject, canonical result to explain) for every entry not stored yet."""
+        todo: Dict[Tuple[str, str], ScamAnalysisResult] = {}
+        for language in languages:
+            todo.setdefault(("safe", language), safe_result(language))
+            for pattern in snapshot.patterns:
+                subject = pattern_fingerprint(pattern)
+                if (subject, language) not in todo:
+                    todo[(subject, language)] = pattern_result(pattern, language)
+        return [(subject, result) for (subject, language), result in todo.items()
+                if self.get(subject, language) is None]
+
+    async def start(self, interval: Optional[float] = None) -> None:
+        """Run prefill_explanations() now, then every `interval` seconds (idempotent)."""
+        interval = self.fill_interval if interval is None else interval
+        if self._task is not None or interval < 0:
+            return
+
+        async def fill_forever() -> None:
+            from .educator import prefill_explanations
+
+            while True:
+                try:
+                    await prefill_explanations(store=self)
+                except Exception:
+                    logging.exception("Scam explanation prefill failed")
+                await asyncio.sleep(interval)
+
+        self._task = asyncio.ensure_future(fill_forever())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await asyncio.to_thread(self.flush)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = len(self._entries) if self._entries is not None else 0
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+
+explanation_store = ExplanationStore()
+
+
+def _store_collector():
+    yield (
+        "finpal_scam_explanation_store",
+        "gauge",
+        "Pre-generated educator explanations: stored entries, lookup hits and misses.",
+        [({"field": k}, v) for k, v in explanation_store.stats().items()],
+    )
+
+
+metrics.REGISTRY.register_collector(_store_collector)
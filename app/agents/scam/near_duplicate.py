@@ -0,0 +1,363 @@
+"""
+Near-Duplicate Index
+--------------------
+MinHash + LSH index of known scam messages, so a message that differs from
+a known one only in amounts, links, names or a few words is still caught
+when no key phrase matches exactly.
+
+- Text is normalized (lower-cased, URLs → "url", digit runs → "0",
+  punctuation dropped) and split into character 5-gram shingles.
+- Each message gets a MinHash signature of NUM_PERM 32-bit hashes; the
+  signature is cut into BANDS bands whose hashes key the LSH buckets, so a
+  lookup only compares against messages sharing at least one band
+  (≈ sublinear). Similarity is the MinHash estimate of Jaccard similarity.
+- Seeded from every pattern's example_message (kept in sync with the
+  pattern index: new examples are added incrementally; when examples are
+  removed or edited, their signatures are pruned) and from confirmed
+  reports recorded with record_report() (appended to SCAM_REPORTS_PATH).
+- Signatures are persisted to SCAM_NEAR_DUP_PATH (.npz) by a background
+  thread, never on the request path; flush() writes pending changes at
+  shutdown. The file is loaded at startup and anything newer in the
+  sources is added on top.
+
+Usage:
+    from app.agents.scam.near_duplicate import near_duplicate_index
+    near_duplicate_index.query(text)  → [NearDuplicate(label, source, similarity), ...]
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Set
+
+import numpy as np
+
+from app.core import metrics
+
+if TYPE_CHECKING:
+    from .pattern_index import PatternSnapshot
+
+_CACHE_DIR = Path(__file__).resolve().parents[3] / ".cache"
+
+NUM_PERM = 128
+BANDS = 32
+SHINGLE_SIZE = 5
+SEED = 1
+MIN_EXAMPLE_CHARS = 20
+MATCH_THRESHOLD = float(os.getenv("SCAM_NEAR_DUP_THRESHOLD", "0.5"))
+
+# Set either path to "" to disable it.
+INDEX_PATH = os.getenv("SCAM_NEAR_DUP_PATH", str(_CACHE_DIR / "scam_minhash.npz"))
+REPORTS_PATH = os.getenv("SCAM_REPORTS_PATH", str(_CACHE_DIR / "scam_reports.jsonl"))
+
+_PRIME = np.uint64(4294967311)  # smallest prime > 2**32
+_URL_RE = re.compile(r"(https?://|www\.)\S+|\b[\w-]+\.(com|in|net|org|xyz|top|link|ly)\b\S*")
+_DIGITS_RE = re.compile(r"\d+")
+_NON_WORD_RE = re.compile(r"[^\w ]+")
+
+
+class NearDuplicate(NamedTuple):
+    label: str  # scam_name of the matched pattern / report
+    source: str  # "pattern" | "report"
+    similarity: float
+
+
+def normalize_message(text: str) -> str:
+    text = _URL_RE.sub(" url ", text.lower())
+    text = _DIGITS_RE.sub("0", text)
+    text = _NON_WORD_RE.sub(" ", text)
+    return " ".join(text.split())
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> Set[str]:
+    norm = normalize_message(text)
+    if len(norm) <= k:
+        return {norm} if norm else set()
+    return {norm[i:i + k] for i in range(len(norm) - k + 1)}
+
+
+def is_example(text: str) -> bool:
+    """False for empty / placeholder example messages ("N/A - ...")."""
+    norm = normalize_message(text or "")
+    return len(norm) >= MIN_EXAMPLE_CHARS and not norm.startswith("n a ")
+
+
+class MinHashLSH:
+    """MinHash signatures in a growable array plus LSH band buckets."""
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = SEED):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2**32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2**32, size=num_perm, dtype=np.uint64)
+        self.signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self.labels: List[str] = []
+        self.sources: List[str] = []
+        self.keys: List[str] = []
+        self._key_set: Set[str] = set()
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        grams = shingles(text)
+        if not grams:
+            return None
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    @staticmethod
+    def key_for(text: str, label: str) -> str:
+        digest = hashlib.sha1(normalize_message(text).encode("utf-8")).hexdigest()[:16]
+        return f"{digest}:{label}"
+
+    def add(self, text: str, label: str, source: str) -> bool:
+        """Index one message; returns False if it was already indexed or empty."""
+        key = self.key_for(text, label)
+        if key in self._key_set:
+            return False
+        sig = self.signature(text)
+        if sig is None:
+            return False
+        with self._lock:
+            if key in self._key_set:
+                return False
+            self._append(key, label, source, sig)
+        return True
+
+    def _append(self, key: str, label: str, source: str, sig: np.ndarray) -> None:
+        idx = len(self.labels)
+        if idx == len(self.signatures):  # grow geometrically
+            grown = np.zeros((max(64, 2 * idx), self.num_perm), dtype=np.uint32)
+            grown[:idx] = self.signatures[:idx]
+            self.signatures = grown
+        self.signatures[idx] = sig
+        for band, bucket_key in enumerate(self._band_keys(sig)):
+            self._buckets[band].setdefault(bucket_key, []).append(idx)
+        self.labels.append(label)
+        self.sources.append(source)
+        self.keys.append(key)
+        self._key_set.add(key)
+
+    def without(self, keys: Set[str]) -> "MinHashLSH":
+        """A copy minus the given keys (LSH buckets can't remove; signatures are reused)."""
+        pruned = MinHashLSH(self.num_perm, self.bands, self.seed)
+        with self._lock:
+            for i, key in enumerate(self.keys):
+                if key not in keys:
+                    pruned._append(key, self.labels[i], self.sources[i], self.signatures[i])
+        return pruned
+
+    def query(self, text: str, threshold: float = MATCH_THRESHOLD, limit: int = 5) -> List[NearDuplicate]:
+        """Indexed messages with estimated Jaccard ≥ threshold, best first."""
+        sig = self.signature(text)
+        if sig is None:
+            return []
+        with self._lock:
+            candidates: Set[int] = set()
+            for band, bucket_key in enumerate(self._band_keys(sig)):
+                candidates.update(self._buckets[band].get(bucket_key, ()))
+            if not candidates:
+                return []
+            ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            sims = (self.signatures[ids] == sig).mean(axis=1)
+            labels, sources = self.labels, self.sources
+
+        best: Dict[str, NearDuplicate] = {}
+        for i in np.argsort(-sims):
+            sim = float(sims[i])
+            if sim < threshold:
+                break
+            label = labels[ids[i]]
+            if label not in best:
+                best[label] = NearDuplicate(label, sources[ids[i]], round(sim, 3))
+        return list(best.values())[:limit]
+
+    def save(self, path: str) -> None:
+        with self._lock:
+            n = len(self.labels)
+            meta = {"num_perm": self.num_perm, "bands": self.bands, "seed": self.seed}
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            tmp = f"{path}.tmp.npz"
+            np.savez(
+                tmp,
+                signatures=self.signatures[:n],
+                labels=np.array(self.labels, dtype=str),
+                sources=np.array(self.sources, dtype=str),
+                keys=np.array(self.keys, dtype=str),
+                meta=np.array(json.dumps(meta)),
+            )
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MinHashLSH":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            index = cls(meta["num_perm"], meta["bands"], meta["seed"])
+            for key, label, source, sig in zip(data["keys"], data["labels"], data["sources"], data["signatures"]):
+                index._append(str(key), str(label), str(source), sig)
+        return index
+
+
+class NearDuplicateIndex:
+    """
+    MinHashLSH kept in sync with the pattern index and the reports log.
+    Changes are saved in the background; concurrent changes coalesce into
+    one write.
+    """
+
+    def __init__(self, path: Optional[str] = INDEX_PATH, reports_path: Optional[str] = REPORTS_PATH):
+        self.path = path or None
+        self.reports_path = reports_path or None
+        self.lsh: Optional[MinHashLSH] = None
+        self._synced_version = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saver: Optional[threading.Thread] = None
+        self._save_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _ensure_loaded(self) -> MinHashLSH:
+        if self.lsh is None:
+            lsh = None
+            if self.path and Path(self.path).exists():
+                try:
+                    lsh = MinHashLSH.load(self.path)
+                except (OSError, ValueError, KeyError) as exc:
+                    logging.warning(f"Could not load near-duplicate index {self.path}: {exc}")
+            if lsh is None or (lsh.num_perm, lsh.bands, lsh.seed) != (NUM_PERM, BANDS, SEED):
+                lsh = MinHashLSH()
+            added = sum(lsh.add(r["text"], r["scam_name"], "report") for r in self._read_reports())
+            self.lsh = lsh
+            if added:
+                self._save()
+        return self.lsh
+
+    def _read_reports(self) -> List[Dict[str, str]]:
+        if not self.reports_path or not Path(self.reports_path).exists():
+            return []
+        reports = []
+        with open(self.reports_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    reports.append({"text": record["text"], "scam_name": record["scam_name"]})
+                except (ValueError, KeyError, TypeError):
+                    continue
+        return reports
+
+    def _save(self) -> None:
+        """Schedule a background write of the index."""
+        if not self.path:
+            return
+        with self._save_lock:
+            self._dirty = True
+            if self._saver is None:
+                self._saver = threading.Thread(target=self._save_loop, name="near-dup-save", daemon=True)
+                self._saver.start()
+
+    def _save_loop(self) -> None:
+        while True:
+            with self._save_lock:
+                if not self._dirty:
+                    self._saver = None
+                    return
+                self._dirty = False
+            self._write()
+
+    def _write(self) -> None:
+        lsh = self.lsh
+        if not self.path or lsh is None:
+            return
+        with self._write_lock:
+            try:
+                lsh.save(self.path)
+            except OSError as exc:
+                logging.warning(f"Could not save near-duplicate index: {exc}")
+
+    def flush(self) -> None:
+        """Write pending changes now (app shutdown, tests)."""
+        saver = self._saver
+        if saver is not None:
+            saver.join()
+        with self._save_lock:
+            dirty, self._dirty = self._dirty, False
+        if dirty:
+            self._write()
+
+    def sync(self, snapshot: "PatternSnapshot") -> None:
+        """Match the pattern examples to a newer snapshot (no-op if already synced)."""
+        if snapshot.version == self._synced_version and self.lsh is not None:
+            return
+        with self._lock:
+            lsh = self._ensure_loaded()
+            if snapshot.version == self._synced_version:
+                return
+            examples = [(p.example_message, p.scam_name) for p in snapshot.patterns if is_example(p.example_message)]
+            wanted = {MinHashLSH.key_for(text, label) for text, label in examples}
+            stale = {key for key, source in zip(lsh.keys, lsh.sources) if source == "pattern" and key not in wanted}
+            if stale:
+                lsh = lsh.without(stale)
+            added = sum(lsh.add(text, label, "pattern") for text, label in examples)
+            self.lsh = lsh
+            self._synced_version = snapshot.version
+            if added or stale:
+                self._save()
+
+    def record_report(self, text: str, scam_name: str) -> bool:
+        """Add a confirmed scam report; returns False if it was already known."""
+        with self._lock:
+            lsh = self._ensure_loaded()
+            if not lsh.add(text, scam_name, "report"):
+                return False
+            if self.reports_path:
+                try:
+                    Path(self.reports_path).parent.mkdir(parents=True, exist_ok=True)
+                    with open(self.reports_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps({"text": text, "scam_name": scam_name}, ensure_ascii=False) + "\n")
+                except OSError as exc:
+                    logging.warning(f"Could not record scam report: {exc}")
+            self._save()
+        return True
+
+    def query(self, text: str, threshold: float = MATCH_THRESHOLD) -> List[NearDuplicate]:
+        lsh = self.lsh
+        if lsh is None:
+            with self._lock:
+                lsh = self._ensure_loaded()
+        return lsh.query(text, threshold)
+
+    def stats(self) -> Dict[str, int]:
+        lsh = self.lsh
+        return {"messages": len(lsh) if lsh is not None else 0}
+
+
+near_duplicate_index = NearDuplicateIndex()
+
+
+def _index_collector():
+    yield (
+        "finpal_scam_near_duplicate_messages",
+        "gauge",
+        "Known scam messages in the MinHash/LSH near-duplicate index.",
+        [({}, near_duplicate_index.stats()["messages"])],
+    )
+
+
+metrics.REGISTRY.register_collector(_index_collector)
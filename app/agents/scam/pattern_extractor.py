@@ -1,13 +1,56 @@
+"""
+Scam Pattern Extractor
+----------------------
+Turns harvested news articles into ScamPattern entries with the LLM.
+
+- Articles are deduplicated by a content hash of their normalized text, both
+  within a harvest and against every article processed before.
+- At most SCAM_EXTRACTION_CONCURRENCY articles are in flight (a fixed pool
+  of workers); concurrent ones still share Gemini requests through the
+  stage's micro-batcher (app.core.llm_batch).
+- Each output is validated against the extraction schema; invalid outputs
+  are rejected instead of half-filling a ScamPattern.
+- Progress is checkpointed per article to SCAM_EXTRACTION_CHECKPOINT_PATH
+  (JSONL, "" disables) as soon as its output is parsed, so an interrupted
+  harvest resumes where it stopped. Already-processed articles cost no LLM
+  call: their pattern (if any) comes from the checkpoint. LLM errors are
+  not checkpointed and are retried on the next run.
+- Pattern ids derive from the article hash, so save_patterns() (an append
+  to the pattern log) skips patterns already stored and re-running a
+  harvest is idempotent.
+"""
+
+import asyncio
+import hashlib
 import json
+import logging
+import os
+import time
 import uuid
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, ValidationInfo, field_validator
 
 from app.schemas.scam import ScamPattern, ScamCategory
-from app.core.gemini import run_gemini
+from app.core.llm_batch import get_batcher
+from app.core.prompt_registry import prompts
+
+from .pattern_log import pattern_log
+
+EXTRACTION_CONCURRENCY = int(os.getenv("SCAM_EXTRACTION_CONCURRENCY", "8"))
+
+# Set SCAM_EXTRACTION_CHECKPOINT_PATH="" to disable checkpointing.
+CHECKPOINT_PATH = os.getenv(
+    "SCAM_EXTRACTION_CHECKPOINT_PATH",
+    str(Path(__file__).resolve().parents[3] / ".cache" / "scam_extraction.jsonl"),
+)
 
-PATTERN_PROMPT_PATH = Path(__file__).parent / "prompts" / "pattern_prompt.txt"
-PATTERN_PROMPT = PATTERN_PROMPT_PATH.read_text(encoding="utf-8")
+STAGE = "scam.pattern_extractor"
+
+
+def _system_instruction() -> str:
+    return "You are a scam pattern extractor.\n\n" + prompts.get("scam.pattern_extractor")
 
 
 def _guess_category(name: str) -> ScamCategory:
@@ -27,57 +70,189 @@ def _guess_category(name: str) -> ScamCategory:
     return ScamCategory.OTHER
 
 
-async def extract_patterns(articles: List[Dict[str, Any]]) -> List[ScamPattern]:
+class ExtractedPattern(BaseModel):
+    """What the LLM must return for one article (pattern_prompt.txt)."""
+
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    scam_name: str = Field(..., min_length=1)
+    channel: str = Field(default="Unknown")
+    modus_operandi: str = Field(..., min_length=1)
+    key_phrases: List[str] = Field(..., min_length=1)
+    red_flags: List[str] = Field(default_factory=list)
+    recommended_user_action: str = Field(..., min_length=1)
+    example_message: Optional[str] = None
+
+    @field_validator("key_phrases", "red_flags")
+    @classmethod
+    def _drop_blank(cls, values: List[str], info: ValidationInfo) -> List[str]:
+        values = [v for v in values if v]
+        if info.field_name == "key_phrases" and not values:
+            raise ValueError("at least one non-blank key phrase is required")
+        return values
+
+
+def article_key(article: Dict[str, Any]) -> Optional[str]:
+    """Content hash of an article's normalized text; None if it has no text."""
+    text = " ".join((article.get("raw_text") or "").lower().split())
+    if not text:
+        return None
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def parse_output(output: Any) -> Tuple[Optional[ExtractedPattern], Optional[str]]:
     """
-    Take raw news articles → ask LLM to convert each into ScamPattern JSON.
+    (pattern, None) for a valid output, (None, reason) for an invalid one,
+    (None, None) for an LLM error worth retrying later.
     """
-    patterns: List[ScamPattern] = []
+    if isinstance(output, dict) and "error" in output:
+        return None, None
+    # If run_gemini gave us {"raw_output": "..."} try to parse JSON
+    if isinstance(output, dict) and "raw_output" in output:
+        try:
+            output = json.loads(output["raw_output"])
+        except json.JSONDecodeError:
+            return None, "malformed JSON"
+    try:
+        return ExtractedPattern.model_validate(output), None
+    except ValidationError as exc:
+        return None, f"{exc.error_count()} schema error(s)"
 
-    for article in articles:
-        prompt = PATTERN_PROMPT + "\n\nARTICLE:\n" + article["raw_text"]
 
-        payload = {
-            "system_instruction": "You are a scam pattern extractor.",
-            "user": {"text": prompt},
-        }
+def to_scam_pattern(key: str, extracted: ExtractedPattern, url: Optional[str]) -> ScamPattern:
+    fields = dict(
+        id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"scam-article:{key}")),
+        scam_name=extracted.scam_name,
+        category=_guess_category(extracted.scam_name),
+        channel=extracted.channel or "Unknown",
+        modus_operandi=extracted.modus_operandi,
+        key_phrases=extracted.key_phrases,
+        red_flags=extracted.red_flags,
+        recommended_user_action=extracted.recommended_user_action,
+        example_message=extracted.example_message,
+    )
+    try:
+        return ScamPattern(**fields, source_url=url or None)
+    except ValidationError:  # unusable article URL; keep the pattern
+        return ScamPattern(**fields)
+
+
+class ExtractionCheckpoint:
+    """Append-only JSONL record of processed articles: {key, pattern | null, reason}."""
+
+    def __init__(self, path: Optional[str] = CHECKPOINT_PATH):
+        self.path = path or None
+        self._done: Optional[Dict[str, Dict[str, Any]]] = None
 
+    def _entries(self) -> Dict[str, Dict[str, Any]]:
+        if self._done is None:
+            done: Dict[str, Dict[str, Any]] = {}
+            if self.path and Path(self.path).exists():
+                with open(self.path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                            done[entry["key"]] = entry
+                        except (ValueError, KeyError, TypeError):
+                            continue  # a line cut short by a crash
+            self._done = done
+        return self._done
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._entries().get(key)
+
+    def record(self, key: str, pattern: Optional[ScamPattern], reason: Optional[str] = None) -> None:
+        entry = {
+            "key": key,
+            "pattern": pattern.model_dump(mode="json") if pattern is not None else None,
+            "reason": reason,
+            "at": time.time(),
+        }
+        self._entries()[key] = entry
+        if not self.path:
+            return
         try:
-            src = await run_gemini(payload)
-            # If run_gemini gave us {"raw_output": "..."} try to parse JSON
-            if isinstance(src, dict) and "raw_output" in src:
-                try:
-                    src = json.loads(src["raw_output"])
-                except json.JSONDecodeError:
-                    continue
-            if not isinstance(src, dict) or "scam_name" not in src:
-                continue
-        except Exception:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+        except OSError as exc:
+            logging.warning(f"Could not checkpoint pattern extraction: {exc}")
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+
+extraction_checkpoint = ExtractionCheckpoint()
+
+
+def _unique_articles(articles: List[Dict[str, Any]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    seen = set()
+    for article in articles:
+        key = article_key(article)
+        if key is None or key in seen:
             continue
+        seen.add(key)
+        yield key, article
 
-        pattern = ScamPattern(
-            id=str(uuid.uuid4()),
-            scam_name=src["scam_name"],
-            category=_guess_category(src["scam_name"]),
-            channel=src["channel"],
-            modus_operandi=src["modus_operandi"],
-            key_phrases=src["key_phrases"],
-            red_flags=src["red_flags"],
-            recommended_user_action=src["recommended_user_action"],
-            example_message=src.get("example_message"),
-            source_url=article.get("url"),
-        )
-        patterns.append(pattern)
 
-    return patterns
+async def extract_patterns(
+    articles: List[Dict[str, Any]],
+    checkpoint: Optional[ExtractionCheckpoint] = None,
+    concurrency: int = EXTRACTION_CONCURRENCY,
+) -> List[ScamPattern]:
+    """
+    Take raw news articles → ask LLM to convert each into ScamPattern JSON.
+
+    Returns one pattern per distinct article that yields a valid one, in
+    input order; see the module docstring for dedup and checkpointing.
+    """
+    checkpoint = checkpoint if checkpoint is not None else extraction_checkpoint
+    batcher = get_batcher(_system_instruction(), stage=STAGE)
+    unique = list(_unique_articles(articles))
+    found: Dict[str, ScamPattern] = {}
+    todo = []
+    for key, article in unique:
+        entry = checkpoint.get(key)
+        if entry is None:
+            todo.append((key, article))
+        elif entry["pattern"] is not None:
+            found[key] = ScamPattern.model_validate(entry["pattern"])
+
+    pending = iter(todo)
+    counts = {"extracted": 0, "rejected": 0, "failed": 0}
+
+    async def worker() -> None:
+        for key, article in pending:
+            try:
+                output = await batcher.submit({"article": article["raw_text"]})
+            except Exception as exc:
+                output = {"error": str(exc)}
+            extracted, reason = parse_output(output)
+            if extracted is None and reason is None:
+                counts["failed"] += 1  # retried on the next run
+                continue
+            pattern = to_scam_pattern(key, extracted, article.get("url")) if extracted else None
+            checkpoint.record(key, pattern, reason)
+            if pattern is None:
+                counts["rejected"] += 1
+                continue
+            counts["extracted"] += 1
+            found[key] = pattern
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(todo))))))
+    if todo:
+        logging.info(
+            f"Pattern extraction: {len(todo)} new article(s) of {len(unique)} distinct"
+            f" ({counts['extracted']} extracted, {counts['rejected']} rejected,"
+            f" {counts['failed']} failed)"
+        )
+    return [found[key] for key, _ in unique if key in found]
 
 
-def save_patterns(patterns: List[ScamPattern]) -> None:
+def save_patterns(patterns: List[ScamPattern]) -> int:
     """
-    Append new patterns into app/data/scam_patterns.json
+    Append new patterns to the scam pattern log (pattern_log.py); ids
+    already stored are skipped. Returns how many were added.
     """
-    db = Path(__file__).resolve().parents[2] / "data" / "scam_patterns.json"
-    with open(db, "r+", encoding="utf-8") as f:
-        stored = json.load(f)
-        stored.extend([p.model_dump(mode="json") for p in patterns])
-        f.seek(0)
-        json.dump(stored, f, indent=2)
+    return pattern_log().append([p.model_dump(mode="json") for p in patterns])
@@ -0,0 +1,270 @@
+"""
+Scam Pattern Index
+------------------
+Process-wide, compiled view of the scam patterns used by risk_analyze().
+
+- A snapshot holds the normalized patterns as immutable CompiledPattern
+  tuples with interned strings, plus the PhraseMatcher built over their key
+  phrases and the TfidfScorer built over the whole patterns. Reading it is
+  one attribute access; no JSON is parsed per request.
+- The source (scam_patterns.json plus its append-only log, see
+  pattern_log.py, by default; anything implementing PatternSource, e.g. a
+  DB table, can be plugged in) is fingerprinted at most
+  every SCAM_PATTERN_RELOAD_INTERVAL_SECONDS (negative disables). When the
+  fingerprint changes, a background thread builds a new snapshot while
+  readers keep using the old one, then swaps it in with one assignment.
+- The first snapshot() builds synchronously; refresh() forces a blocking
+  rebuild. A source that fails to load keeps the previous snapshot.
+
+Usage:
+    from app.agents.scam.pattern_index import pattern_index
+    index = pattern_index.snapshot()
+    index.patterns[i].scam_name, index.matcher.payloads(text)
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from app.core import metrics
+
+from .pattern_log import file_key, pattern_log
+from .phrase_matcher import PhraseMatcher, normalize
+from .tfidf_scorer import TfidfScorer
+
+RELOAD_INTERVAL_SECONDS = float(os.getenv("SCAM_PATTERN_RELOAD_INTERVAL_SECONDS", "2"))
+
+GENERIC_RECOMMENDED_ACTION = (
+    "Never share OTP, PIN, CVV, or passwords with anyone. "
+    "Do not click on suspicious links or QR codes. "
+    "Verify the sender using official channels and report the incident to your bank "
+    "and cybercrime portal if you suspect fraud."
+)
+
+
+def _patterns_path() -> Path:
+    """
+    Path to app/data/scam_patterns.json
+    """
+    return Path(__file__).resolve().parents[2] / "data" / "scam_patterns.json"
+
+
+def load_patterns(path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """
+    Load scam patterns (JSON snapshot + append-only log, read incrementally
+    by pattern_log.py) and NORMALIZE them into a common shape.
+
+    Supports two shapes:
+    1) Simple:
+       {"name": "...", "description": "..."}
+    2) Rich (ScamPattern-like):
+       {"scam_name": "...", "key_phrases": [...], "red_flags": [...], ...}
+    """
+
+    raw: List[Dict[str, Any]] = pattern_log(path).read()
+
+    normalized: List[Dict[str, Any]] = []
+
+    for p in raw:
+        # Rich format already
+        if "scam_name" in p:
+            scam_name = p["scam_name"]
+            modus_operandi = p.get("modus_operandi") or p.get("description", "")
+            key_phrases = p.get("key_phrases") or [scam_name]
+            red_flags = p.get("red_flags") or [modus_operandi] if modus_operandi else []
+            recommended = p.get("recommended_user_action") or GENERIC_RECOMMENDED_ACTION
+            example = p.get("example_message") or ""
+        # Simple format: name + description only
+        else:
+            scam_name = p.get("name", "Unknown Scam")
+            modus_operandi = p.get("description", "")
+            key_phrases = [scam_name]  # simple heuristic
+            red_flags = [modus_operandi] if modus_operandi else []
+            recommended = GENERIC_RECOMMENDED_ACTION
+            example = ""
+
+        normalized.append(
+            {
+                "scam_name": scam_name,
+                "modus_operandi": modus_operandi,
+                "key_phrases": key_phrases,
+                "red_flags": red_flags,
+                "recommended_user_action": recommended,
+                "example_message": example,
+            }
+        )
+
+    return normalized
+
+
+class CompiledPattern(NamedTuple):
+    scam_name: str
+    modus_operandi: str
+    key_phrases: Tuple[str, ...]  # normalized
+    red_flags: Tuple[str, ...]
+    recommended_user_action: str
+    example_message: str
+
+
+class PatternSnapshot(NamedTuple):
+    version: int
+    fingerprint: Hashable
+    patterns: Tuple[CompiledPattern, ...]
+    matcher: PhraseMatcher
+    scorer: TfidfScorer
+    by_name: Dict[str, int]  # scam_name → first pattern index
+    build_seconds: float
+
+
+def _intern(text: Any) -> str:
+    return sys.intern(str(text or ""))
+
+
+def compile_patterns(
+    patterns: List[Dict[str, Any]],
+) -> Tuple[Tuple[CompiledPattern, ...], PhraseMatcher, TfidfScorer]:
+    """Normalized pattern dicts (load_patterns shape) → interned tuples, matcher, scorer."""
+    compiled = tuple(
+        CompiledPattern(
+            scam_name=_intern(p["scam_name"]),
+            modus_operandi=_intern(p.get("modus_operandi")),
+            key_phrases=tuple(_intern(normalize(k)) for k in p.get("key_phrases", []) if normalize(k)),
+            red_flags=tuple(_intern(r) for r in p.get("red_flags", [])),
+            recommended_user_action=_intern(p.get("recommended_user_action") or GENERIC_RECOMMENDED_ACTION),
+            example_message=_intern(p.get("example_message")),
+        )
+        for p in patterns
+    )
+    matcher = PhraseMatcher((phrase, idx) for idx, p in enumerate(compiled) for phrase in p.key_phrases)
+    return compiled, matcher, TfidfScorer(compiled)
+
+
+class PatternSource:
+    """Where patterns come from. fingerprint() must be cheap; load() may not be."""
+
+    def fingerprint(self) -> Hashable:
+        raise NotImplementedError
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Patterns in the normalized load_patterns() shape."""
+        raise NotImplementedError
+
+
+class FilePatternSource(PatternSource):
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path is not None else _patterns_path()
+
+    def fingerprint(self) -> Hashable:
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size, file_key(pattern_log(self.path).log_path)
+
+    def load(self) -> List[Dict[str, Any]]:
+        return load_patterns(self.path)
+
+
+class PatternIndex:
+    def __init__(
+        self,
+        source: Optional[PatternSource] = None,
+        reload_interval: float = RELOAD_INTERVAL_SECONDS,
+    ):
+        self.source = source if source is not None else FilePatternSource()
+        self.reload_interval = reload_interval
+        self.rebuilds = 0
+        self.failures = 0
+        self._snapshot: Optional[PatternSnapshot] = None
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+
+    def snapshot(self) -> PatternSnapshot:
+        snap = self._snapshot
+        if snap is None:
+            return self.refresh()
+        self._maybe_rebuild(snap)
+        return snap
+
+    def refresh(self) -> PatternSnapshot:
+        """Rebuild now (blocking) if the source changed; returns the current snapshot."""
+        with self._lock:
+            self._rebuild()
+        if self._snapshot is None:
+            raise RuntimeError("Scam pattern index could not be built")
+        return self._snapshot
+
+    def _maybe_rebuild(self, snap: PatternSnapshot) -> None:
+        if self.reload_interval < 0:
+            return
+        if time.monotonic() - self._checked_at < self.reload_interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return  # a check or rebuild is already running
+        self._checked_at = time.monotonic()
+        try:
+            changed = self.source.fingerprint() != snap.fingerprint
+        except OSError as exc:
+            logging.warning(f"Could not check scam patterns: {exc}")
+            changed = False
+        if not changed:
+            self._lock.release()
+            return
+        threading.Thread(target=self._rebuild_and_release, name="scam-pattern-index", daemon=True).start()
+
+    def _rebuild_and_release(self) -> None:
+        try:
+            self._rebuild()
+        finally:
+            self._lock.release()
+
+    def _rebuild(self) -> None:
+        # Caller holds self._lock.
+        current = self._snapshot
+        try:
+            fingerprint = self.source.fingerprint()
+            if current is not None and fingerprint == current.fingerprint:
+                return
+            started = time.perf_counter()
+            patterns, matcher, scorer = compile_patterns(self.source.load())
+        except Exception as exc:
+            self.failures += 1
+            logging.warning(f"Could not rebuild scam pattern index: {exc}")
+            return
+        version = current.version + 1 if current is not None else 1
+        # One assignment: readers see either the old or the new snapshot.
+        by_name: Dict[str, int] = {}
+        for idx, p in enumerate(patterns):
+            by_name.setdefault(p.scam_name, idx)
+        self._snapshot = PatternSnapshot(
+            version, fingerprint, patterns, matcher, scorer, by_name, time.perf_counter() - started
+        )
+        self.rebuilds += 1
+        self._checked_at = time.monotonic()
+
+    def stats(self) -> Dict[str, float]:
+        snap = self._snapshot
+        return {
+            "version": snap.version if snap else 0,
+            "patterns": len(snap.patterns) if snap else 0,
+            "phrases": snap.matcher.n_phrases if snap else 0,
+            "build_seconds": snap.build_seconds if snap else 0.0,
+            "rebuilds": self.rebuilds,
+            "failures": self.failures,
+        }
+
+
+pattern_index = PatternIndex()
+
+
+def _index_collector():
+    yield (
+        "finpal_scam_pattern_index",
+        "gauge",
+        "Compiled scam pattern index: version, size, last build time, rebuilds.",
+        [({"field": k}, v) for k, v in pattern_index.stats().items()],
+    )
+
+
+metrics.REGISTRY.register_collector(_index_collector)
@@ -0,0 +1,264 @@
+"""
+Scam Pattern Log
+----------------
+Storage for scam patterns: a JSON snapshot (scam_patterns.json, a plain
+list, as before) plus an append-only JSONL log next to it
+(scam_patterns.log.jsonl) holding patterns added since the last compaction.
+
+- append() takes an exclusive file lock (<snapshot>.lock, fcntl; a
+  process-local lock where fcntl is missing), skips ids already stored
+  (an id set kept up to date by the incremental reads),
+  writes one line per pattern and fsyncs: O(new) per save, safe with
+  concurrent writers. A line cut short by a crashed writer is dropped
+  before the next append.
+- compact() (under the same lock) writes snapshot + log to a temp file,
+  fsyncs it, renames it over the snapshot and then empties the log. It runs
+  automatically once the log holds SCAM_PATTERN_LOG_COMPACT_ENTRIES lines.
+  Records are deduplicated by id on read, so a crash between the rename and
+  the truncation loses nothing.
+- read() never locks: it re-parses the snapshot only when its (inode,
+  mtime, size) changes and otherwise reads just the log lines appended
+  since the last call.
+
+FilePatternSource (pattern_index.py) fingerprints both files, so appended
+patterns reach the compiled index on its next reload check.
+
+Usage:
+    pattern_log().append([pattern.model_dump(mode="json"), ...])
+    pattern_log().read()       → raw records, snapshot first, then log order
+    python -m app.agents.scam.pattern_log compact
+"""
+
+import json
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock
+    fcntl = None  # type: ignore[assignment]
+
+COMPACT_ENTRIES = int(os.getenv("SCAM_PATTERN_LOG_COMPACT_ENTRIES", "500"))
+
+FileKey = Optional[Tuple[int, int, int]]
+_UNREAD: FileKey = (-1, -1, -1)
+
+
+def log_path_for(snapshot_path: Path) -> Path:
+    return snapshot_path.with_name(snapshot_path.stem + ".log.jsonl")
+
+
+def file_key(path: Path) -> FileKey:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _dedupe(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """First record per id wins; records without an id are all kept."""
+    seen = set()
+    unique = []
+    for record in records:
+        pid = record.get("id")
+        if pid is not None:
+            if pid in seen:
+                continue
+            seen.add(pid)
+        unique.append(record)
+    return unique
+
+
+class PatternLog:
+    def __init__(self, snapshot_path: Path, compact_entries: int = COMPACT_ENTRIES):
+        self.snapshot_path = Path(snapshot_path)
+        self.log_path = log_path_for(self.snapshot_path)
+        self.lock_path = self.snapshot_path.with_name(self.snapshot_path.name + ".lock")
+        self.compact_entries = compact_entries
+        self.compactions = 0
+        self._thread_lock = threading.Lock()  # fcntl locks don't exclude threads
+        self._read_lock = threading.Lock()
+        self._snapshot_key: FileKey = _UNREAD
+        self._snapshot: List[Dict[str, Any]] = []
+        self._log: List[Dict[str, Any]] = []
+        self._ids: Set[Any] = set()  # ids in _snapshot + _log
+        self._offset = 0
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    # -- reading -------------------------------------------------------
+
+    def read(self) -> List[Dict[str, Any]]:
+        """All stored records (deduplicated by id): snapshot, then log tail."""
+        with self._read_lock:
+            self._refresh()
+            return _dedupe(self._snapshot + self._log)
+
+    def _refresh(self) -> None:
+        # Caller holds _read_lock.
+        for _ in range(3):
+            key = file_key(self.snapshot_path)
+            if key != self._snapshot_key:
+                self._load_snapshot(key)
+            self._read_tail()
+            if file_key(self.snapshot_path) == key:
+                break
+            self._snapshot_key = _UNREAD  # compacted while reading; start over
+
+    def _known_ids(self) -> Set[Any]:
+        """Ids stored so far; only reads what changed since last time. Don't mutate."""
+        with self._read_lock:
+            self._refresh()
+            return self._ids
+
+    def _load_snapshot(self, key: FileKey) -> None:
+        records: List[Dict[str, Any]] = []
+        if key is not None:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                records = json.load(f)
+            if not isinstance(records, list):
+                raise ValueError(f"{self.snapshot_path} must hold a JSON list")
+        self._snapshot = [r for r in records if isinstance(r, dict)]
+        self._snapshot_key = key
+        self._log, self._offset = [], 0
+        self._ids = {r.get("id") for r in self._snapshot}
+
+    def _read_tail(self) -> None:
+        size = (file_key(self.log_path) or (0, 0, 0))[2]
+        if size < self._offset:  # emptied by a compaction
+            self._log, self._offset = [], 0
+            self._ids = {r.get("id") for r in self._snapshot}
+        if size == self._offset:
+            return
+        with open(self.log_path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        complete = data[: data.rfind(b"\n") + 1]  # a partial last line is read next time
+        for line in complete.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                self._log.append(record)
+                self._ids.add(record.get("id"))
+        self._offset += len(complete)
+
+    # -- writing -------------------------------------------------------
+
+    def append(self, records: List[Dict[str, Any]]) -> int:
+        """Append records whose id isn't stored yet; returns how many were written."""
+        with self._locked():
+            known = self._known_ids()
+            batch: Set[Any] = set()
+            new = []
+            for record in records:
+                pid = record.get("id")
+                if pid is not None and (pid in known or pid in batch):
+                    continue
+                batch.add(pid)
+                new.append(record)
+            if new:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, "ab") as f:
+                    self._drop_partial_line(f)
+                    f.write(b"".join(
+                        json.dumps(r, ensure_ascii=False).encode("utf-8") + b"\n" for r in new
+                    ))
+                    f.flush()
+                    os.fsync(f.fileno())
+            with self._read_lock:
+                self._refresh()
+            if len(self._log) >= self.compact_entries:
+                self._compact()
+        return len(new)
+
+    @staticmethod
+    def _drop_partial_line(f) -> None:
+        """Truncate a trailing line left without its newline by a crashed writer."""
+        end = f.seek(0, os.SEEK_END)
+        with open(f.name, "rb") as reader:
+            pos = end
+            while pos > 0:
+                start = max(0, pos - 65536)
+                reader.seek(start)
+                chunk = reader.read(pos - start)
+                cut = chunk.rfind(b"\n")
+                if cut >= 0:
+                    pos = start + cut + 1
+                    break
+                pos = start
+        if pos != end:
+            f.truncate(pos)
+
+    def compact(self) -> int:
+        """Fold the log into the snapshot; returns the number of stored records."""
+        with self._locked():
+            return self._compact()
+
+    def _compact(self) -> int:
+        # Caller holds the lock.
+        records = self.read()
+        tmp = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        if self.log_path.exists():
+            with open(self.log_path, "r+b") as f:
+                f.truncate(0)
+                os.fsync(f.fileno())
+        self.compactions += 1
+        return len(records)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "snapshot": len(self._snapshot),
+            "log": len(self._log),
+            "compactions": self.compactions,
+        }
+
+
+_logs: Dict[Path, PatternLog] = {}
+_logs_lock = threading.Lock()
+
+
+def pattern_log(snapshot_path: Optional[Path] = None) -> PatternLog:
+    """Shared PatternLog per snapshot path (default: app/data/scam_patterns.json)."""
+    if snapshot_path is None:
+        from .pattern_index import _patterns_path
+
+        snapshot_path = _patterns_path()
+    path = Path(snapshot_path).resolve()
+    with _logs_lock:
+        log = _logs.get(path)
+        if log is None:
+            log = _logs[path] = PatternLog(path)
+    return log
+
+
+if __name__ == "__main__":
+    # python -m app.agents.scam.pattern_log compact [snapshot.json]
+    if len(sys.argv) < 2 or sys.argv[1] != "compact":
+        sys.exit("usage: python -m app.agents.scam.pattern_log compact [snapshot.json]")
+    target = pattern_log(Path(sys.argv[2]) if len(sys.argv) > 2 else None)
+    print(f"compacted: {target.compact()} pattern(s) in {target.snapshot_path}")
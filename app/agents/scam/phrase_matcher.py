@@ -0,0 +1,183 @@
+"""
+Phrase Matcher
+--------------
+Aho-Corasick automaton over the key phrases of every scam pattern, so
+risk_analyze() finds all matching patterns in one pass over the message
+instead of one substring scan per (pattern, phrase).
+
+- Phrases and messages are normalized the same way: lower-cased, runs of
+  whitespace collapsed to one space, ends stripped.
+- Matches respect word boundaries: a phrase starting / ending with a letter
+  or digit must not be glued to another letter or digit ("otp" does not
+  match "otplus").
+- Every match reports its payload (the pattern index for risk_analyze), the
+  phrase and its [start, end) offsets in the ORIGINAL message.
+
+Benchmark (synthetic patterns, compares with the nested substring loop):
+    python -m app.agents.scam.phrase_matcher 10000
+"""
+
+import random
+import sys
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+
+class PhraseMatch(NamedTuple):
+    payload: Any
+    phrase: str
+    start: int
+    end: int
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _normalize_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """Normalized text plus, per normalized char, its index in `text`."""
+    chars: List[str] = []
+    offsets: List[int] = []
+    pending_space = False
+    for i, ch in enumerate(text):
+        if ch.isspace():
+            pending_space = bool(chars)
+            continue
+        if pending_space:
+            chars.append(" ")
+            offsets.append(i - 1)
+            pending_space = False
+        for low in ch.lower():  # lower() may expand one char into several
+            chars.append(low)
+            offsets.append(i)
+    return "".join(chars), offsets
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class PhraseMatcher:
+    def __init__(self, phrases: Iterable[Tuple[str, Any]]):
+        """`phrases`: (phrase, payload) pairs; empty phrases are ignored."""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Phrase ids ending at each state, and the nearest state on the
+        # failure chain that has any (-1 if none).
+        self._out: List[List[int]] = [[]]
+        self._dict_link: List[int] = [-1]
+        self._phrases: List[Tuple[str, Any]] = []
+
+        seen = set()
+        for phrase, payload in phrases:
+            norm = normalize(phrase)
+            if not norm or (norm, payload) in seen:
+                continue
+            seen.add((norm, payload))
+            self._add(norm, len(self._phrases))
+            self._phrases.append((norm, payload))
+        self._build_links()
+
+    def _add(self, phrase: str, phrase_id: int) -> None:
+        node = 0
+        for ch in phrase:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._dict_link.append(-1)
+            node = nxt
+        self._out[node].append(phrase_id)
+
+    def _build_links(self) -> None:
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        queue = list(goto[0].values())
+        for node in queue:  # breadth-first; the list grows while iterating
+            for ch, child in goto[node].items():
+                queue.append(child)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[child] = target if target != child else 0
+                dict_link[child] = fail[child] if out[fail[child]] else dict_link[fail[child]]
+
+    @property
+    def n_phrases(self) -> int:
+        return len(self._phrases)
+
+    @property
+    def n_states(self) -> int:
+        return len(self._goto)
+
+    def find(self, text: str) -> List[PhraseMatch]:
+        """All word-bounded phrase occurrences in `text`, ordered by end offset."""
+        norm, offsets = _normalize_with_offsets(text)
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        phrases = self._phrases
+        last = len(norm) - 1
+        matches: List[PhraseMatch] = []
+
+        node = 0
+        for i, ch in enumerate(norm):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = node if out[node] else dict_link[node]
+            while hit > 0:
+                for phrase_id in out[hit]:
+                    phrase, payload = phrases[phrase_id]
+                    start = i - len(phrase) + 1
+                    if _is_word(phrase[0]) and start > 0 and _is_word(norm[start - 1]):
+                        continue
+                    if _is_word(phrase[-1]) and i < last and _is_word(norm[i + 1]):
+                        continue
+                    matches.append(PhraseMatch(payload, phrase, offsets[start], offsets[i] + 1))
+                hit = dict_link[hit]
+        return matches
+
+    def payloads(self, text: str) -> List[Any]:
+        """Distinct payloads with at least one match, in order of first match."""
+        return list(dict.fromkeys(m.payload for m in self.find(text)))
+
+
+def _benchmark(n_patterns: int, n_messages: int = 2000, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    vocab = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9)))
+        for _ in range(20000)
+    ]
+    patterns = [
+        [" ".join(rng.sample(vocab, rng.randint(1, 3))) for _ in range(rng.randint(2, 5))]
+        for _ in range(n_patterns)
+    ]
+    messages = [" ".join(rng.choices(vocab, k=rng.randint(15, 40))) for _ in range(n_messages)]
+    n_chars = sum(len(m) for m in messages)
+
+    t0 = time.perf_counter()
+    matcher = PhraseMatcher((p, idx) for idx, phrases in enumerate(patterns) for p in phrases)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for m in messages:
+        matcher.payloads(m)
+    ac = time.perf_counter() - t0
+
+    sample = messages[: max(1, n_messages // 20)]
+    t0 = time.perf_counter()
+    for m in sample:
+        msg = m.lower()
+        [idx for idx, phrases in enumerate(patterns) if any(p.lower().strip() in msg for p in phrases)]
+    naive = (time.perf_counter() - t0) * n_messages / len(sample)
+
+    print(f"patterns={n_patterns} phrases={matcher.n_phrases} states={matcher.n_states}")
+    print(f"build            {build * 1000:9.1f} ms")
+    print(f"aho-corasick     {n_messages / ac:9.0f} msg/s  {n_chars / ac / 1e6:6.2f} MB/s")
+    print(f"nested loop      {n_messages / naive:9.0f} msg/s  (extrapolated from {len(sample)} msgs)")
+
+
+if __name__ == "__main__":
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
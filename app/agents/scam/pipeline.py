@@ -10,28 +10,84 @@ This file provides:
 
 - run(text, language)           → ScamAnalysisResult
 - run_scam_pipeline(req)        → ScamAnalysisResult (used by master_agent)
+- run_scam_two_phase(req)       → (ScamAnalysisResult, enrichment token or None)
+
+Both steps are agents_runtime stages (SCAM_PIPELINE). If enrich_explanation
+fails, the risk_analyze result is returned (the stage's fallback). With
+local_only=True (LLM circuit open) it is returned as-is, without
+enrich_explanation.
+
+Two-phase mode (run_scam_two_phase) returns the risk_analyze verdict without
+waiting for the LLM: a stored explanation (explanation_store.py) is applied
+when there is one, otherwise enrich_explanation runs in the background
+under an enrichment token (enrichment.py).
 """
 
+from typing import Optional, Tuple
+
+from app.core.agents_runtime import Pipeline, Stage, run_agents
 from app.schemas.scam import ScamAnalysisRequest, ScamAnalysisResult
 from app.agents.scam.risk_analyzer import risk_analyze
-from app.agents.scam.educator import enrich_explanation
+from app.agents.scam.educator import apply_explanation, enrich_explanation
+from app.agents.scam.enrichment import enrichments
+from app.agents.scam.explanation_store import explanation_store
+
+_RISK_ANALYZER = Stage(
+    "scam.risk_analyzer", risk_analyze, inputs=["req"], output="base", threaded=True,
+)
+
+SCAM_PIPELINE = Pipeline("scam", [
+    _RISK_ANALYZER,
+    Stage(
+        "scam.educator", enrich_explanation, inputs={"result": "base"}, output="final",
+        fallback=lambda result: result,
+    ),
+], result="final")
+
+SCAM_LOCAL_PIPELINE = Pipeline("scam.local", [_RISK_ANALYZER], result="base")
 
 
-async def run(text: str, language: str = "en") -> ScamAnalysisResult:
+async def run(
+    text: str,
+    language: str = "en",
+    local_only: bool = False,
+    base: Optional[ScamAnalysisResult] = None,
+) -> ScamAnalysisResult:
     """
     Original entrypoint: text + language → ScamAnalysisResult
+
+    `base` is a risk_analyze result computed ahead of time (speculatively).
     """
     req = ScamAnalysisRequest(text=text, language=language)
-    base = risk_analyze(req)          # sync, very fast
-    final = await enrich_explanation(base)
-    return final
+    pipeline = SCAM_LOCAL_PIPELINE if local_only else SCAM_PIPELINE
+    return await run_agents(pipeline, req=req, base=base)
 
 
-async def run_scam_pipeline(req: ScamAnalysisRequest) -> ScamAnalysisResult:
+async def run_scam_pipeline(
+    req: ScamAnalysisRequest,
+    local_only: bool = False,
+    base: Optional[ScamAnalysisResult] = None,
+) -> ScamAnalysisResult:
     """
     Async adapter used by the master agent.
 
     Keeps the same interface as loan / policy pipelines:
         await run_scam_pipeline(ScamAnalysisRequest) -> ScamAnalysisResult
     """
-    return await run(req.text, req.language)
+    return await run(req.text, req.language, local_only=local_only, base=base)
+
+
+async def run_scam_two_phase(
+    req: ScamAnalysisRequest,
+    base: Optional[ScamAnalysisResult] = None,
+) -> Tuple[ScamAnalysisResult, Optional[str]]:
+    """
+    Local verdict now, explanation later: returns (result, token). `token`
+    is None when the explanation was already in the store (and applied);
+    otherwise the enriched result is available from enrichments.get(token).
+    """
+    result = await run_agents(SCAM_LOCAL_PIPELINE, req=req, base=base)
+    _, stored = explanation_store.lookup(result)
+    if stored is not None:
+        return apply_explanation(result, stored), None
+    return result, enrichments.submit(result)
@@ -1,135 +1,154 @@
-import json
-from pathlib import Path
-from typing import Any, Dict, List
+from typing import Dict, List, Optional, Sequence
 
 from app.schemas.scam import ScamAnalysisRequest, ScamAnalysisResult
 
-
-GENERIC_RECOMMENDED_ACTION = (
-    "Never share OTP, PIN, CVV, or passwords with anyone. "
-    "Do not click on suspicious links or QR codes. "
-    "Verify the sender using official channels and report the incident to your bank "
-    "and cybercrime portal if you suspect fraud."
+from .near_duplicate import near_duplicate_index
+from .pattern_index import (
+    GENERIC_RECOMMENDED_ACTION,
+    CompiledPattern,
+    PatternSnapshot,
+    pattern_index,
 )
 
+SAFE_CLASSIFICATION = "probably safe"
 
-def _patterns_path() -> Path:
-    """
-    Path to app/data/scam_patterns.json
-    """
-    return Path(__file__).resolve().parents[2] / "data" / "scam_patterns.json"
 
+def phrase_match_risk(score: float) -> float:
+    """Risk for a key-phrase match, weighted by its TF-IDF score: 0.6 .. 1.0."""
+    return round(0.6 + 0.4 * score, 3)
 
-def load_patterns() -> List[Dict[str, Any]]:
-    """
-    Load scam patterns from JSON and NORMALIZE them into a common shape.
 
-    Supports two shapes:
-    1) Simple:
-       {"name": "...", "description": "..."}
-    2) Rich (ScamPattern-like):
-       {"scam_name": "...", "key_phrases": [...], "red_flags": [...], ...}
-    """
+def unmatched_risk(best_score: float) -> float:
+    """Risk when nothing matched, graded by the best TF-IDF score: 0.1 .. 0.4."""
+    return round(0.1 + 0.3 * best_score, 3)
+
 
-    path = _patterns_path()
-    with open(path, encoding="utf-8") as f:
-        raw: List[Dict[str, Any]] = json.load(f)
-
-    normalized: List[Dict[str, Any]] = []
-
-    for p in raw:
-        # Rich format already
-        if "scam_name" in p:
-            scam_name = p["scam_name"]
-            modus_operandi = p.get("modus_operandi") or p.get("description", "")
-            key_phrases = p.get("key_phrases") or [scam_name]
-            red_flags = p.get("red_flags") or [modus_operandi] if modus_operandi else []
-            recommended = p.get("recommended_user_action") or GENERIC_RECOMMENDED_ACTION
-            example = p.get("example_message") or ""
-        # Simple format: name + description only
-        else:
-            scam_name = p.get("name", "Unknown Scam")
-            modus_operandi = p.get("description", "")
-            key_phrases = [scam_name]  # simple heuristic
-            red_flags = [modus_operandi] if modus_operandi else []
-            recommended = GENERIC_RECOMMENDED_ACTION
-            example = ""
-
-        normalized.append(
-            {
-                "scam_name": scam_name,
-                "modus_operandi": modus_operandi,
-                "key_phrases": key_phrases,
-                "red_flags": red_flags,
-                "recommended_user_action": recommended,
-                "example_message": example,
-            }
-        )
-
-    return normalized
+def near_duplicate_risk(similarity: float) -> float:
+    """Risk for a near-duplicate of a known scam: 0.75 at Jaccard 0.5, 1.0 at 1.0."""
+    return round(0.5 + 0.5 * similarity, 3)
 
 
 def risk_analyze(req: ScamAnalysisRequest) -> ScamAnalysisResult:
     """
     Fast, non-LLM risk analyzer:
 
-    - loads normalized patterns
-    - checks if any key phrase appears in the message
-    - if matches found → high risk
+    - reads the compiled, in-memory pattern index (pattern_index.py)
+    - matches every pattern's key phrases in one pass (phrase_matcher.py)
+    - scores the message against all patterns with TF-IDF (tfidf_scorer.py)
+    - looks up near-duplicates of known scam messages (near_duplicate.py)
+    - if matches found → high risk, weighted by TF-IDF score / similarity
     - otherwise → probably safe
     """
+    return risk_analyze_batch([req])[0]
 
-    patterns = load_patterns()
-    msg = req.text.lower()
 
-    matched_indices: List[int] = []
-    red_flags: List[str] = []
+def risk_analyze_batch(requests: Sequence[ScamAnalysisRequest]) -> List[ScamAnalysisResult]:
+    """risk_analyze() for many messages, with one sparse TF-IDF product for all."""
+    index = pattern_index.snapshot()
+    near_duplicate_index.sync(index)
+    rows = index.scorer.rows([req.text for req in requests])
+    return [
+        _analyze(req, index, dict(zip(cols.tolist(), scores.tolist())))
+        for req, (cols, scores) in zip(requests, rows)
+    ]
+
+
+def _analyze(req: ScamAnalysisRequest, index: PatternSnapshot, pattern_scores: Dict[int, float]) -> ScamAnalysisResult:
+    patterns = index.patterns
+    # Strongest TF-IDF match first; it becomes the "primary" pattern.
+    matched_indices: List[int] = sorted(
+        index.matcher.payloads(req.text), key=lambda idx: (-pattern_scores.get(idx, 0.0), idx)
+    )
+    near = near_duplicate_index.query(req.text)
+
+    risk_score = phrase_match_risk(pattern_scores.get(matched_indices[0], 0.0)) if matched_indices else 0.0
+    matched_names = [patterns[idx].scam_name for idx in matched_indices]
+    flagged = list(matched_indices)
+    if near:
+        risk_score = max(risk_score, near_duplicate_risk(near[0].similarity))
+        for dup in near:
+            if dup.label not in matched_names:
+                matched_names.append(dup.label)
+            idx = index.by_name.get(dup.label)
+            if idx is not None and idx not in flagged:
+                flagged.append(idx)
 
-    for idx, p in enumerate(patterns):
-        for phrase in p.get("key_phrases", []):
-            phrase_l = phrase.lower().strip()
-            if phrase_l and phrase_l in msg:
-                matched_indices.append(idx)
-                red_flags.extend(p.get("red_flags", []))
-                break
+    red_flags: List[str] = []
+    for idx in flagged:
+        red_flags.extend(patterns[idx].red_flags)
 
     # No matches → low risk
-    if not matched_indices:
-        return ScamAnalysisResult(
-            language=req.language,
-            classification="probably safe",
-            risk_score=0.2,
-            is_scam=False,
-            matched_patterns=[],
-            red_flags=[],
-            recommended_action=GENERIC_RECOMMENDED_ACTION,
-            short_warning="Looks safe, but stay alert.",
-            detailed_explanation=[
-                "No strong scam indicators detected from the known pattern list.",
-                "Still, never share OTP/PIN and always verify requests via official channels.",
-            ],
-        )
-
-    # Use first matched pattern as "primary"
-    primary = patterns[matched_indices[0]]
-
-    scam_name = primary["scam_name"]
-    modus_operandi = primary.get("modus_operandi", "")
-    recommended = primary.get("recommended_user_action", GENERIC_RECOMMENDED_ACTION)
-    example = primary.get("example_message", "")
+    if not matched_names:
+        return safe_result(req.language, unmatched_risk(max(pattern_scores.values(), default=0.0)))
+
+    # Use first matched pattern as "primary" (a report label may have none)
+    scam_name = matched_names[0]
+    primary_idx = matched_indices[0] if matched_indices else index.by_name.get(scam_name)
+    primary = patterns[primary_idx] if primary_idx is not None else None
+    return _scam_result(
+        req.language,
+        scam_name,
+        risk_score,
+        matched_names,
+        red_flags,
+        primary,
+        [
+            f"Closely matches a known scam message ({dup.similarity:.0%} similar): {dup.label}"
+            for dup in near
+        ],
+    )
+
+
+def safe_result(language: str, risk_score: float = 0.1) -> ScamAnalysisResult:
+    return ScamAnalysisResult(
+        language=language,
+        classification=SAFE_CLASSIFICATION,
+        risk_score=risk_score,
+        is_scam=False,
+        matched_patterns=[],
+        red_flags=[],
+        recommended_action=GENERIC_RECOMMENDED_ACTION,
+        short_warning="Looks safe, but stay alert.",
+        detailed_explanation=[
+            "No strong scam indicators detected from the known pattern list.",
+            "Still, never share OTP/PIN and always verify requests via official channels.",
+        ],
+    )
+
+
+def pattern_result(pattern: CompiledPattern, language: str) -> ScamAnalysisResult:
+    """What risk_analyze() returns for a message matching only `pattern`."""
+    return _scam_result(
+        language, pattern.scam_name, phrase_match_risk(1.0), [pattern.scam_name], list(pattern.red_flags), pattern
+    )
+
+
+def _scam_result(
+    language: str,
+    scam_name: str,
+    risk_score: float,
+    matched_names: List[str],
+    red_flags: List[str],
+    primary: Optional[CompiledPattern],
+    near_lines: Sequence[str] = (),
+) -> ScamAnalysisResult:
+    modus_operandi = primary.modus_operandi if primary else ""
+    recommended = (primary.recommended_user_action if primary else "") or GENERIC_RECOMMENDED_ACTION
+    example = primary.example_message if primary else ""
 
     return ScamAnalysisResult(
-        language=req.language,
+        language=language,
         classification=scam_name,
-        risk_score=0.9,
+        risk_score=risk_score,
         is_scam=True,
-        matched_patterns=[primary["scam_name"] for _ in matched_indices],
+        matched_patterns=matched_names,
         red_flags=red_flags,
         recommended_action=recommended,
         short_warning=f"⚠️ Suspicious: {scam_name}",
         detailed_explanation=[
             f"Modus operandi: {modus_operandi}" if modus_operandi else "",
             *(red_flags or []),
+            *near_lines,
             f"Example message: {example}" if example else "",
         ],
     )
@@ -0,0 +1,186 @@
+"""
+TF-IDF Scam Scorer
+------------------
+Scores messages against every scam pattern with one sparse matrix product.
+
+- Patterns and messages become hashed word unigram + bigram vectors
+  (N_FEATURES columns, scipy CSR) after near_duplicate.normalize_message().
+  A pattern's document is its name, key phrases (counted twice), red flags,
+  modus operandi and example message.
+- Term weights are sublinear TF × IDF, with IDF learned from the pattern
+  corpus (phrases shared by many patterns count less); rows are L2-normalized,
+  so messages @ patterns.T is a matrix of cosine similarities.
+- Calibration: each cosine is divided by the pattern's reference score (the
+  cosine a message made of exactly its key phrases would get), which puts
+  long and short patterns on the same scale, then mapped through a logistic
+  (CALIBRATION_MIDPOINT / CALIBRATION_SLOPE) to a 0..1 score.
+- top_k() works on the sparse product row by row, so a batch of messages
+  never materializes a dense messages × patterns matrix.
+"""
+
+import zlib
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .near_duplicate import is_example, normalize_message
+
+N_FEATURES = 1 << 18
+CALIBRATION_MIDPOINT = 0.35  # reference-normalized cosine that maps to 0.5
+CALIBRATION_SLOPE = 12.0
+
+
+class PatternScore(NamedTuple):
+    index: int  # pattern index in the snapshot
+    score: float  # calibrated, 0..1
+    similarity: float  # raw cosine
+
+
+def _hash(gram: str) -> int:
+    return zlib.crc32(gram.encode("utf-8")) % N_FEATURES
+
+
+def terms(text: str) -> List[int]:
+    """Hashed word unigrams and bigrams, with repeats (for term frequency)."""
+    tokens = normalize_message(text).split()
+    grams = [f"w:{t}" for t in tokens] + [f"b:{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return [_hash(g) for g in grams]
+
+
+def _pattern_document(pattern) -> List[int]:
+    parts = [pattern.scam_name, *pattern.key_phrases, *pattern.key_phrases, *pattern.red_flags]
+    parts.append(pattern.modus_operandi)
+    if is_example(pattern.example_message):
+        parts.append(pattern.example_message)
+    ids: List[int] = []
+    for part in parts:  # bigrams never span two parts
+        ids.extend(terms(part))
+    return ids
+
+
+def _tfidf_arrays(
+    docs: Sequence[List[int]], idf: Optional[np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    CSR (indptr, indices, data), one row per document: sublinear TF, times
+    `idf` when given, L2-normalized (idf=None: raw TF, unnormalized).
+    """
+    lengths = np.zeros(len(docs), dtype=np.int64)
+    cols, vals = [], []
+    for row, ids in enumerate(docs):
+        uniq, counts = np.unique(np.asarray(ids, dtype=np.int64), return_counts=True)
+        cols.append(uniq)
+        vals.append(1.0 + np.log(counts))
+        lengths[row] = len(uniq)
+    indices = np.concatenate(cols) if cols else np.zeros(0, np.int64)
+    data = np.concatenate(vals) if vals else np.zeros(0)
+    indptr = np.concatenate(([0], np.cumsum(lengths)))
+    if idf is not None and len(data):
+        data = data * idf[indices]
+        sq = np.add.reduceat(data * data, indptr[:-1][lengths > 0])
+        norms = np.ones(len(docs))
+        norms[lengths > 0] = np.sqrt(sq)
+        data = data / np.repeat(norms, lengths)
+    return indptr, indices, data.astype(np.float32)
+
+
+def _tfidf_matrix(docs: Sequence[List[int]], idf: Optional[np.ndarray]) -> sparse.csr_matrix:
+    indptr, indices, data = _tfidf_arrays(docs, idf)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(docs), N_FEATURES))
+
+
+def calibrate(similarity: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    ratio = np.minimum(similarity / reference, 1.0)
+    return 1.0 / (1.0 + np.exp(-CALIBRATION_SLOPE * (ratio - CALIBRATION_MIDPOINT)))
+
+
+class TfidfScorer:
+    def __init__(self, patterns: Sequence):
+        self.n_patterns = len(patterns)
+        docs = [_pattern_document(p) for p in patterns]
+        df = np.bincount(_tfidf_matrix(docs, None).indices, minlength=N_FEATURES)
+        self.idf = np.log((1.0 + self.n_patterns) / (1.0 + df)) + 1.0
+        self.patterns_t = _tfidf_matrix(docs, self.idf).T.tocsr()
+
+        # Score of a message made of exactly the pattern's key phrases (or name).
+        if not self.n_patterns:
+            self.reference = np.zeros(0, dtype=np.float32)
+            return
+        probes = [" . ".join(p.key_phrases) or p.scam_name for p in patterns]
+        probe_sims = self._similarities(probes)
+        reference = np.asarray(probe_sims[np.arange(self.n_patterns), np.arange(self.n_patterns)]).ravel()
+        self.reference = np.maximum(reference, 1e-6).astype(np.float32)
+
+    def vectorize(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        return _tfidf_matrix([terms(t) for t in texts], self.idf)
+
+    def _similarities(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """Sparse (messages × patterns) cosine similarities."""
+        if not texts or not self.n_patterns:
+            return sparse.csr_matrix((len(texts), self.n_patterns), dtype=np.float32)
+        return self.vectorize(texts).dot(self.patterns_t).tocsr()
+
+    def _similarities_one(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (pattern indices, cosines) for a single message. Same result as one
+        row of _similarities(), computed by gathering the message's feature
+        rows of patterns_t directly: scipy's per-call overhead dominates
+        the product at batch size 1.
+        """
+        _, features, weights = _tfidf_arrays([terms(text)], self.idf)
+        pt = self.patterns_t
+        starts, ends = pt.indptr[features], pt.indptr[features + 1]
+        if not self.n_patterns or not (ends > starts).any():
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        cols = np.concatenate([pt.indices[a:b] for a, b in zip(starts, ends)])
+        vals = np.concatenate([pt.data[a:b] * w for a, b, w in zip(starts, ends, weights)])
+        sims = np.bincount(cols, weights=vals, minlength=self.n_patterns)
+        nonzero = np.flatnonzero(sims)
+        return nonzero, sims[nonzero].astype(np.float32)
+
+    def rows(self, texts: Sequence[str]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Per message, (pattern indices, calibrated scores) of every pattern sharing a term."""
+        if len(texts) == 1:
+            cols, cos = self._similarities_one(texts[0])
+            return [(cols, calibrate(cos, self.reference[cols]))]
+        sims = self._similarities(texts)
+        out = []
+        for row in range(sims.shape[0]):
+            start, end = sims.indptr[row], sims.indptr[row + 1]
+            cols = sims.indices[start:end]
+            out.append((cols, calibrate(sims.data[start:end], self.reference[cols])))
+        return out
+
+    def scores(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """Sparse (messages × patterns) calibrated scores; absent entries share no term."""
+        sims = self._similarities(texts)
+        sims.data = calibrate(sims.data, self.reference[sims.indices]).astype(np.float32)
+        return sims
+
+    def top_k(self, texts: Sequence[str], k: int = 3, min_score: float = 0.0) -> List[List[PatternScore]]:
+        """Per message, the k best patterns by calibrated score (descending)."""
+        sims = self._similarities(texts)
+        results: List[List[PatternScore]] = []
+        for row in range(sims.shape[0]):
+            start, end = sims.indptr[row], sims.indptr[row + 1]
+            cols, cos = sims.indices[start:end], sims.data[start:end]
+            if not len(cols):
+                results.append([])
+                continue
+            calibrated = calibrate(cos, self.reference[cols])
+            order = np.argsort(-calibrated, kind="stable")[:k]
+            results.append([
+                PatternScore(int(cols[i]), round(float(calibrated[i]), 4), round(float(cos[i]), 4))
+                for i in order
+                if calibrated[i] >= min_score
+            ])
+        return results
+
+    def score_patterns(self, text: str, indices: Sequence[int]) -> List[float]:
+        """Calibrated score of one message against the given patterns."""
+        if not indices:
+            return []
+        row = self.scores([text])[0]
+        dense = dict(zip(row.indices.tolist(), row.data.tolist()))
+        return [round(dense.get(i, 0.0), 4) for i in indices]
@@ -3,12 +3,13 @@ Main API router.
 
 Includes:
 - /health
-- /guardian
+- /guardian (+ /guardian/stream, /guardian/batch, /guardian/jobs)
+- /metrics
 """
 
 from fastapi import APIRouter
 
-from app.api.routes import health, guardian
+from app.api.routes import health, guardian, metrics
 
 api_router = APIRouter()
 
@@ -17,3 +18,6 @@ api_router.include_router(health.router)
 
 # Guardian multi-agent endpoint
 api_router.include_router(guardian.router)
+
+# Prometheus metrics
+api_router.include_router(metrics.router)
@@ -3,4 +3,5 @@ Route modules for the FastAPI application.
 
 - guardian: main endpoint that talks to the master agent
 - health: simple health check endpoint
+- metrics: Prometheus scrape endpoint
 """
@@ -1,7 +1,19 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+from typing import Any, AsyncIterator, List, Optional
 
-from app.schemas import UserRequest, AgentResponse
-from app.agents.master import route_request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive, Scope, Send
+
+from app.core import events
+from app.core.job_queue import QueueFullError
+from app.schemas import UserRequest, AgentResponse, JobInfo, ScamEnrichment
+from app.agents.master import guardian_jobs, route_request
+from app.agents.master.batch import BATCH_MAX_ITEMS, route_batch
+from app.agents.scam.bulk_scan import FORMATS, ScanInputError, scan_stream
+from app.agents.scam.enrichment import ENRICHMENT_TTL_SECONDS, enrichments
 
 router = APIRouter()
 
@@ -19,3 +31,231 @@ async def guardian_endpoint(
     """
     response = await route_request(request)
     return response
+
+
+def _sse(event: str, data: Any) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+@router.post("/guardian/stream", tags=["guardian"])
+async def guardian_stream_endpoint(
+    request: UserRequest,
+) -> StreamingResponse:
+    """
+    Server-Sent Events variant of /guardian.
+
+    Emits, in order of occurrence:
+    - route_selected  {route, reason}
+    - stage_started   {stage}
+    - stage_finished  {stage, ok, elapsed_ms}
+    - token           {stage, text}   incremental narrator / educator output
+    - result          the final AgentResponse
+    - enrichment      ScamEnrichment, after `result`, when the request set
+                      defer_enrichment and the explanation was deferred
+    """
+    queue: "asyncio.Queue[Any]" = asyncio.Queue()
+
+    async def run() -> AgentResponse:
+        with events.capture(queue):
+            try:
+                return await route_request(request)
+            finally:
+                queue.put_nowait(None)
+
+    async def event_stream() -> AsyncIterator[str]:
+        task = asyncio.ensure_future(run())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                name, data = item
+                yield _sse(name, data)
+            response = await task
+            yield _sse("result", response.model_dump(mode="json"))
+            if response.enrichment_token:
+                enrichment = await enrichments.wait(response.enrichment_token, ENRICHMENT_TTL_SECONDS)
+                if enrichment is not None:
+                    yield _sse("enrichment", enrichment.model_dump(mode="json"))
+        finally:
+            # Client went away mid-stream: stop the pipeline too.
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/guardian/batch", tags=["guardian"])
+async def guardian_batch_endpoint(
+    requests: List[UserRequest],
+) -> StreamingResponse:
+    """
+    Bulk variant of /guardian for partner integrations.
+
+    Accepts a JSON array of UserRequest objects (at most
+    GUARDIAN_BATCH_MAX_ITEMS) and streams NDJSON, one line per input item,
+    in completion order:
+    - {"index": i, "response": AgentResponse}
+    - {"index": i, "error": {"message": "..."}}  if the item itself blew up
+    Identical items are processed once and reported under every index.
+    """
+    if len(requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(requests)} items (max {BATCH_MAX_ITEMS}).",
+        )
+
+    async def lines() -> AsyncIterator[str]:
+        results = route_batch(requests)
+        try:
+            async for indices, outcome in results:
+                for index in indices:
+                    if isinstance(outcome, Exception):
+                        line = {"index": index, "error": {"message": str(outcome)}}
+                    else:
+                        line = {"index": index, "response": outcome.model_dump(mode="json")}
+                    yield json.dumps(line, ensure_ascii=False, default=str) + "\n"
+        finally:
+            await results.aclose()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/guardian/enrichment/{token}", response_model=ScamEnrichment, tags=["guardian"])
+async def guardian_enrichment(token: str) -> ScamEnrichment:
+    """
+    Deferred explanation of a two-phase scam check (defer_enrichment):
+    status pending / done / failed; when done, `result` is the verdict with
+    the educator's explanation. 404 for unknown or expired tokens.
+    """
+    enrichment = enrichments.get(token)
+    if enrichment is None:
+        raise HTTPException(status_code=404, detail="Enrichment not found or expired.")
+    return enrichment
+
+
+@router.get("/guardian/enrichment/{token}/stream", tags=["guardian"])
+async def guardian_enrichment_stream(token: str) -> StreamingResponse:
+    """
+    Server-Sent Events variant: one `enrichment` event (ScamEnrichment)
+    once the explanation is done or failed.
+    """
+    if enrichments.get(token) is None:
+        raise HTTPException(status_code=404, detail="Enrichment not found or expired.")
+
+    async def event_stream() -> AsyncIterator[str]:
+        enrichment = await enrichments.wait(token, ENRICHMENT_TTL_SECONDS)
+        if enrichment is not None:
+            yield _sse("enrichment", enrichment.model_dump(mode="json"))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class _UploadStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body generator is still reading the request
+    body. The stock class (ASGI < 2.4, e.g. uvicorn) runs a disconnect
+    listener on `receive` that would swallow the upload's chunks; here a
+    disconnect surfaces as a send() error instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+
+def _scan_format(request: Request, fmt: Optional[str]) -> str:
+    if fmt is None:
+        content_type = request.headers.get("content-type", "")
+        fmt = "csv" if "csv" in content_type else "ndjson"
+    if fmt not in FORMATS:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported format {fmt!r} (expected one of {', '.join(FORMATS)}).",
+        )
+    return fmt
+
+
+@router.post("/guardian/scam/scan", tags=["guardian"])
+async def guardian_scam_scan_endpoint(
+    request: Request,
+    fmt: Optional[str] = Query(default=None, alias="format"),
+    language: str = Query(default="en"),
+    educate: bool = Query(default=False),
+) -> StreamingResponse:
+    """
+    Bulk scam scan of a message export (SMS inbox, telco feed).
+
+    The request body is the raw upload, read as a stream: NDJSON (one
+    {"text", "id"?, "language"?} object per line) or CSV with a "text"
+    column. `format` defaults from the Content-Type (text/csv → csv,
+    anything else → ndjson). Messages are checked locally in batches; the
+    response streams NDJSON, one line per message:
+    - {"index": i, "id": ..., "result": ScamAnalysisResult}
+    - {"index": i, "id": ..., "error": {"message": "..."}}
+    With educate=true, deduplicated high-risk hits also get the educator
+    LLM's explanation (those lines arrive when it finishes). A final
+    {"error": {...}} line without an index means the upload itself was
+    unreadable (e.g. no CSV "text" column).
+    """
+    fmt = _scan_format(request, fmt)
+
+    async def lines() -> AsyncIterator[str]:
+        results = scan_stream(request.stream(), fmt, language=language, educate=educate)
+        try:
+            async for line in results:
+                yield json.dumps(line, ensure_ascii=False, default=str) + "\n"
+        except ScanInputError as exc:
+            yield json.dumps({"error": {"message": str(exc)}}, ensure_ascii=False) + "\n"
+        finally:
+            await results.aclose()
+
+    return _UploadStreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/guardian/jobs", response_model=JobInfo, status_code=202, tags=["guardian"])
+async def guardian_job_submit(
+    request: UserRequest,
+    priority: int = Query(default=0, ge=-10, le=10),
+) -> JobInfo:
+    """
+    Queue a UserRequest (typically a long loan document) for background
+    processing and return immediately with the job id.
+
+    Poll GET /guardian/jobs/{id} until status is succeeded / failed /
+    cancelled; on success `result` holds the AgentResponse. Higher
+    `priority` jobs are picked up first. Returns 503 when the queue is full.
+    """
+    try:
+        return await guardian_jobs.submit(request.model_dump(mode="json"), priority=priority)
+    except QueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+
+@router.get("/guardian/jobs/{job_id}", response_model=JobInfo, tags=["guardian"])
+async def guardian_job_status(job_id: str) -> JobInfo:
+    """Current state of a job; 404 for unknown or expired jobs."""
+    job = await guardian_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job
+
+
+@router.delete("/guardian/jobs/{job_id}", response_model=JobInfo, tags=["guardian"])
+async def guardian_job_cancel(job_id: str) -> JobInfo:
+    """Cancel a queued or running job; finished jobs are returned unchanged."""
+    job = await guardian_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job
@@ -1,12 +1,318 @@
-"""Simple orchestrator to run agents (stub).
+"""
+Agents Runtime
+--------------
+Small declarative DAG executor for the agent pipelines.
+
+A pipeline is a list of Stage objects, each naming the values it consumes
+(`inputs`: value names passed as same-named keyword arguments, or a
+{parameter: value name} mapping) and the single value it produces (`output`):
+
+    LOAN = Pipeline("loan", [
+        Stage("loan.ingestion", run_ingestion, inputs=["request"], output="raw_text"),
+        Stage("loan.clause_extractor", extract, inputs=["raw_text", "language"], output="extracted"),
+        ...
+    ], result="summary")
+
+    summary = await run_agents(LOAN, request=req, language="en")
 
-This module will coordinate multi-agent workflows.
+The executor:
+- runs only the stages the result depends on, starting each as soon as its
+  inputs exist, so independent stages run concurrently;
+- skips a stage whose output was passed in as a seed (e.g. work done
+  speculatively by the master agent), along with anything only it needed;
+- calls sync stage functions inline, or in a worker thread with threaded=True;
+- applies per-stage `timeout` (seconds, per attempt) and `retries`, then
+  the stage's `fallback` (same arguments) if it has one. An inline sync
+  call can't be interrupted, so `timeout` needs an async function or
+  threaded=True (Stage() raises ValueError otherwise); a timed-out thread
+  is abandoned, not stopped;
+- memoizes outputs of stages with `memo_ttl` by a hash of their inputs,
+  except fallback values and values the stage wrapped in Uncached (degraded
+  output that should not outlive the run);
+- wraps each stage in events.stage() (SSE progress) and records a timing
+  trace per run, emitted as a "trace" event and exported to /metrics.
+
+The first stage that fails (after retries, without a fallback) cancels the
+rest of the run and its exception propagates unchanged.
 """
-from typing import Any
 
-# TODO: Define orchestration interfaces and run loops.
+import asyncio
+import copy
+import hashlib
+import inspect
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple, Union
+
+from app.core import events, metrics
+
+MEMO_MAX_ENTRIES = int(os.getenv("RUNTIME_MEMO_ENTRIES", "1024"))
+RETRY_BACKOFF_SECONDS = 0.2
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        inputs: Union[Sequence[str], Mapping[str, str]],
+        output: str,
+        timeout: Optional[float] = None,
+        retries: int = 0,
+        memo_ttl: float = 0,
+        threaded: bool = False,
+        fallback: Optional[Callable[..., Any]] = None,
+    ):
+        if timeout is not None and not threaded and not inspect.iscoroutinefunction(fn):
+            raise ValueError(f"{name}: timeout needs an async stage function or threaded=True")
+        self.name = name
+        self.fn = fn
+        # parameter name → value name
+        self.params: Dict[str, str] = (
+            dict(inputs) if isinstance(inputs, Mapping) else {n: n for n in inputs}
+        )
+        self.inputs = tuple(self.params.values())
+        self.output = output
+        self.timeout = timeout
+        self.retries = retries
+        self.memo_ttl = memo_ttl
+        self.threaded = threaded
+        self.fallback = fallback
+
+    def kwargs(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        return {param: values[name] for param, name in self.params.items()}
+
+    async def call(self, values: Dict[str, Any]) -> Any:
+        kwargs = self.kwargs(values)
+        if inspect.iscoroutinefunction(self.fn):
+            coro = self.fn(**kwargs)
+        elif self.threaded:
+            coro = asyncio.to_thread(self.fn, **kwargs)
+        else:
+            return self.fn(**kwargs)
+        if self.timeout is None:
+            return await coro
+        return await asyncio.wait_for(coro, self.timeout)
+
+
+class Uncached:
+    """Stage return value that is used for this run but never memoized."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class Pipeline:
+    def __init__(self, name: str, stages: Sequence[Stage], result: str):
+        self.name = name
+        self.stages = list(stages)
+        self.result = result
+        self._validate()
+
+    def _validate(self) -> None:
+        outputs: Dict[str, str] = {}
+        for stage in self.stages:
+            if stage.output in outputs:
+                raise ValueError(
+                    f"{self.name}: '{stage.output}' produced by both "
+                    f"{outputs[stage.output]} and {stage.name}"
+                )
+            outputs[stage.output] = stage.name
+        if self.result not in outputs:
+            raise ValueError(f"{self.name}: no stage produces result '{self.result}'")
+
+        # Cycle check (inputs that no stage produces must be seeds).
+        visiting, done = set(), set()
+        producers = {s.output: s for s in self.stages}
+
+        def visit(stage: Stage) -> None:
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"{self.name}: cycle through {stage.name}")
+            visiting.add(stage.name)
+            for name in stage.inputs:
+                if name in producers:
+                    visit(producers[name])
+            visiting.discard(stage.name)
+            done.add(stage.name)
+
+        for stage in self.stages:
+            visit(stage)
+
+    def plan(self, available: Set[str]) -> Tuple[List[Stage], List[str]]:
+        """
+        Stages needed to produce the result from the `available` values, in
+        declaration order, plus the seeds that are still missing.
+        """
+        producers = {s.output: s for s in self.stages}
+        needed: Set[str] = set()
+        missing: Set[str] = set()
+        stack = [self.result]
+        while stack:
+            name = stack.pop()
+            if name in available:
+                continue
+            stage = producers.get(name)
+            if stage is None:
+                missing.add(name)
+            elif stage.name not in needed:
+                needed.add(stage.name)
+                stack.extend(stage.inputs)
+        return [s for s in self.stages if s.name in needed], sorted(missing)
+
+
+class _Memo:
+    """LRU of stage outputs keyed by stage name + input hash, with per-entry TTL."""
+
+    def __init__(self, max_entries: int = MEMO_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._data.pop(key, None)
+            self.misses += 1
+            return False, None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return True, copy.deepcopy(entry[1])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+memo = _Memo()
+
+
+def _memo_collector():
+    yield (
+        "finpal_stage_memo_total",
+        "counter",
+        "agents_runtime stage memo lookups.",
+        [({"event": "hit"}, memo.hits), ({"event": "miss"}, memo.misses)],
+    )
+
+
+metrics.REGISTRY.register_collector(_memo_collector)
+
+
+def _jsonable(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def input_hash(stage: Stage, values: Dict[str, Any]) -> str:
+    canonical = json.dumps(
+        {param: _jsonable(values[name]) for param, name in stage.params.items()},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(f"{stage.name}\x00{canonical}".encode("utf-8")).hexdigest()
+
+
+async def _run_stage(pipeline: Pipeline, stage: Stage, values: Dict[str, Any], started: float) -> Dict[str, Any]:
+    """Run one stage (memo → attempts); returns its trace entry with the value under "_value"."""
+    entry: Dict[str, Any] = {
+        "stage": stage.name,
+        "start_ms": round((time.perf_counter() - started) * 1000, 1),
+        "attempts": 0,
+    }
+    t0 = time.perf_counter()
+
+    key = input_hash(stage, values) if stage.memo_ttl > 0 else None
+    if key is not None:
+        hit, value = memo.get(key)
+        if hit:
+            entry.update(status="memo", elapsed_ms=round((time.perf_counter() - t0) * 1000, 1), _value=value)
+            return entry
+
+    status = "ok"
+    async with events.stage(stage.name):
+        while True:
+            entry["attempts"] += 1
+            try:
+                value = await stage.call(values)
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                if entry["attempts"] > stage.retries:
+                    metrics.observe_stage(
+                        pipeline.name, stage.name, time.perf_counter() - t0, "error"
+                    )
+                    if stage.fallback is None:
+                        raise
+                    value, status = Uncached(stage.fallback(**stage.kwargs(values))), "fallback"
+                    break
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * entry["attempts"])
+
+    if isinstance(value, Uncached):
+        value = value.value
+    elif key is not None:
+        memo.set(key, value, stage.memo_ttl)
+    elapsed = time.perf_counter() - t0
+    if status == "ok":
+        metrics.observe_stage(pipeline.name, stage.name, elapsed, "ok")
+    entry.update(status=status, elapsed_ms=round(elapsed * 1000, 1), _value=value)
+    return entry
+
+
+async def execute(pipeline: Pipeline, **seeds: Any) -> Tuple[Any, List[Dict[str, Any]]]:
+    """Run the pipeline; returns (result value, timing trace)."""
+    values: Dict[str, Any] = {k: v for k, v in seeds.items() if v is not None}
+    waiting, missing = pipeline.plan(set(values))
+    if missing:
+        raise ValueError(f"{pipeline.name}: missing inputs {missing}")
+
+    started = time.perf_counter()
+    trace: List[Dict[str, Any]] = [
+        {"stage": s.name, "status": "prefilled", "start_ms": 0.0, "elapsed_ms": 0.0}
+        for s in pipeline.stages
+        if s.output in values
+    ]
+
+    running: Dict["asyncio.Future[Dict[str, Any]]", Stage] = {}
+    try:
+        while waiting or running:
+            for stage in [s for s in waiting if all(n in values for n in s.inputs)]:
+                waiting.remove(stage)
+                running[asyncio.ensure_future(_run_stage(pipeline, stage, values, started))] = stage
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                stage = running.pop(task)
+                entry = task.result()  # re-raises the stage's exception
+                values[stage.output] = entry.pop("_value")
+                trace.append(entry)
+    finally:
+        for task in running:
+            task.cancel()
+
+    total_ms = round((time.perf_counter() - started) * 1000, 1)
+    events.emit("trace", pipeline=pipeline.name, total_ms=total_ms, stages=trace)
+    return values[pipeline.result], trace
 
-def run_agents(payload: Any) -> Any:
-    """Stub: run the appropriate agents for a payload."""
-    return {"status": "todo", "payload": payload}
 
+async def run_agents(pipeline: Pipeline, **seeds: Any) -> Any:
+    """Run the pipeline and return just its result value."""
+    result, _ = await execute(pipeline, **seeds)
+    return result
@@ -0,0 +1,161 @@
+"""
+LLM Circuit Breaker
+-------------------
+Stops sending traffic to Gemini while it is failing, and tells the pipelines
+to run in local-only (degraded) mode instead of waiting on doomed calls.
+
+States:
+- CLOSED     normal operation; outcomes of real backend calls are recorded in
+             a sliding window of LLM_BREAKER_WINDOW_SECONDS
+- OPEN       entered when, over at least LLM_BREAKER_MIN_CALLS calls, the
+             error rate reaches LLM_BREAKER_ERROR_RATE or the share of calls
+             slower than LLM_BREAKER_SLOW_SECONDS reaches LLM_BREAKER_SLOW_RATE;
+             LLM calls are refused for LLM_BREAKER_COOLDOWN_SECONDS
+- HALF_OPEN  after the cooldown, up to LLM_BREAKER_HALF_OPEN_PROBES probe
+             calls are let through; a successful probe closes the circuit,
+             a failed one re-opens it
+"""
+
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+WINDOW_SECONDS = float(os.getenv("LLM_BREAKER_WINDOW_SECONDS", "30"))
+MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+SLOW_SECONDS = float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "20"))
+SLOW_RATE = float(os.getenv("LLM_BREAKER_SLOW_RATE", "0.8"))
+COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+HALF_OPEN_PROBES = int(os.getenv("LLM_BREAKER_HALF_OPEN_PROBES", "2"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised / reported when an LLM call is refused by an open circuit."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        window_seconds: float = WINDOW_SECONDS,
+        min_calls: int = MIN_CALLS,
+        error_rate: float = ERROR_RATE,
+        slow_seconds: float = SLOW_SECONDS,
+        slow_rate: float = SLOW_RATE,
+        cooldown_seconds: float = COOLDOWN_SECONDS,
+        half_open_probes: int = HALF_OPEN_PROBES,
+    ):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.cooldown_seconds = cooldown_seconds
+        self.half_open_probes = half_open_probes
+
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        # (timestamp, failed, slow)
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+        return self._state
+
+    def degraded(self) -> bool:
+        """
+        True when a new request should not count on the LLM: the circuit is
+        open, or half-open with every probe slot already taken.
+        """
+        state = self.state
+        if state == OPEN:
+            return True
+        if state == HALF_OPEN:
+            return self._probes_in_flight >= self.half_open_probes
+        return False
+
+    def allow(self) -> bool:
+        """Claim permission for one backend call (a probe slot when half-open)."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+            self._probes_in_flight += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def release(self) -> None:
+        """Give back a probe slot whose call was cancelled before it finished."""
+        if self._state == HALF_OPEN and self._probes_in_flight > 0:
+            self._probes_in_flight -= 1
+
+    def record_success(self, latency: float) -> None:
+        if self._state == HALF_OPEN:
+            self._close()
+            return
+        self._record(failed=False, slow=latency >= self.slow_seconds)
+
+    def record_failure(self) -> None:
+        if self._state == HALF_OPEN:
+            self._open()
+            return
+        self._record(failed=True, slow=False)
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        now = time.monotonic()
+        self._outcomes.append((now, failed, slow))
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+        if self._state != CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        total = len(self._outcomes)
+        failures = sum(1 for _, f, _ in self._outcomes if f)
+        slow_calls = sum(1 for _, _, s in self._outcomes if s)
+        if failures / total >= self.error_rate or slow_calls / total >= self.slow_rate:
+            self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+        self._outcomes.clear()
+        self.trips += 1
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._probes_in_flight = 0
+        self._outcomes.clear()
+
+    def reset(self) -> None:
+        self._close()
+        self.trips = 0
+        self.rejected = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "window_calls": len(self._outcomes),
+        }
+
+
+llm_breaker = CircuitBreaker()
+
+
+def llm_degraded() -> bool:
+    """Shortcut used by the pipelines to decide on local-only mode."""
+    return llm_breaker.degraded()
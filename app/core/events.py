@@ -0,0 +1,68 @@
+"""
+Pipeline Events
+---------------
+Lightweight progress events for streaming responses (/guardian/stream).
+
+A streaming endpoint installs an asyncio.Queue as the event sink for the
+current task via `capture()`. Agents then report progress with:
+
+    async with stage("loan.clause_extractor"):
+        ...
+    emit("token", stage="loan.narrator", text=delta)
+
+When no sink is installed (the normal /guardian path) these are no-ops.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+Event = Tuple[str, Dict[str, Any]]
+
+_sink: ContextVar[Optional["asyncio.Queue[Optional[Event]]"]] = ContextVar(
+    "pipeline_event_sink", default=None
+)
+
+
+def is_streaming() -> bool:
+    return _sink.get() is not None
+
+
+def emit(event: str, **data: Any) -> None:
+    queue = _sink.get()
+    if queue is not None:
+        queue.put_nowait((event, data))
+
+
+@contextmanager
+def capture(queue: "asyncio.Queue[Optional[Event]]") -> Iterator[None]:
+    """Route events emitted in this context (and tasks it spawns) into queue."""
+    token = _sink.set(queue)
+    try:
+        yield
+    finally:
+        _sink.reset(token)
+
+
+@asynccontextmanager
+async def stage(name: str) -> AsyncIterator[None]:
+    """Emit stage_started / stage_finished around a pipeline stage."""
+    if not is_streaming():
+        yield
+        return
+
+    emit("stage_started", stage=name)
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        emit(
+            "stage_finished",
+            stage=name,
+            ok=ok,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
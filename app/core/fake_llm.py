@@ -0,0 +1,322 @@
+"""
+Fake LLM Backend
+----------------
+A deterministic stand-in for Gemini used for offline development,
+benchmarks and load tests:
+
+    LLM_BACKEND=fake FAKE_LLM_LATENCY=lognormal:400:0.5 uvicorn app.main:app
+
+Every stage gets a JSON response that validates against the schema its
+agent expects (RouterDecision, LoanExtractedData, LoanRiskData,
+LoanSummaryResponse, PolicyEntry, PolicyQAResponse, educator / pattern dicts).
+Output depends only on the input, so identical requests get identical answers.
+
+Latency is simulated with asyncio.sleep() and drawn from a LatencyModel:
+    fixed:<ms> | uniform:<min_ms>:<max_ms> | lognormal:<median_ms>:<sigma>
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from app.core.llm_backend import LLMBackend, LLMResponse
+
+
+class LatencyModel:
+    def __init__(self, kind: str = "fixed", a: float = 0.0, b: float = 0.0):
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind!r}")
+        self.kind = kind
+        self.a = a
+        self.b = b
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """Parse 'fixed:50', 'uniform:20:80' or 'lognormal:300:0.5' (milliseconds)."""
+        parts = spec.split(":")
+        kind = parts[0] or "fixed"
+        args = [float(x) for x in parts[1:]]
+        while len(args) < 2:
+            args.append(0.0)
+        return cls(kind, args[0], args[1])
+
+    def sample_seconds(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            ms = self.a
+        elif self.kind == "uniform":
+            ms = rng.uniform(self.a, self.b)
+        else:
+            ms = rng.lognormvariate(0.0, self.b) * self.a
+        return max(0.0, ms) / 1000.0
+
+
+# System-instruction markers used when a call is not tagged with a stage.
+_PROMPT_MARKERS = {
+    "MASTER ROUTER AGENT": "master.router",
+    "CLAUSE EXTRACTION AGENT": "loan.clause_extractor",
+    "RISK SCORING AGENT": "loan.risk_scorer",
+    "NARRATOR AGENT": "loan.narrator",
+    "POLICY SUMMARIZER AGENT": "policy.summarizer",
+    "POLICY QA AGENT": "policy.qa",
+    "financial safety educator": "scam.educator",
+    "scam pattern extractor": "scam.pattern_extractor",
+}
+
+
+def detect_stage(system_instruction: str) -> Optional[str]:
+    for marker, stage in _PROMPT_MARKERS.items():
+        if marker in system_instruction:
+            return stage
+    return None
+
+
+def _find(pattern: str, text: str) -> Optional[str]:
+    match = re.search(pattern, text, flags=re.IGNORECASE)
+    return match.group(1).strip() if match else None
+
+
+def _router(user: Dict[str, Any]) -> Dict[str, Any]:
+    text = (user.get("text") or "").lower()
+    metadata = user.get("metadata") or {}
+    if any(w in text for w in ("upi", "refund", "scam", "link", "otp", "threat", "kyc")):
+        return {"route": "SCAM_CHECK", "reason": "Mentions payment/phishing keywords."}
+    if metadata.get("file_id") or any(w in text for w in ("loan", "agreement", "insurance")):
+        return {"route": "LOAN_DOC", "reason": "Refers to a loan or insurance document."}
+    if any(w in text for w in ("rbi", "sebi", "rule", "allowed", "regulation")):
+        return {"route": "POLICY_QA", "reason": "Asks about regulations."}
+    return {"route": "SCAM_CHECK", "reason": "Unsure; defaulting to scam check."}
+
+
+def _clause_extractor(user: Dict[str, Any]) -> Dict[str, Any]:
+    raw = user.get("raw_text") or ""
+    tenure = _find(r"tenure\D{0,20}(\d+)\s*months", raw)
+    clauses = []
+    for line in raw.splitlines():
+        line = line.strip("- ").strip()
+        if line and any(w in line.lower() for w in ("penalty", "fee", "recovery", "charge")):
+            clauses.append(
+                {
+                    "title": line[:40],
+                    "summary": line,
+                    "risk_level": "high" if "penalty" in line.lower() else "medium",
+                    "raw_text_snippet": line[:120],
+                }
+            )
+    return {
+        "product_type": "personal_loan" if "loan" in raw.lower() else "other",
+        "principal_amount": _find(r"principal:\s*([^\n]+)", raw),
+        "interest_rate": _find(r"interest rate:\s*([^\n]+)", raw),
+        "tenure_months": int(tenure) if tenure else None,
+        "processing_fee": _find(r"processing fee:\s*([^\n]+)", raw),
+        "prepayment_charges": None,
+        "late_payment_penalty": _find(r"(?:late fee|penalty):\s*([^\n]+)", raw),
+        "other_charges": [],
+        "important_clauses": clauses[:5],
+    }
+
+
+def _risk_scorer(user: Dict[str, Any]) -> Dict[str, Any]:
+    clauses = (user.get("extracted") or {}).get("important_clauses") or []
+    flagged = [c for c in clauses if c.get("risk_level") == "high"]
+    score = min(1.0, 0.3 + 0.2 * len(flagged))
+    level = "high" if score >= 0.7 else "medium" if score >= 0.4 else "low"
+    return {
+        "risk_score": round(score, 2),
+        "overall_risk_level": level,
+        "flagged_clauses": flagged,
+        "explanation": f"{len(flagged)} high-risk clause(s) found.",
+    }
+
+
+def _narrator(user: Dict[str, Any]) -> Dict[str, Any]:
+    extracted = user.get("extracted") or {}
+    risk = user.get("risk") or {}
+    numbers = [
+        f"{label}: {extracted[field]}"
+        for field, label in (
+            ("principal_amount", "Principal"),
+            ("interest_rate", "Interest rate"),
+            ("tenure_months", "Tenure (months)"),
+            ("processing_fee", "Processing fee"),
+        )
+        if extracted.get(field)
+    ]
+    return {
+        "language": user.get("language", "en"),
+        "extracted": extracted,
+        "risk": risk,
+        "plain_summary": (
+            f"This looks like a {risk.get('overall_risk_level', 'medium')} risk "
+            "product. Read the flagged clauses carefully before signing."
+        ),
+        "key_numbers": numbers,
+        "risk_explanation": [c.get("summary", "") for c in risk.get("flagged_clauses", [])],
+        "suggested_questions_for_bank": [
+            "What is the total cost including all fees?",
+            "Are there any prepayment or foreclosure charges?",
+        ],
+    }
+
+
+def _policy_summarizer(user: Dict[str, Any]) -> Dict[str, Any]:
+    raw = user.get("raw_text") or ""
+    return {
+        "id": user.get("id", "policy"),
+        "title": user.get("title") or raw[:60] or "Policy",
+        "category": "general",
+        "target_user": "general_public",
+        "summary_bullets": [raw[:200]] if raw else [],
+        "when_it_applies": None,
+        "actions_if_affected": ["Contact your bank through official channels."],
+    }
+
+
+def _policy_qa(user: Dict[str, Any]) -> Dict[str, Any]:
+    policies = user.get("policies") or []
+    bullets = [b for p in policies for b in p.get("summary_bullets", [])]
+    return {
+        "language": user.get("language", "en"),
+        "answer": " ".join(bullets[:2]) or "This is not covered by the rules I know about.",
+        "steps": ["Verify with your bank or the official RBI website."],
+        "disclaimers": ["This is not legal advice.", "Rules can change; check official sources."],
+        "source_ids": [p.get("id") for p in policies if p.get("id")],
+    }
+
+
+def _educator(user: Dict[str, Any]) -> Dict[str, Any]:
+    text = user.get("text") or ""
+    _, _, data = text.partition("DATA:\n")
+    try:
+        result = json.loads(data) if data else {}
+    except json.JSONDecodeError:
+        result = {}
+    if result.get("is_scam"):
+        warning = f"This message looks like a scam ({result.get('classification', 'unknown')})."
+    else:
+        warning = "No known scam signs, but stay careful."
+    return {
+        "short_warning": warning,
+        "detailed_explanation": [
+            "Scammers create urgency so you act without thinking.",
+            "Banks never ask for your OTP, PIN or password.",
+        ],
+        "what_to_do_now": "Do not reply or click any links. Report it to your bank and 1930.",
+    }
+
+
+def _pattern_extractor(user: Dict[str, Any]) -> Dict[str, Any]:
+    article = user.get("article") or ""
+    words = re.findall(r"[A-Za-z]+", article)
+    return {
+        "scam_name": " ".join(words[:4]).title() or "Unknown Scam",
+        "channel": "SMS",
+        "modus_operandi": article[:200],
+        "key_phrases": [w.lower() for w in words[:3]],
+        "red_flags": ["Urgent request for money or credentials."],
+        "recommended_user_action": "Do not share OTP/PIN; report to 1930.",
+        "example_message": article[:120],
+    }
+
+
+STAGE_RESPONDERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "master.router": _router,
+    "loan.clause_extractor": _clause_extractor,
+    "loan.risk_scorer": _risk_scorer,
+    "loan.narrator": _narrator,
+    "policy.summarizer": _policy_summarizer,
+    "policy.qa": _policy_qa,
+    "scam.educator": _educator,
+    "scam.educator.prefill": _educator,
+    "scam.pattern_extractor": _pattern_extractor,
+}
+
+
+class FakeBackend(LLMBackend):
+    name = "fake"
+
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        stage_latency: Optional[Dict[str, LatencyModel]] = None,
+        seed: int = 0,
+    ):
+        self.latency = latency or LatencyModel()
+        self.stage_latency = stage_latency or {}
+        self._rng = random.Random(seed)
+        self.calls: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "FakeBackend":
+        spec = os.getenv("FAKE_LLM_LATENCY", "fixed:0")
+        return cls(latency=LatencyModel.parse(spec), seed=int(os.getenv("FAKE_LLM_SEED", "0")))
+
+    async def generate(
+        self,
+        *,
+        model: str,
+        system_instruction: str,
+        user_message: str,
+        temperature: float,
+        stage: Optional[str] = None,
+    ) -> LLMResponse:
+        stage = stage or detect_stage(system_instruction) or "unknown"
+        delay = self._delay(stage)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._respond(stage, system_instruction, user_message)
+
+    async def stream(
+        self,
+        *,
+        model: str,
+        system_instruction: str,
+        user_message: str,
+        temperature: float,
+        stage: Optional[str] = None,
+        chunks: int = 8,
+    ) -> AsyncIterator[str]:
+        """Spread the sampled latency over `chunks` evenly sized deltas."""
+        stage = stage or detect_stage(system_instruction) or "unknown"
+        delay = self._delay(stage) / chunks
+        text = self._respond(stage, system_instruction, user_message).text
+        size = max(1, -(-len(text) // chunks))
+        for start in range(0, len(text), size):
+            if delay:
+                await asyncio.sleep(delay)
+            yield text[start : start + size]
+
+    def _delay(self, stage: str) -> float:
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+        return self.stage_latency.get(stage, self.latency).sample_seconds(self._rng)
+
+    def _respond(self, stage: str, system_instruction: str, user_message: str) -> LLMResponse:
+        try:
+            user = json.loads(user_message)
+        except json.JSONDecodeError:
+            user = {}
+        if not isinstance(user, dict):
+            user = {}
+
+        responder = STAGE_RESPONDERS.get(stage)
+        if responder is None:
+            body: Dict[str, Any] = {}
+        elif "BATCH MODE" in system_instruction and isinstance(user.get("items"), list):
+            # Array-in / array-out contract from app.core.llm_batch
+            body = {
+                "results": [
+                    {"index": it.get("index"), "output": responder(it.get("input") or {})}
+                    for it in user["items"]
+                    if isinstance(it, dict)
+                ]
+            }
+        else:
+            body = responder(user)
+        text = json.dumps(body, ensure_ascii=False)
+        return LLMResponse(
+            text=text,
+            prompt_tokens=(len(system_instruction) + len(user_message)) // 4,
+            output_tokens=len(text) // 4,
+        )
@@ -1,67 +1,268 @@
 """
 Gemini 3 API Wrapper
 --------------------
-Provides: run_gemini(payload: dict) → dict
+Provides:
+- run_gemini(payload: dict, stage: str | None) → dict
+- stream_gemini(payload, stage)          → async iterator of text deltas
+- run_gemini_streamed(payload, stage)    → dict, emitting "token" events
+                                           while a /guardian/stream request
+                                           is listening (see app.core.events)
+
+Successful responses are served from app.core.llm_cache when an identical
+request was answered before (see STAGE_TTL_SECONDS for per-stage TTLs).
+run_gemini() also shares one call among concurrent identical requests
+(app.core.singleflight); streams do not, see stream_gemini().
+Registered prompts are keyed by their version (app.core.prompt_registry).
+
+Backend calls go through app.core.circuit_breaker: while the circuit is open
+they fail fast with an error dict instead of waiting on a degraded Gemini.
+
+The completion itself comes from the active backend in app.core.llm_backend
+(Gemini by default, or the local fake with LLM_BACKEND=fake). The Gemini
+client is only created on the first real call.
 """
 
-import os
+import asyncio
+import copy
 import json
 import logging
-from google import genai
-from google.genai import types
-from dotenv import load_dotenv
-
-load_dotenv()
+import time
+from typing import AsyncIterator, Optional
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise RuntimeError("GEMINI_API_KEY not found in environment.")
-
-# Initialize Client (The 'aio' property will be used for async calls)
-client = genai.Client(api_key=GEMINI_API_KEY)
+from app.core import events, metrics, prompt_budget
+from app.core.circuit_breaker import CircuitOpenError, llm_breaker
+from app.core.llm_cache import cache_key, response_cache, ttl_for_stage
+from app.core.singleflight import llm_flights
+from app.core.llm_scheduler import llm_scheduler, priority_for_stage
+from app.core.llm_backend import LLMBackend, get_backend
+from app.core.llm_hedge import llm_hedger
+from app.core.prompt_registry import prompts
 
 # Gemini 3 Model Identifier
 # (Ensure this matches the exact string in Google AI Studio,
 # e.g., 'gemini-3-pro-preview' or 'gemini-experimental')
 MODEL = "gemini-2.5-flash"
+TEMPERATURE = 0.3
 
-async def run_gemini(payload: dict) -> dict:
+async def run_gemini(payload: dict, stage: Optional[str] = None) -> dict:
     """
     Wrapper around Gemini 3 generate_content (Async).
+
+    `stage` tags the calling agent (e.g. "master.router", "loan.narrator")
+    and selects its cache TTL; a TTL of 0 bypasses the cache.
+
+    Concurrent identical requests share a single Gemini call (see
+    app.core.singleflight); each caller gets its own copy of the result.
+
+    Latency, cache status and outcome are recorded per stage in app.core.metrics.
+
+    The user payload is compacted and fitted into the stage's token budget
+    (app.core.prompt_budget) before hashing and sending.
     """
 
+    started = time.perf_counter()
     system_instruction = payload.get("system_instruction", "")
-    user_obj = payload.get("user", {})
+    user_obj, truncated, original_tokens = prompt_budget.fit(payload.get("user", {}), stage)
+
+    backend = get_backend()
+    ttl = ttl_for_stage(stage)
+    # Backend name is part of the key so fake responses never leak into real traffic.
+    key = cache_key(
+        f"{backend.name}:{MODEL}", TEMPERATURE, system_instruction, user_obj,
+        prompt_version=prompts.version_of(system_instruction),
+    )
+    if ttl > 0:
+        cached = await response_cache.aget(key)
+        if cached is not None:
+            metrics.observe_llm_call(stage, time.perf_counter() - started, "hit", ok=True)
+            return cached
+
+    result = await llm_flights.do(
+        key,
+        lambda: _generate(
+            backend, system_instruction, user_obj, key, ttl, stage,
+            original_tokens=original_tokens, truncated=truncated,
+        ),
+    )
+    metrics.observe_llm_call(
+        stage,
+        time.perf_counter() - started,
+        "miss" if ttl > 0 else "bypass",
+        ok=not (isinstance(result, dict) and "error" in result),
+    )
+    return copy.deepcopy(result)
+
 
-    # Convert user object to string
-    user_message = json.dumps(user_obj, indent=2)
+async def _generate(
+    backend: LLMBackend,
+    system_instruction: str,
+    user_obj,
+    key: str,
+    ttl: float,
+    stage: Optional[str],
+    original_tokens: int = 0,
+    truncated: bool = False,
+) -> dict:
+    """
+    The actual backend round-trip; successful JSON objects are written to the cache.
 
-    config = types.GenerateContentConfig(
-        system_instruction=system_instruction,
-        temperature=0.3,
-        # NATIVE JSON MODE: This forces the model to output strict JSON
-        response_mime_type="application/json"
+    The call is admitted by app.core.llm_scheduler (rate limit, adaptive
+    concurrency, priority by stage) and retried there on 429/5xx, all within
+    the stage deadline of app.core.llm_hedge, which may also fire a hedged
+    duplicate when the call runs past the stage's p95 latency.
+    """
+
+    # Convert user object to compact JSON
+    user_message = prompt_budget.encode(user_obj)
+    prompt_budget.record_savings(
+        stage, original_tokens, user_message, truncated
     )
 
+    text_output = None
+
+    if not llm_breaker.allow():
+        metrics.observe_llm_error(stage, CircuitOpenError())
+        return {"error": "LLM unavailable (circuit open)"}
+
     try:
-        # CRITICAL CHANGE: Use 'client.aio' and 'await'
-        response = await client.aio.models.generate_content(
-            model=MODEL,
-            contents=user_message, # New SDK accepts string directly
-            config=config
+        call_started = time.monotonic()
+        response = await llm_hedger.call(
+            lambda: llm_scheduler.run(
+                lambda: backend.generate(
+                    model=MODEL,
+                    system_instruction=system_instruction,
+                    user_message=user_message,
+                    temperature=TEMPERATURE,
+                    stage=stage,
+                ),
+                priority=priority_for_stage(stage),
+            ),
+            stage=stage,
         )
+        llm_breaker.record_success(time.monotonic() - call_started)
+        metrics.observe_llm_usage(stage, response.prompt_tokens, response.output_tokens)
 
-        # The new SDK creates a .text property on the response
         text_output = response.text
 
         # Parse the JSON
         # (Since we used response_mime_type, this is very safe)
-        return json.loads(text_output)
+        result = json.loads(text_output)
+        if isinstance(result, dict):
+            response_cache.set(key, result, ttl)
+        return result
 
-    except json.JSONDecodeError:
+    except json.JSONDecodeError as e:
         # Fallback if model returns empty or malformed string
+        metrics.observe_llm_error(stage, e)
         return {"error": "Malformed JSON", "raw": text_output}
 
+    except asyncio.CancelledError:
+        llm_breaker.release()
+        raise
+
     except Exception as e:
         logging.error(f"Gemini 3 API Error: {e}")
-        return {"error": str(e)}
\ No newline at end of file
+        llm_breaker.record_failure()
+        metrics.observe_llm_error(stage, e)
+        return {"error": str(e)}
+
+
+async def stream_gemini(payload: dict, stage: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Streaming variant of run_gemini built on generate_content_stream.
+
+    Yields raw text deltas of the JSON response. A cache hit is yielded as a
+    single chunk; a completed stream that parses as a JSON object is cached.
+    Raises CircuitOpenError while the LLM circuit is open.
+
+    Unlike run_gemini(), streams bypass single-flight coalescing (each
+    caller needs its own deltas as they arrive) and are not retried: N
+    identical concurrent streams cost N backend calls until the first one
+    completes and is cached.
+    """
+
+    system_instruction = payload.get("system_instruction", "")
+    user_obj = prompt_budget.fit(payload.get("user", {}), stage).obj
+
+    backend = get_backend()
+    ttl = ttl_for_stage(stage)
+    key = cache_key(
+        f"{backend.name}:{MODEL}", TEMPERATURE, system_instruction, user_obj,
+        prompt_version=prompts.version_of(system_instruction),
+    )
+    if ttl > 0:
+        cached = await response_cache.aget(key)
+        if cached is not None:
+            yield json.dumps(cached, ensure_ascii=False)
+            return
+
+    if not llm_breaker.allow():
+        raise CircuitOpenError("LLM unavailable (circuit open)")
+
+    parts = []
+    call_started = time.monotonic()
+    try:
+        async with llm_scheduler.slot(priority_for_stage(stage)):
+            async for delta in backend.stream(
+                model=MODEL,
+                system_instruction=system_instruction,
+                user_message=prompt_budget.encode(user_obj),
+                temperature=TEMPERATURE,
+                stage=stage,
+            ):
+                parts.append(delta)
+                yield delta
+    except (asyncio.CancelledError, GeneratorExit):
+        llm_breaker.release()
+        raise
+    except Exception:
+        llm_breaker.record_failure()
+        raise
+    llm_breaker.record_success(time.monotonic() - call_started)
+
+    try:
+        result = json.loads("".join(parts))
+    except json.JSONDecodeError:
+        return
+    if isinstance(result, dict):
+        response_cache.set(key, result, ttl)
+
+
+async def run_gemini_streamed(payload: dict, stage: Optional[str] = None) -> dict:
+    """
+    Same contract as run_gemini(). When a streaming request is listening,
+    the response is streamed and each delta is emitted as a "token" event
+    for `stage`; otherwise this is just run_gemini().
+
+    The streamed path goes through stream_gemini(), so it is not coalesced
+    with identical in-flight requests.
+    """
+
+    if not events.is_streaming():
+        return await run_gemini(payload, stage=stage)
+
+    started = time.perf_counter()
+    parts = []
+    try:
+        async for delta in stream_gemini(payload, stage=stage):
+            parts.append(delta)
+            events.emit("token", stage=stage, text=delta)
+    except Exception as e:
+        logging.error(f"Gemini 3 API Error: {e}")
+        metrics.observe_llm_error(stage, e)
+        metrics.observe_llm_call(stage, time.perf_counter() - started, "stream", ok=False)
+        return {"error": str(e)}
+
+    text_output = "".join(parts)
+    try:
+        result = json.loads(text_output)
+    except json.JSONDecodeError as e:
+        metrics.observe_llm_error(stage, e)
+        result = {"error": "Malformed JSON", "raw": text_output}
+    metrics.observe_llm_call(
+        stage,
+        time.perf_counter() - started,
+        "stream",
+        ok=not (isinstance(result, dict) and "error" in result),
+    )
+    return result
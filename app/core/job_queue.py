@@ -0,0 +1,383 @@
+"""
+Job Queue
+---------
+Persistent job queue plus an in-process asyncio worker pool, used by
+/guardian/jobs so long loan analyses don't hold an HTTP connection open.
+
+- JobStore is the storage interface; SqliteJobStore (the default) keeps
+  jobs in a local SQLite file so queued work survives restarts. Another
+  store (Redis, Postgres, ...) only has to implement the same methods.
+- JobQueue runs at most `workers` jobs at a time. Workers take the highest
+  priority, oldest queued job; submit() wakes an idle worker immediately.
+- Store calls are blocking, so JobQueue runs them in a worker thread
+  (asyncio.to_thread) and never on the event loop; its submit / get /
+  cancel are coroutines. The number of queued jobs is counted once from
+  the store and then tracked in memory, so submit() doesn't count rows.
+- Finished jobs (and their results) expire `result_ttl` seconds after they
+  finish; expired rows are deleted every JOB_PURGE_INTERVAL_SECONDS.
+- cancel() drops a queued job, or cancels the running task of a job that
+  belongs to this process.
+- Jobs left "running" by a process that died are re-queued on start().
+
+One worker pool per store is assumed (the SQLite file is per host).
+
+Usage:
+    queue = JobQueue(handler)          # async handler(payload) -> result
+    await queue.start()
+    job = await queue.submit({"text": "..."}, priority=5)
+    (await queue.get(job.id)).status   → "queued" | "running" | "succeeded" | ...
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.schemas.jobs import JobInfo, JobStatusEnum
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "1000"))
+JOB_RESULT_TTL_SECONDS = float(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+JOB_PURGE_INTERVAL_SECONDS = float(os.getenv("JOB_PURGE_INTERVAL_SECONDS", "60"))
+
+# Set JOB_QUEUE_PATH="" to keep jobs in memory only.
+JOB_QUEUE_PATH = os.getenv(
+    "JOB_QUEUE_PATH",
+    str(Path(__file__).resolve().parents[2] / ".cache" / "jobs.sqlite3"),
+)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class QueueFullError(Exception):
+    """Raised by submit() when JOB_MAX_PENDING jobs are already queued."""
+
+
+class JobStore:
+    """
+    Interface every job store implements.
+
+    Jobs are identified by id; `payload` and `result` are JSON-serialisable.
+    """
+
+    def add(self, job_id: str, payload: Dict[str, Any], priority: int) -> JobInfo:
+        raise NotImplementedError
+
+    def claim(self) -> Optional[JobInfo]:
+        """Atomically move the next queued job to running and return it."""
+        raise NotImplementedError
+
+    def payload(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def finish(
+        self,
+        job_id: str,
+        status: JobStatusEnum,
+        result: Any = None,
+        error: Optional[str] = None,
+        ttl: float = JOB_RESULT_TTL_SECONDS,
+    ) -> Optional[JobInfo]:
+        """Finish a queued/running job; returns None if it was already finished."""
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        raise NotImplementedError
+
+    def requeue_running(self) -> int:
+        raise NotImplementedError
+
+    def purge_expired(self) -> int:
+        raise NotImplementedError
+
+    def counts(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+
+class SqliteJobStore(JobStore):
+    """Jobs table in a SQLite file (":memory:" for a throwaway store)."""
+
+    _COLUMNS = "id, status, priority, created_at, started_at, finished_at, expires_at, result, error"
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " priority INTEGER NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " finished_at REAL,"
+                " expires_at REAL,"
+                " result TEXT,"
+                " error TEXT)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_queue"
+                " ON jobs (status, priority DESC, created_at)"
+            )
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _info(row) -> JobInfo:
+        return JobInfo(
+            id=row[0],
+            status=row[1],
+            priority=row[2],
+            created_at=row[3],
+            started_at=row[4],
+            finished_at=row[5],
+            expires_at=row[6],
+            result=json.loads(row[7]) if row[7] is not None else None,
+            error=row[8],
+        )
+
+    def add(self, job_id: str, payload: Dict[str, Any], priority: int) -> JobInfo:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO jobs (id, status, priority, payload, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (job_id, JobStatusEnum.QUEUED.value, priority,
+                 json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+            conn.commit()
+        return self.get(job_id)
+
+    def claim(self) -> Optional[JobInfo]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                f"UPDATE jobs SET status = ?, started_at = ?"
+                f" WHERE id = (SELECT id FROM jobs WHERE status = ?"
+                f"   ORDER BY priority DESC, created_at ASC LIMIT 1)"
+                f" RETURNING {self._COLUMNS}",
+                (JobStatusEnum.RUNNING.value, time.time(), JobStatusEnum.QUEUED.value),
+            ).fetchone()
+            conn.commit()
+        return self._info(row) if row is not None else None
+
+    def payload(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT payload FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def finish(
+        self,
+        job_id: str,
+        status: JobStatusEnum,
+        result: Any = None,
+        error: Optional[str] = None,
+        ttl: float = JOB_RESULT_TTL_SECONDS,
+    ) -> Optional[JobInfo]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                f"UPDATE jobs SET status = ?, finished_at = ?, expires_at = ?, result = ?, error = ?"
+                f" WHERE id = ? AND status IN (?, ?)"
+                f" RETURNING {self._COLUMNS}",
+                (
+                    status.value, now, now + ttl,
+                    json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                    error, job_id,
+                    JobStatusEnum.QUEUED.value, JobStatusEnum.RUNNING.value,
+                ),
+            ).fetchone()
+            conn.commit()
+        return self._info(row) if row is not None else None
+
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?"
+                f" AND (expires_at IS NULL OR expires_at >= ?)",
+                (job_id, time.time()),
+            ).fetchone()
+        return self._info(row) if row is not None else None
+
+    def requeue_running(self) -> int:
+        with self._lock:
+            conn = self._connect()
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?",
+                (JobStatusEnum.QUEUED.value, JobStatusEnum.RUNNING.value),
+            )
+            conn.commit()
+        return cur.rowcount
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            conn = self._connect()
+            cur = conn.execute("DELETE FROM jobs WHERE expires_at < ?", (time.time(),))
+            conn.commit()
+        return cur.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        found = dict(rows)
+        return {s.value: found.get(s.value, 0) for s in JobStatusEnum}
+
+
+class JobQueue:
+    def __init__(
+        self,
+        handler: JobHandler,
+        store: Optional[JobStore] = None,
+        workers: int = JOB_WORKERS,
+        max_pending: int = JOB_MAX_PENDING,
+        result_ttl: float = JOB_RESULT_TTL_SECONDS,
+        poll_interval: float = JOB_POLL_INTERVAL_SECONDS,
+        purge_interval: float = JOB_PURGE_INTERVAL_SECONDS,
+    ):
+        self.handler = handler
+        self.store = store if store is not None else SqliteJobStore()
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.purge_interval = purge_interval
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._queued: Optional[int] = None  # None: count from the store on next use
+        self._running: Dict[str, "asyncio.Task[Any]"] = {}
+        self._cancelled: Set[str] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        """Start the worker pool on the running loop (idempotent)."""
+        if self._tasks:
+            return
+        requeued = await asyncio.to_thread(self.store.requeue_running)
+        if requeued:
+            logging.warning(f"Re-queued {requeued} job(s) interrupted by a restart")
+        self._queued = None
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._purger()))
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs they were running go back to the queue."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._wakeup = None
+        await asyncio.to_thread(self.store.requeue_running)
+        self._queued = None
+
+    async def _queued_count(self) -> int:
+        if self._queued is None:
+            counts = await asyncio.to_thread(self.store.counts)
+            if self._queued is None:
+                self._queued = counts[JobStatusEnum.QUEUED.value]
+        return self._queued
+
+    def _count_queued(self, delta: int) -> None:
+        if self._queued is not None:
+            self._queued = max(0, self._queued + delta)
+
+    async def submit(self, payload: Dict[str, Any], priority: int = 0) -> JobInfo:
+        if await self._queued_count() >= self.max_pending:
+            raise QueueFullError(f"{self.max_pending} jobs already queued")
+        self._count_queued(1)
+        try:
+            job = await asyncio.to_thread(self.store.add, uuid.uuid4().hex, payload, priority)
+        except BaseException:
+            self._count_queued(-1)
+            raise
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[JobInfo]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def cancel(self, job_id: str) -> Optional[JobInfo]:
+        """Cancel a queued or running job; finished jobs are returned unchanged."""
+        job = await asyncio.to_thread(
+            self.store.finish, job_id, JobStatusEnum.CANCELLED, ttl=self.result_ttl
+        )
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancelled.add(job_id)
+            task.cancel()
+        elif job is not None and job.started_at is None:
+            self._count_queued(-1)  # it was still queued
+        return job or await self.get(job_id)
+
+    async def _purger(self) -> None:
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                await asyncio.to_thread(self.store.purge_expired)
+            except Exception:
+                logging.exception("Purging expired jobs failed")
+
+    async def _worker(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            job = await asyncio.to_thread(self.store.claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self._count_queued(-1)
+            # Another job may be waiting; let the next idle worker look too.
+            self._wakeup.set()
+            await self._run(job)
+
+    async def _run(self, job: JobInfo) -> None:
+        payload = await asyncio.to_thread(self.store.payload, job.id)
+        task = asyncio.ensure_future(self.handler(payload or {}))
+        self._running[job.id] = task
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if job.id not in self._cancelled:
+                raise  # the worker itself is being stopped
+            # cancel() already recorded the job as cancelled
+        except Exception as exc:
+            logging.exception(f"Job {job.id} failed")
+            await asyncio.to_thread(
+                self.store.finish, job.id, JobStatusEnum.FAILED, error=str(exc), ttl=self.result_ttl
+            )
+        else:
+            await asyncio.to_thread(
+                self.store.finish, job.id, JobStatusEnum.SUCCEEDED, result=result, ttl=self.result_ttl
+            )
+        finally:
+            self._running.pop(job.id, None)
+            self._cancelled.discard(job.id)
+
+    def stats(self) -> Dict[str, int]:
+        stats = self.store.counts()
+        stats["workers"] = self.workers if self._tasks else 0
+        stats["busy_workers"] = len(self._running)
+        return stats
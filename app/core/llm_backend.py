@@ -0,0 +1,177 @@
+"""
+LLM Backends
+------------
+The transport used by run_gemini() to actually produce a completion.
+
+- GeminiBackend: google-genai client, created lazily on first call so the app
+  can be imported without GEMINI_API_KEY.
+- FakeBackend (app.core.fake_llm): deterministic, schema-valid local responses
+  with configurable latency, for offline development and load testing.
+
+Select with LLM_BACKEND=gemini|fake, or programmatically via set_backend().
+"""
+
+import os
+from typing import AsyncIterator, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class LLMResponse:
+    """Raw text returned by a backend plus token usage when available."""
+
+    __slots__ = ("text", "prompt_tokens", "output_tokens")
+
+    def __init__(
+        self,
+        text: str,
+        prompt_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+    ):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+
+
+class LLMBackend:
+    """
+    Interface every backend implements.
+
+    `user_message` is the already-serialized JSON user payload; `stage` is the
+    run_gemini() stage tag and may be None.
+    """
+
+    name = "base"
+
+    async def generate(
+        self,
+        *,
+        model: str,
+        system_instruction: str,
+        user_message: str,
+        temperature: float,
+        stage: Optional[str] = None,
+    ) -> LLMResponse:
+        raise NotImplementedError
+
+    async def stream(
+        self,
+        *,
+        model: str,
+        system_instruction: str,
+        user_message: str,
+        temperature: float,
+        stage: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yield the completion as text deltas. Backends without native
+        streaming yield the whole response as a single chunk.
+        """
+        response = await self.generate(
+            model=model,
+            system_instruction=system_instruction,
+            user_message=user_message,
+            temperature=temperature,
+            stage=stage,
+        )
+        yield response.text
+
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = None):
+        self._api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from google import genai
+
+            api_key = self._api_key or os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise RuntimeError("GEMINI_API_KEY not found in environment.")
+            # Initialize Client (The 'aio' property will be used for async calls)
+            self._client = genai.Client(api_key=api_key)
+        return self._client
+
+    @staticmethod
+    def _config(system_instruction: str, temperature: float):
+        from google.genai import types
+
+        return types.GenerateContentConfig(
+            system_instruction=system_instruction,
+            temperature=temperature,
+            # NATIVE JSON MODE: This forces the model to output strict JSON
+            response_mime_type="application/json",
+        )
+
+    async def generate(
+        self,
+        *,
+        model: str,
+        system_instruction: str,
+        user_message: str,
+        temperature: float,
+        stage: Optional[str] = None,
+    ) -> LLMResponse:
+        response = await self.client.aio.models.generate_content(
+            model=model,
+            contents=user_message,  # New SDK accepts string directly
+            config=self._config(system_instruction, temperature),
+        )
+
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResponse(
+            text=response.text,
+            prompt_tokens=getattr(usage, "prompt_token_count", None),
+            output_tokens=getattr(usage, "candidates_token_count", None),
+        )
+
+    async def stream(
+        self,
+        *,
+        model: str,
+        system_instruction: str,
+        user_message: str,
+        temperature: float,
+        stage: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        chunks = await self.client.aio.models.generate_content_stream(
+            model=model,
+            contents=user_message,
+            config=self._config(system_instruction, temperature),
+        )
+        async for chunk in chunks:
+            if chunk.text:
+                yield chunk.text
+
+
+_backend: Optional[LLMBackend] = None
+
+
+def _backend_from_env() -> LLMBackend:
+    kind = os.getenv("LLM_BACKEND", "gemini").lower()
+    if kind == "fake":
+        from app.core.fake_llm import FakeBackend
+
+        return FakeBackend.from_env()
+    if kind == "gemini":
+        return GeminiBackend()
+    raise RuntimeError(f"Unknown LLM_BACKEND: {kind!r} (expected 'gemini' or 'fake')")
+
+
+def get_backend() -> LLMBackend:
+    global _backend
+    if _backend is None:
+        _backend = _backend_from_env()
+    return _backend
+
+
+def set_backend(backend: Optional[LLMBackend]) -> None:
+    """Install a backend; None re-selects from LLM_BACKEND on next use."""
+    global _backend
+    _backend = backend
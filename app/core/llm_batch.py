@@ -0,0 +1,202 @@
+"""
+LLM Micro-batching
+------------------
+Packs many small, independent prompts that share a system instruction into a
+single run_gemini() call using an array-in / array-out JSON contract:
+
+    user:     {"items":   [{"index": 0, "input": {...}}, ...]}
+    response: {"results": [{"index": 0, "output": {...}}, ...]}
+
+A MicroBatcher collects submitted items until it has `max_batch_size` of them
+or `max_wait` seconds have passed, sends one request, and resolves each
+caller's future with its own output.
+
+Errors are isolated per item: an item that is missing or malformed in an
+otherwise successful batch response is retried on its own with a plain
+run_gemini() call, so one bad item never fails the rest. When the batch call
+itself fails (circuit open, 429, timeout, ...) its error dict goes to every
+item instead: retrying each one alone would multiply the load on a backend
+that is already failing.
+
+In-flight batch calls are tasks held by their batcher (the event loop only
+keeps weak references), and close_batchers() at app shutdown sends what is
+still queued and waits for them.
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.gemini import run_gemini
+
+MAX_BATCH_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "8"))
+MAX_WAIT_SECONDS = float(os.getenv("LLM_BATCH_MAX_WAIT_SECONDS", "0.02"))
+
+BATCH_INSTRUCTIONS = """
+
+BATCH MODE:
+The user message is {"items": [{"index": <int>, "input": <object>}, ...]}.
+Apply the instructions above to EACH input independently.
+Return ONLY JSON: {"results": [{"index": <int>, "output": <object>}, ...]}
+with exactly one result per input index. Each output must be the JSON object
+you would have returned for that input on its own."""
+
+
+def _split_results(response: Dict[str, Any], count: int) -> List[Optional[Dict[str, Any]]]:
+    """Map a batch response back to input positions; None marks a bad/missing item."""
+    outputs: List[Optional[Dict[str, Any]]] = [None] * count
+    results = response.get("results") if isinstance(response, dict) else None
+    if not isinstance(results, list):
+        return outputs
+    for entry in results:
+        if not isinstance(entry, dict):
+            continue
+        index = entry.get("index")
+        output = entry.get("output")
+        if isinstance(index, int) and 0 <= index < count and isinstance(output, dict):
+            outputs[index] = output
+    return outputs
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        system_instruction: str,
+        stage: Optional[str] = None,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait: float = MAX_WAIT_SECONDS,
+    ):
+        self.system_instruction = system_instruction
+        self.stage = stage
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+
+        self._pending: List[Tuple[Dict[str, Any], "asyncio.Future[Dict[str, Any]]"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+        self.batches = 0
+        self.items = 0
+        self.fallbacks = 0
+
+    async def submit(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue one item; resolves to its output dict (or an {"error": ...} dict,
+        same as run_gemini).
+        """
+        loop = asyncio.get_running_loop()
+        fut: "asyncio.Future[Dict[str, Any]]" = loop.create_future()
+        self._pending.append((item, fut))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size :]
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        """Send queued items now and wait for every batch in flight."""
+        self._flush()
+        tasks = [task for task in self._tasks if not task.done()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, batch: List[Tuple[Dict[str, Any], "asyncio.Future[Dict[str, Any]]"]]) -> None:
+        live = [(item, fut) for item, fut in batch if not fut.done()]
+        if not live:
+            return
+        try:
+            outputs = await self._call([item for item, _ in live])
+        except Exception as exc:
+            for _, fut in live:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for (_, fut), output in zip(live, outputs):
+            if not fut.done():
+                fut.set_result(output)
+
+    async def _call(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.batches += 1
+        self.items += len(items)
+
+        if len(items) == 1:
+            return [await self._single(items[0])]
+
+        response = await run_gemini(
+            {
+                "system_instruction": self.system_instruction + BATCH_INSTRUCTIONS,
+                "user": {"items": [{"index": i, "input": it} for i, it in enumerate(items)]},
+            },
+            stage=self.stage,
+        )
+        if isinstance(response, dict) and "error" in response:
+            return [dict(response) for _ in items]
+        outputs = _split_results(response, len(items))
+
+        failed = [i for i, out in enumerate(outputs) if out is None]
+        if failed:
+            self.fallbacks += len(failed)
+            retried = await asyncio.gather(*(self._single(items[i]) for i in failed))
+            for i, out in zip(failed, retried):
+                outputs[i] = out
+        return outputs  # type: ignore[return-value]
+
+    async def _single(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return await run_gemini(
+            {"system_instruction": self.system_instruction, "user": item},
+            stage=self.stage,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "stage": self.stage,
+            "batches": self.batches,
+            "items": self.items,
+            "fallbacks": self.fallbacks,
+            "pending": len(self._pending),
+        }
+
+
+_batchers: Dict[Tuple[Optional[str], str], MicroBatcher] = {}
+
+
+def get_batcher(system_instruction: str, stage: Optional[str] = None) -> MicroBatcher:
+    """Shared batcher per (stage, system_instruction) so concurrent callers batch together."""
+    key = (stage, system_instruction)
+    batcher = _batchers.get(key)
+    if batcher is None:
+        batcher = MicroBatcher(system_instruction, stage=stage)
+        _batchers[key] = batcher
+    return batcher
+
+
+async def run_gemini_batch(
+    items: List[Dict[str, Any]],
+    system_instruction: str,
+    stage: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run the same system instruction over many user payloads; returns one
+    run_gemini-style dict per item, in input order.
+    """
+    batcher = get_batcher(system_instruction, stage=stage)
+    return list(await asyncio.gather(*(batcher.submit(item) for item in items)))
+
+
+async def close_batchers() -> None:
+    await asyncio.gather(*(b.close() for b in _batchers.values()))
+
+
+def batch_stats() -> List[Dict[str, Any]]:
+    return [b.stats() for b in _batchers.values()]
@@ -0,0 +1,375 @@
+"""
+LLM Response Cache
+------------------
+Two-tier, content-addressed cache used by run_gemini().
+
+- Tier 1: in-process LRU with TTL (dict lookups, microseconds)
+- Tier 2: on-disk SQLite store shared across restarts / workers; read in a
+  worker thread and written by a background writer, never on the event loop
+
+Entries are keyed on a canonical hash of
+(model, temperature, system_instruction, user payload), so any byte-identical
+request from any stage is served without a Gemini round-trip.
+
+Per-stage behaviour is controlled through STAGE_TTL_SECONDS:
+- a positive number → TTL in seconds for that stage
+- 0                 → caching disabled for that stage
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+MEMORY_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "2048"))
+DISK_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "50000"))
+
+# Set LLM_CACHE_PATH="" to keep the cache memory-only.
+DISK_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    str(Path(__file__).resolve().parents[2] / ".cache" / "llm_cache.sqlite3"),
+)
+
+STAGE_TTL_SECONDS: Dict[str, float] = {
+    "master.router": DEFAULT_TTL_SECONDS,
+    "loan.clause_extractor": DEFAULT_TTL_SECONDS,
+    "loan.risk_scorer": DEFAULT_TTL_SECONDS,
+    "loan.narrator": DEFAULT_TTL_SECONDS,
+    # Policy summaries only change when the source documents change.
+    "policy.summarizer": 7 * 86400,
+    "policy.qa": DEFAULT_TTL_SECONDS,
+    "scam.educator": DEFAULT_TTL_SECONDS,
+    "scam.educator.prefill": DEFAULT_TTL_SECONDS,
+    # Harvested articles are processed once; no point keeping them around.
+    "scam.pattern_extractor": 0,
+}
+
+
+def cache_key(
+    model: str,
+    temperature: float,
+    system_instruction: str,
+    user_obj: Any,
+    prompt_version: Optional[str] = None,
+) -> str:
+    """
+    Canonical sha256 over everything that influences the model output.
+    Key order and whitespace in the user payload do not affect the hash.
+
+    When the system instruction is a registered prompt, its prompt_version
+    (app.core.prompt_registry) stands in for the full text.
+    """
+    instruction = {"prompt_version": prompt_version} if prompt_version else system_instruction
+    canonical = json.dumps(
+        {
+            "model": model,
+            "temperature": temperature,
+            "system_instruction": instruction,
+            "user": user_obj,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def ttl_for_stage(stage: Optional[str]) -> float:
+    """TTL for a stage; unknown / untagged stages use the default TTL."""
+    if stage is None:
+        return DEFAULT_TTL_SECONDS
+    return STAGE_TTL_SECONDS.get(stage, DEFAULT_TTL_SECONDS)
+
+
+class MemoryLRU:
+    """
+    Size-bounded LRU with per-entry expiry.
+
+    Values are stored as JSON text so every hit hands out a fresh dict
+    that callers are free to mutate.
+    """
+
+    def __init__(self, max_entries: int = MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, expires_at: float) -> None:
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SqliteCache:
+    """
+    On-disk tier. Evicts least-recently-used rows once max_entries is exceeded.
+
+    Reads are plain SELECTs (ResponseCache.aget runs them off the event
+    loop). Writes and last-access updates are queued and applied in one
+    transaction by a background writer thread. The row count is tracked in
+    memory; once it passes max_entries, expired rows and then the oldest
+    ones are deleted down to max_entries - evict_batch in a single statement.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = DISK_MAX_ENTRIES,
+        evict_batch: Optional[int] = None,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.evict_batch = evict_batch if evict_batch is not None else max(1, max_entries // 10)
+        self.evictions = 0
+        self._lock = threading.Lock()  # guards the connection
+        self._conn: Optional[sqlite3.Connection] = None
+        self._count = 0
+        self._queue_lock = threading.Lock()
+        self._pending: Dict[str, Tuple[str, float]] = {}
+        self._touched: Dict[str, float] = {}
+        self._wake = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_last_access"
+                " ON llm_cache (last_access)"
+            )
+            (self._count,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Blocking lookup; queued writes are visible before they reach disk."""
+        now = time.time()
+        with self._queue_lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            row = pending
+        else:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+        if row is None or row[1] < now:
+            return None  # expired rows go with the next eviction
+        self._enqueue(touched=(key, now))
+        return row[0], row[1]
+
+    def set(self, key: str, value: str, expires_at: float) -> None:
+        """Queue a write; returns without touching the disk."""
+        self._enqueue(write=(key, value, expires_at))
+
+    def _enqueue(self, write=None, touched=None) -> None:
+        with self._queue_lock:
+            if write is not None:
+                key, value, expires_at = write
+                self._pending[key] = (value, expires_at)
+            if touched is not None:
+                self._touched[touched[0]] = touched[1]
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_loop, name="llm-cache-writer", daemon=True
+                )
+                self._writer.start()
+        self._wake.set()
+
+    def _write_loop(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as exc:
+                logging.warning(f"LLM cache write failed: {exc}")
+
+    def flush(self) -> None:
+        """Apply queued writes and access times in one transaction."""
+        with self._queue_lock:
+            pending, self._pending = self._pending, {}
+            touched, self._touched = self._touched, {}
+        if not pending and not touched:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            for key, (value, expires_at) in pending.items():
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO llm_cache (key, value, expires_at, last_access)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now),
+                )
+                if cur.rowcount == 1:
+                    self._count += 1
+                else:
+                    conn.execute(
+                        "UPDATE llm_cache SET value = ?, expires_at = ?, last_access = ?"
+                        " WHERE key = ?",
+                        (value, expires_at, now, key),
+                    )
+            conn.executemany(
+                "UPDATE llm_cache SET last_access = ? WHERE key = ?",
+                [(at, key) for key, at in touched.items() if key not in pending],
+            )
+            if self._count > self.max_entries:
+                self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        # Caller holds the lock.
+        self._count -= conn.execute(
+            "DELETE FROM llm_cache WHERE expires_at < ?", (now,)
+        ).rowcount
+        overflow = self._count - max(0, self.max_entries - self.evict_batch)
+        if self._count > self.max_entries and overflow > 0:
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            self._count -= overflow
+            self.evictions += overflow
+
+    def clear(self) -> None:
+        with self._queue_lock:
+            self._pending.clear()
+            self._touched.clear()
+        with self._lock:
+            self._connect().execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self._count = 0
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class ResponseCache:
+    """
+    Memory tier in front of an optional disk tier, with hit/miss counters.
+    """
+
+    def __init__(
+        self,
+        memory: Optional[MemoryLRU] = None,
+        disk: Optional[SqliteCache] = None,
+    ):
+        self.memory = memory if memory is not None else MemoryLRU()
+        self.disk = disk
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Blocking lookup; use aget() on the event loop."""
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return json.loads(value)
+        return self._from_disk(key, self._disk_get(key))
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """Memory hits return at once; the disk tier is read in a worker thread."""
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return json.loads(value)
+        found = await asyncio.to_thread(self._disk_get, key) if self.disk is not None else None
+        return self._from_disk(key, found)
+
+    def _disk_get(self, key: str) -> Optional[Tuple[str, float]]:
+        if self.disk is None:
+            return None
+        try:
+            return self.disk.get(key)
+        except sqlite3.Error:
+            return None
+
+    def _from_disk(self, key: str, found: Optional[Tuple[str, float]]) -> Optional[Dict[str, Any]]:
+        if found is None:
+            self.misses += 1
+            return None
+        value, expires_at = found
+        self.memory.set(key, value, expires_at)
+        self.disk_hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, response: Dict[str, Any], ttl: float) -> None:
+        if ttl <= 0:
+            return
+        value = json.dumps(response, ensure_ascii=False)
+        expires_at = time.time() + ttl
+        self.memory.set(key, value, expires_at)
+        if self.disk is not None:
+            self.disk.set(key, value, expires_at)  # queued; written off-loop
+        self.stores += 1
+
+    def flush(self) -> None:
+        """Write queued disk entries now (shutdown, tests)."""
+        if self.disk is not None:
+            self.disk.flush()
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "memory_entries": len(self.memory),
+            "memory_evictions": self.memory.evictions,
+            "disk_evictions": self.disk.evictions if self.disk is not None else 0,
+        }
+
+
+response_cache = ResponseCache(disk=SqliteCache(DISK_PATH) if DISK_PATH else None)
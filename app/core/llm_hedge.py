@@ -0,0 +1,170 @@
+"""
+Deadlines and Hedged Requests
+-----------------------------
+Bounds LLM tail latency per stage.
+
+- Every call gets a deadline (STAGE_DEADLINE_SECONDS, default
+  LLM_DEADLINE_SECONDS); exceeding it raises asyncio.TimeoutError, which
+  run_gemini() reports as an error dict.
+- For stages in HEDGED_STAGES, once a call has been running longer than the
+  rolling p95 latency of its stage, a duplicate request is fired and the
+  first one to succeed wins; the other is cancelled.
+- Hedges are capped at LLM_HEDGE_BUDGET (fraction of calls) per stage, so a
+  global slowdown cannot double our traffic.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "45"))
+HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LATENCY_WINDOW = 500
+
+STAGE_DEADLINE_SECONDS: Dict[str, float] = {
+    "master.router": 10,
+    "loan.clause_extractor": 30,
+    "loan.risk_scorer": 20,
+    "loan.narrator": 30,
+    "policy.qa": 20,
+    "scam.educator": 15,
+    "scam.educator.prefill": 60,
+    "policy.summarizer": 60,
+    "scam.pattern_extractor": 60,
+}
+
+HEDGED_STAGES = {
+    "master.router",
+    "loan.clause_extractor",
+    "loan.risk_scorer",
+    "loan.narrator",
+    "policy.qa",
+    "scam.educator",
+}
+
+
+def deadline_for(stage: Optional[str]) -> float:
+    if stage is None:
+        return DEFAULT_DEADLINE_SECONDS
+    return STAGE_DEADLINE_SECONDS.get(stage, DEFAULT_DEADLINE_SECONDS)
+
+
+class StageStats:
+    """Rolling latency window and hedge counters for one stage."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+
+    def record(self, latency: float) -> None:
+        self.latencies.append(latency)
+
+    def p95(self, min_samples: int = HEDGE_MIN_SAMPLES) -> Optional[float]:
+        if len(self.latencies) < min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        p95 = self.p95(min_samples=1)
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class Hedger:
+    def __init__(
+        self,
+        budget: float = HEDGE_BUDGET,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        hedged_stages=HEDGED_STAGES,
+    ):
+        self.budget = budget
+        self.min_samples = min_samples
+        self.hedged_stages = set(hedged_stages)
+        self.stages: Dict[str, StageStats] = {}
+
+    def _stats(self, stage: Optional[str]) -> StageStats:
+        name = stage or "unknown"
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = StageStats()
+            self.stages[name] = stats
+        return stats
+
+    def _may_hedge(self, stats: StageStats) -> bool:
+        return stats.hedges < self.budget * stats.calls
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        stage: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> Any:
+        """
+        Await fn() under the stage deadline, hedging with a second fn() call
+        when the first is slower than the stage's rolling p95.
+        """
+        stats = self._stats(stage)
+        stats.calls += 1
+        deadline = deadline if deadline is not None else deadline_for(stage)
+        started = time.monotonic()
+
+        hedge_after = None
+        if stage in self.hedged_stages:
+            hedge_after = stats.p95(self.min_samples)
+
+        primary = asyncio.ensure_future(fn())
+        tasks = {primary}
+        try:
+            if hedge_after is not None and hedge_after < deadline:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done and self._may_hedge(stats):
+                    stats.hedges += 1
+                    tasks.add(asyncio.ensure_future(fn()))
+
+            last_exc: Optional[BaseException] = None
+            while tasks:
+                remaining = deadline - (time.monotonic() - started)
+                if remaining <= 0:
+                    break
+                done, _ = await asyncio.wait(
+                    tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is not None:
+                        last_exc = task.exception()
+                        continue
+                    if task is not primary:
+                        stats.hedge_wins += 1
+                    stats.record(time.monotonic() - started)
+                    return task.result()
+
+            if last_exc is not None and not tasks:
+                raise last_exc
+            stats.timeouts += 1
+            raise asyncio.TimeoutError(
+                f"LLM call for stage {stage or 'unknown'} exceeded {deadline:.0f}s deadline"
+            )
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: s.snapshot() for name, s in self.stages.items()}
+
+
+llm_hedger = Hedger()
@@ -0,0 +1,263 @@
+"""
+LLM Request Scheduler
+---------------------
+Admission control for outgoing Gemini calls.
+
+- Global token bucket: caps the request rate (LLM_RATE_PER_SEC / LLM_BURST).
+- AIMD concurrency window: grows by ~1 per window of successful calls and is
+  cut multiplicatively on 429/503 responses or when latency exceeds
+  LLM_LATENCY_TARGET_SECONDS.
+- Priority classes: waiting calls are admitted INTERACTIVE first, BACKGROUND
+  last, FIFO within a class.
+- Jittered exponential retry for retryable HTTP statuses.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+RATE_PER_SEC = float(os.getenv("LLM_RATE_PER_SEC", "10"))
+BURST = float(os.getenv("LLM_BURST", "20"))
+INITIAL_CONCURRENCY = float(os.getenv("LLM_INITIAL_CONCURRENCY", "8"))
+MIN_CONCURRENCY = float(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+MAX_CONCURRENCY = float(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+LATENCY_TARGET_SECONDS = float(os.getenv("LLM_LATENCY_TARGET_SECONDS", "10"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "8"))
+
+OVERLOAD_STATUSES = {429, 503}
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+STAGE_PRIORITY: Dict[str, Priority] = {
+    "master.router": Priority.INTERACTIVE,
+    "scam.educator": Priority.INTERACTIVE,
+    "scam.educator.prefill": Priority.BACKGROUND,
+    "loan.clause_extractor": Priority.NORMAL,
+    "loan.risk_scorer": Priority.NORMAL,
+    "loan.narrator": Priority.NORMAL,
+    "policy.qa": Priority.NORMAL,
+    "policy.summarizer": Priority.BACKGROUND,
+    "scam.pattern_extractor": Priority.BACKGROUND,
+}
+
+
+def priority_for_stage(stage: Optional[str]) -> Priority:
+    if stage is None:
+        return Priority.NORMAL
+    return STAGE_PRIORITY.get(stage, Priority.NORMAL)
+
+
+def status_code_of(exc: BaseException) -> Optional[int]:
+    """
+    Best-effort HTTP status for an SDK exception
+    (google.genai.errors.APIError exposes `.code`).
+    """
+    for attr in ("code", "status_code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+class TokenBucket:
+    def __init__(self, rate: float = RATE_PER_SEC, burst: float = BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> float:
+        """
+        Take one token. Returns 0 on success, otherwise the seconds
+        to wait until a token becomes available.
+        """
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AIMDLimiter:
+    """
+    Additive-increase / multiplicative-decrease concurrency window.
+    """
+
+    def __init__(
+        self,
+        initial: float = INITIAL_CONCURRENCY,
+        min_limit: float = MIN_CONCURRENCY,
+        max_limit: float = MAX_CONCURRENCY,
+        latency_target: float = LATENCY_TARGET_SECONDS,
+        backoff: float = 0.5,
+    ):
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+
+    @property
+    def window(self) -> int:
+        return max(1, int(self.limit))
+
+    def on_success(self, latency: float) -> None:
+        if latency > self.latency_target:
+            # Slow but successful: back off gently.
+            self.limit = max(self.min_limit, self.limit * 0.9)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.window)
+
+    def on_overload(self) -> None:
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        bucket: Optional[TokenBucket] = None,
+        limiter: Optional[AIMDLimiter] = None,
+        max_retries: int = MAX_RETRIES,
+        retry_base: float = RETRY_BASE_SECONDS,
+        retry_max: float = RETRY_MAX_SECONDS,
+    ):
+        self.bucket = bucket if bucket is not None else TokenBucket()
+        self.limiter = limiter if limiter is not None else AIMDLimiter()
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.admitted: Dict[str, int] = {p.name: 0 for p in Priority}
+        self.retries = 0
+        self.overloads = 0
+
+    async def run(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        priority: Priority = Priority.NORMAL,
+    ) -> Any:
+        """
+        Run fn() once admitted, retrying retryable failures with jittered
+        exponential backoff. The last error is re-raised when retries run out.
+        """
+        attempt = 0
+        while True:
+            await self._acquire(priority)
+            started = time.monotonic()
+            try:
+                result = await fn()
+            except Exception as exc:
+                status = status_code_of(exc)
+                if status in OVERLOAD_STATUSES:
+                    self.overloads += 1
+                    self.limiter.on_overload()
+                if status not in RETRYABLE_STATUSES or attempt >= self.max_retries:
+                    raise
+            else:
+                self.limiter.on_success(time.monotonic() - started)
+                return result
+            finally:
+                self._release()
+
+            self.retries += 1
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.NORMAL) -> AsyncIterator[None]:
+        """
+        Hold one admission slot for the duration of the block. Used for
+        streaming calls, which cannot be transparently retried once started.
+        """
+        await self._acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as exc:
+            if status_code_of(exc) in OVERLOAD_STATUSES:
+                self.overloads += 1
+                self.limiter.on_overload()
+            raise
+        else:
+            self.limiter.on_success(time.monotonic() - started)
+        finally:
+            self._release()
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.retry_max, self.retry_base * (2 ** attempt)))
+
+    async def _acquire(self, priority: Priority) -> None:
+        fut: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), fut))
+        self._pump()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Admitted, but the caller went away before using the slot.
+                self._release()
+            raise
+        self.admitted[priority.name] += 1
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._pump()
+
+    def _pump(self) -> None:
+        while self._waiters:
+            _, _, fut = self._waiters[0]
+            if fut.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= self.limiter.window:
+                return
+            wait = self.bucket.try_acquire()
+            if wait > 0:
+                if self._timer is None:
+                    self._timer = fut.get_loop().call_later(wait, self._on_timer)
+                return
+            heapq.heappop(self._waiters)
+            self.in_flight += 1
+            fut.set_result(None)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._pump()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": sum(1 for _, _, f in self._waiters if not f.done()),
+            "admitted": dict(self.admitted),
+            "retries": self.retries,
+            "overloads": self.overloads,
+        }
+
+
+llm_scheduler = LLMScheduler()
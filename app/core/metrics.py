@@ -0,0 +1,402 @@
+"""
+Metrics
+-------
+Minimal Prometheus text-format (0.0.4) metrics, exported on GET /metrics.
+
+Recorded here:
+- finpal_llm_calls_total / finpal_llm_call_duration_seconds
+    every run_gemini() call by stage, cache status (hit|miss|bypass|stream)
+    and outcome (ok|error)
+- finpal_llm_backend_errors_total       backend failures by stage and error class
+- finpal_llm_{prompt,output}_tokens_total, finpal_llm_cost_usd_total
+    from the backend's usage metadata
+- finpal_requests_total / finpal_request_duration_seconds
+    per final_route of the master agent
+- finpal_router_decisions_total        routing decisions by source
+    (hint|local|llm|keywords)
+- finpal_speculation_branches_total / finpal_speculation_seconds_total
+    speculative pre-routing work that was used or wasted
+- finpal_stage_duration_seconds         agents_runtime stage latency by
+    pipeline, stage and outcome (ok|error)
+
+The LLM client components that keep their own counters (cache,
+single-flight, scheduler, hedger, prompt budgets, circuit breaker) are
+exported through a collector registered here. Other components (stage memo,
+job queue, scam pattern index, ...) register their own collectors with
+REGISTRY from their modules, so this module imports nothing above app.core.
+"""
+
+import math
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[Dict[str, str], float]
+
+LLM_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+REQUEST_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+# USD per 1M tokens (gemini-2.5-flash list price by default).
+PRICE_INPUT_PER_MTOK = float(os.getenv("LLM_PRICE_INPUT_PER_MTOK", "0.30"))
+PRICE_OUTPUT_PER_MTOK = float(os.getenv("LLM_PRICE_OUTPUT_PER_MTOK", "2.50"))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+    return "{" + inner + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _render_samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self._labels(k))} {_format_value(v)}"
+            for k, v in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LLM_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = [0] * len(self.buckets)
+                self._counts[key] = counts
+                self._sums[key] = 0.0
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), []))
+
+    def _render_samples(self) -> List[str]:
+        lines: List[str] = []
+        for key in sorted(self._counts):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, self._counts[key]):
+                cumulative += count
+                bucket_labels = dict(labels, le=_format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(self._sums[key])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LLM_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Collector) -> None:
+        """collector() yields (name, type, help, [(labels, value), ...])."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+LLM_CALLS = REGISTRY.counter(
+    "finpal_llm_calls_total",
+    "run_gemini calls by stage, cache status and outcome.",
+    ("stage", "cache", "outcome"),
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "finpal_llm_call_duration_seconds",
+    "run_gemini latency including cache lookups and queueing.",
+    ("stage", "cache"),
+)
+LLM_BACKEND_ERRORS = REGISTRY.counter(
+    "finpal_llm_backend_errors_total",
+    "Backend failures by stage and error class.",
+    ("stage", "error_class"),
+)
+LLM_PROMPT_TOKENS = REGISTRY.counter(
+    "finpal_llm_prompt_tokens_total",
+    "Prompt tokens reported by the backend.",
+    ("stage",),
+)
+LLM_OUTPUT_TOKENS = REGISTRY.counter(
+    "finpal_llm_output_tokens_total",
+    "Output tokens reported by the backend.",
+    ("stage",),
+)
+LLM_COST_USD = REGISTRY.counter(
+    "finpal_llm_cost_usd_total",
+    "Estimated LLM spend from token usage.",
+    ("stage",),
+)
+REQUESTS = REGISTRY.counter(
+    "finpal_requests_total",
+    "Master agent requests by final route and outcome.",
+    ("final_route", "outcome"),
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "finpal_request_duration_seconds",
+    "End-to-end master agent latency by final route.",
+    ("final_route",),
+    buckets=REQUEST_BUCKETS,
+)
+ROUTER_DECISIONS = REGISTRY.counter(
+    "finpal_router_decisions_total",
+    "Master router decisions by source.",
+    ("source",),
+)
+SPECULATION_BRANCHES = REGISTRY.counter(
+    "finpal_speculation_branches_total",
+    "Speculative branches started while routing, by route and outcome.",
+    ("route", "outcome"),
+)
+SPECULATION_SECONDS = REGISTRY.counter(
+    "finpal_speculation_seconds_total",
+    "Work done speculatively that was saved (used) or wasted (cancelled).",
+    ("kind",),
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "finpal_stage_duration_seconds",
+    "Pipeline stage latency (agents_runtime) by pipeline, stage and outcome.",
+    ("pipeline", "stage", "outcome"),
+    buckets=REQUEST_BUCKETS,
+)
+SCAM_SCAN_MESSAGES = REGISTRY.counter(
+    "finpal_scam_scan_messages_total",
+    "Messages scanned by /guardian/scam/scan, by outcome (scam, safe, error).",
+    ("outcome",),
+)
+
+
+def _stage(stage: Optional[str]) -> str:
+    return stage or "unknown"
+
+
+def observe_llm_call(stage: Optional[str], seconds: float, cache: str, ok: bool) -> None:
+    LLM_CALLS.inc(stage=_stage(stage), cache=cache, outcome="ok" if ok else "error")
+    LLM_CALL_SECONDS.observe(seconds, stage=_stage(stage), cache=cache)
+
+
+def observe_llm_usage(
+    stage: Optional[str],
+    prompt_tokens: Optional[int],
+    output_tokens: Optional[int],
+) -> None:
+    cost = 0.0
+    if prompt_tokens:
+        LLM_PROMPT_TOKENS.inc(prompt_tokens, stage=_stage(stage))
+        cost += prompt_tokens * PRICE_INPUT_PER_MTOK / 1_000_000
+    if output_tokens:
+        LLM_OUTPUT_TOKENS.inc(output_tokens, stage=_stage(stage))
+        cost += output_tokens * PRICE_OUTPUT_PER_MTOK / 1_000_000
+    if cost:
+        LLM_COST_USD.inc(cost, stage=_stage(stage))
+
+
+def observe_llm_error(stage: Optional[str], exc: BaseException) -> None:
+    LLM_BACKEND_ERRORS.inc(stage=_stage(stage), error_class=type(exc).__name__)
+
+
+def observe_request(final_route: str, seconds: float, ok: bool) -> None:
+    REQUESTS.inc(final_route=final_route, outcome="ok" if ok else "error")
+    REQUEST_SECONDS.observe(seconds, final_route=final_route)
+
+
+def observe_router_decision(source: str) -> None:
+    ROUTER_DECISIONS.inc(source=source)
+
+
+def observe_speculation(route: str, outcome: str, saved: float = 0.0, wasted: float = 0.0) -> None:
+    SPECULATION_BRANCHES.inc(route=route, outcome=outcome)
+    if saved:
+        SPECULATION_SECONDS.inc(saved, kind="saved")
+    if wasted:
+        SPECULATION_SECONDS.inc(wasted, kind="wasted")
+
+
+def observe_stage(pipeline: str, stage: str, seconds: float, outcome: str) -> None:
+    STAGE_SECONDS.observe(seconds, pipeline=pipeline, stage=stage, outcome=outcome)
+
+
+def observe_scam_scan(outcome: str) -> None:
+    SCAM_SCAN_MESSAGES.inc(outcome=outcome)
+
+
+def _llm_component_collector():
+    from app.core.circuit_breaker import OPEN, HALF_OPEN, llm_breaker
+    from app.core.llm_cache import response_cache
+    from app.core.llm_hedge import llm_hedger
+    from app.core.llm_scheduler import llm_scheduler
+    from app.core.prompt_budget import budget_stats
+    from app.core.singleflight import llm_flights
+
+    cache = response_cache.stats()
+    yield (
+        "finpal_llm_cache_events_total",
+        "counter",
+        "Response cache lookups and stores.",
+        [({"event": k}, v) for k, v in cache.items() if k in ("memory_hits", "disk_hits", "misses", "stores")],
+    )
+    flights = llm_flights.stats()
+    yield (
+        "finpal_llm_singleflight_total",
+        "counter",
+        "Single-flight leaders, coalesced callers and cancellations.",
+        [({"event": k}, v) for k, v in flights.items() if k != "in_flight"],
+    )
+    sched = llm_scheduler.stats()
+    yield (
+        "finpal_llm_scheduler",
+        "gauge",
+        "Scheduler concurrency window, in-flight and queued calls.",
+        [
+            ({"field": "concurrency_limit"}, sched["concurrency_limit"]),
+            ({"field": "in_flight"}, sched["in_flight"]),
+            ({"field": "queued"}, sched["queued"]),
+        ],
+    )
+    yield (
+        "finpal_llm_retries_total",
+        "counter",
+        "Retried Gemini calls.",
+        [({}, sched["retries"])],
+    )
+    hedges = llm_hedger.stats()
+    yield (
+        "finpal_llm_hedges_total",
+        "counter",
+        "Hedged duplicate calls and how many of them won, by stage.",
+        [({"stage": s, "event": "hedged"}, v["hedges"]) for s, v in hedges.items()]
+        + [({"stage": s, "event": "won"}, v["hedge_wins"]) for s, v in hedges.items()]
+        + [({"stage": s, "event": "timeout"}, v["timeouts"]) for s, v in hedges.items()],
+    )
+    budgets = budget_stats.snapshot()
+    yield (
+        "finpal_llm_prompt_tokens_saved_total",
+        "counter",
+        "Estimated prompt tokens saved by payload compaction and budgets.",
+        [({"stage": s}, v["saved_tokens"]) for s, v in budgets.items()],
+    )
+    yield (
+        "finpal_llm_prompt_truncations_total",
+        "counter",
+        "Calls whose payload was truncated to fit the stage token budget.",
+        [({"stage": s}, v["truncated_calls"]) for s, v in budgets.items()],
+    )
+    breaker = llm_breaker.stats()
+    yield (
+        "finpal_llm_circuit_state",
+        "gauge",
+        "LLM circuit breaker state (0 closed, 1 half-open, 2 open).",
+        [({}, {HALF_OPEN: 1, OPEN: 2}.get(breaker["state"], 0))],
+    )
+    yield (
+        "finpal_llm_circuit_events_total",
+        "counter",
+        "Circuit breaker trips and calls rejected while open.",
+        [({"event": "trip"}, breaker["trips"]), ({"event": "rejected"}, breaker["rejected"])],
+    )
+
+
+REGISTRY.register_collector(_llm_component_collector)
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,202 @@
+"""
+Prompt Budget
+-------------
+Shrinks the user payload of every LLM call before it is sent:
+
+1. compact()  – drops None / "" / [] / {} fields recursively
+                (model_dump() trees are full of them)
+2. encode()   – compact JSON separators, no indentation, UTF-8 kept as-is
+3. fit()      – enforces a per-stage token budget (STAGE_TOKEN_BUDGETS) by
+                truncating long free-text fields, lowest priority first
+                (TRUNCATION_ORDER); structured fields are never cut.
+
+For micro-batched payloads ({"items": [{"index", "input"}, ...]}) the budget
+applies to each item's input separately.
+
+Token counts are estimates (CHARS_PER_TOKEN characters per token); savings
+versus the old `json.dumps(indent=2)` encoding are tracked per stage. The
+size of that encoding is estimated by compact() while it walks the payload
+(strings counted without escapes), so it is never actually serialized.
+"""
+
+import json
+import math
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = int(os.getenv("LLM_DEFAULT_TOKEN_BUDGET", "8000"))
+MIN_KEEP_CHARS = 200
+ELLIPSIS = "…"
+
+STAGE_TOKEN_BUDGETS: Dict[str, int] = {
+    "master.router": 1000,
+    "loan.clause_extractor": 12000,
+    "loan.risk_scorer": 4000,
+    "loan.narrator": 4000,
+    "policy.summarizer": 3000,
+    "policy.qa": 3000,
+    "scam.educator": 1500,
+    "scam.educator.prefill": 1500,
+    "scam.pattern_extractor": 2000,
+}
+
+# Free-text fields that may be shortened, cut first → cut last.
+TRUNCATION_ORDER = (
+    "raw_text_snippet",
+    "example_message",
+    "raw_text",
+    "article",
+    "text",
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def budget_for(stage: Optional[str]) -> int:
+    if stage is None:
+        return DEFAULT_TOKEN_BUDGET
+    return STAGE_TOKEN_BUDGETS.get(stage, DEFAULT_TOKEN_BUDGET)
+
+
+def compact(obj: Any, _size: Optional[List[int]] = None, _depth: int = 0) -> Any:
+    """
+    Return a copy of obj without None / empty-string / empty-container values.
+
+    If `_size` is given, the length `json.dumps(obj, indent=2)` would have
+    is added to _size[0] on the way (an estimate: no escaping).
+    """
+    if isinstance(obj, dict):
+        if _size is not None:
+            # "{" "\n" ... "\n" indent "}", per item: indent + '"key": ' + value, joined by ",\n"
+            _size[0] += 2 if not obj else 4 + 2 * _depth + len(obj) * (2 * _depth + 8) - 2
+        out = {}
+        for key, value in obj.items():
+            if _size is not None:
+                _size[0] += len(str(key))
+            value = compact(value, _size, _depth + 1)
+            if value is None or value == "" or value == [] or value == {}:
+                continue
+            out[key] = value
+        return out
+    if isinstance(obj, (list, tuple)):
+        if _size is not None:
+            _size[0] += 2 if not obj else 4 + 2 * _depth + len(obj) * (2 * _depth + 4) - 2
+        out_list = []
+        for value in obj:
+            if value is None:
+                if _size is not None:
+                    _size[0] += 4
+                continue
+            out_list.append(compact(value, _size, _depth + 1))
+        return out_list
+    if _size is not None:
+        _size[0] += _scalar_size(obj)
+    return obj
+
+
+def _scalar_size(value: Any) -> int:
+    if value is None:
+        return 4
+    if isinstance(value, bool):
+        return 4 if value else 5
+    if isinstance(value, (int, float)):
+        return len(repr(value))
+    return len(str(value)) + 2  # quoted; str() is json.dumps' default= too
+
+
+def encode(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _string_slots(obj: Any, field: str, out: List[Tuple[Dict[str, Any], str]]) -> None:
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key == field and isinstance(value, str):
+                out.append((obj, key))
+            else:
+                _string_slots(value, field, out)
+    elif isinstance(obj, list):
+        for value in obj:
+            _string_slots(value, field, out)
+
+
+def _truncate(obj: Any, budget: int) -> bool:
+    """Shorten free-text fields in place until obj fits budget. Returns True if anything was cut."""
+    truncated = False
+    for field in TRUNCATION_ORDER:
+        over = estimate_tokens(encode(obj)) - budget
+        if over <= 0:
+            break
+        slots: List[Tuple[Dict[str, Any], str]] = []
+        _string_slots(obj, field, slots)
+        slots = [(c, k) for c, k in slots if len(c[k]) > MIN_KEEP_CHARS]
+        if not slots:
+            continue
+        over_chars = over * CHARS_PER_TOKEN
+        total = sum(len(c[k]) for c, k in slots)
+        for container, key in slots:
+            value = container[key]
+            cut = math.ceil(over_chars * len(value) / total) + len(ELLIPSIS)
+            keep = max(MIN_KEEP_CHARS, len(value) - cut)
+            if keep < len(value):
+                container[key] = value[:keep] + ELLIPSIS
+                truncated = True
+    return truncated
+
+
+class BudgetStats:
+    def __init__(self) -> None:
+        self.stages: Dict[str, Dict[str, int]] = {}
+
+    def record(self, stage: Optional[str], original_tokens: int, sent_tokens: int, truncated: bool) -> None:
+        s = self.stages.setdefault(
+            stage or "unknown",
+            {"calls": 0, "original_tokens": 0, "sent_tokens": 0, "truncated_calls": 0},
+        )
+        s["calls"] += 1
+        s["original_tokens"] += original_tokens
+        s["sent_tokens"] += sent_tokens
+        s["truncated_calls"] += int(truncated)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: dict(s, saved_tokens=s["original_tokens"] - s["sent_tokens"])
+            for name, s in self.stages.items()
+        }
+
+
+budget_stats = BudgetStats()
+
+
+class Fitted(NamedTuple):
+    obj: Any
+    truncated: bool
+    original_tokens: int  # estimated tokens of json.dumps(user_obj, indent=2)
+
+
+def fit(user_obj: Any, stage: Optional[str] = None) -> Fitted:
+    """
+    Compact user_obj and truncate it into the stage budget.
+    Returns (new_obj, truncated, original_tokens); user_obj itself is never
+    modified.
+    """
+    budget = budget_for(stage)
+    size = [0]
+    obj = compact(user_obj, size)
+    truncated = False
+    items = obj.get("items") if isinstance(obj, dict) else None
+    if isinstance(items, list):
+        for item in items:
+            if isinstance(item, dict) and "input" in item:
+                truncated |= _truncate(item["input"], budget)
+    else:
+        truncated = _truncate(obj, budget)
+    return Fitted(obj, truncated, math.ceil(size[0] / CHARS_PER_TOKEN))
+
+
+def record_savings(stage: Optional[str], original_tokens: int, sent_message: str, truncated: bool) -> None:
+    """Compare against the previous `json.dumps(indent=2)` encoding (sized by fit())."""
+    budget_stats.record(stage, original_tokens, estimate_tokens(sent_message), truncated)
@@ -0,0 +1,133 @@
+"""
+Prompt Registry
+---------------
+Single in-memory home for every agent prompt.
+
+- All prompts in PROMPT_FILES are read once, at import (app startup), from
+  paths relative to the `app` package, so the working directory no longer
+  matters.
+- Each prompt carries a version (sha256 of its text, 12 hex chars);
+  run_gemini() uses it in the response cache key instead of the full text.
+- Files are re-checked for a changed mtime at most every
+  PROMPT_RELOAD_INTERVAL_SECONDS (negative disables hot reload); changed
+  prompts are re-read and the whole table is swapped in one assignment, so
+  readers never see a half-reloaded registry. A prompt that fails to
+  re-read keeps its previous version.
+
+Usage:
+    from app.core.prompt_registry import prompts
+    prompts.get("loan.narrator")      → prompt text
+    prompts.version("loan.narrator")  → "3f2a9c0d41b7"
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+APP_DIR = Path(__file__).resolve().parents[1]
+
+RELOAD_INTERVAL_SECONDS = float(os.getenv("PROMPT_RELOAD_INTERVAL_SECONDS", "2"))
+
+# Prompt name (usually the stage that uses it) → path relative to app/
+PROMPT_FILES: Dict[str, str] = {
+    "master.router": "agents/master/router_prompt.txt",
+    "loan.ingestion": "agents/loan/prompts/ingestion_prompt.txt",
+    "loan.clause_extractor": "agents/loan/prompts/clause_prompt.txt",
+    "loan.risk_scorer": "agents/loan/prompts/risk_prompt.txt",
+    "loan.narrator": "agents/loan/prompts/narration_prompt.txt",
+    "policy.summarizer": "agents/policy/prompts/summarize_prompt.txt",
+    "policy.qa": "agents/policy/prompts/qa_prompt.txt",
+    "scam.educator": "agents/scam/prompts/educator_prompt.txt",
+    "scam.pattern_extractor": "agents/scam/prompts/pattern_prompt.txt",
+}
+
+
+class Prompt(NamedTuple):
+    name: str
+    text: str
+    version: str
+    mtime_ns: int
+
+
+def _read(name: str, path: Path) -> Prompt:
+    mtime_ns = path.stat().st_mtime_ns
+    text = path.read_text(encoding="utf-8")
+    version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+    return Prompt(name, text, version, mtime_ns)
+
+
+class PromptRegistry:
+    def __init__(
+        self,
+        files: Optional[Dict[str, str]] = None,
+        base_dir: Path = APP_DIR,
+        reload_interval: float = RELOAD_INTERVAL_SECONDS,
+    ):
+        self.paths = {name: base_dir / rel for name, rel in (files or PROMPT_FILES).items()}
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._swap({name: _read(name, path) for name, path in self.paths.items()})
+        self._checked_at = time.monotonic()
+
+    def _swap(self, table: Dict[str, Prompt]) -> None:
+        # One assignment: readers see either the old or the new table.
+        self._state = (table, {p.text: p.version for p in table.values()})
+
+    def _maybe_reload(self) -> None:
+        if self.reload_interval < 0:
+            return
+        if time.monotonic() - self._checked_at < self.reload_interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return  # another thread is already checking
+        try:
+            self._checked_at = time.monotonic()
+            self.reload()
+        finally:
+            self._lock.release()
+
+    def reload(self) -> bool:
+        """Re-read prompts whose mtime changed. Returns True if anything changed."""
+        current = self._state[0]
+        updated = dict(current)
+        changed = False
+        for name, path in self.paths.items():
+            try:
+                if path.stat().st_mtime_ns == current[name].mtime_ns:
+                    continue
+                prompt = _read(name, path)
+            except OSError as exc:
+                logging.warning(f"Could not reload prompt {name} from {path}: {exc}")
+                continue
+            if prompt.version != current[name].version:
+                changed = True
+            updated[name] = prompt
+        self._swap(updated)
+        if changed:
+            self.reloads += 1
+        return changed
+
+    def prompt(self, name: str) -> Prompt:
+        self._maybe_reload()
+        return self._state[0][name]
+
+    def get(self, name: str) -> str:
+        return self.prompt(name).text
+
+    def version(self, name: str) -> str:
+        return self.prompt(name).version
+
+    def version_of(self, text: str) -> Optional[str]:
+        """Version of the registered prompt whose text is exactly `text`, if any."""
+        return self._state[1].get(text)
+
+    def versions(self) -> Dict[str, str]:
+        return {name: p.version for name, p in self._state[0].items()}
+
+
+prompts = PromptRegistry()
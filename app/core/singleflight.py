@@ -0,0 +1,80 @@
+"""
+Single-flight
+-------------
+Coalesces concurrent identical async calls into one in-flight task.
+
+The first caller for a key ("leader") starts the task; everyone arriving while
+it is still running awaits the same task. Each caller awaits through
+asyncio.shield(), so a caller being cancelled (e.g. a client disconnect) does
+not cancel the shared call for the others. The task is only cancelled once
+every caller waiting on it has gone away.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._flights: Dict[str, _Flight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.cancelled_waiters = 0
+        self.abandoned = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() once per key at a time and share its result with every
+        concurrent caller using the same key.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(fn())
+            flight = _Flight(task)
+            self._flights[key] = flight
+            task.add_done_callback(lambda _t, k=key, f=flight: self._forget(k, f))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                self.cancelled_waiters += 1
+            raise
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to receive the result.
+                self._forget(key, flight)
+                flight.task.cancel()
+                self.abandoned += 1
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "cancelled_waiters": self.cancelled_waiters,
+            "abandoned": self.abandoned,
+            "in_flight": self.in_flight(),
+        }
+
+
+llm_flights = SingleFlight()
@@ -3,7 +3,11 @@ FastAPI application entrypoint for the Financial Safety Net backend.
 
 This app:
 - Exposes /health for liveness checks
-- Exposes /guardian to talk to the master agent
+- Exposes /guardian to talk to the master agent (+ /guardian/stream, /guardian/batch,
+  /guardian/jobs, /guardian/scam/scan, /guardian/enrichment)
+- Runs the /guardian/jobs worker pool for the lifetime of the app
+- Periodically pre-generates scam educator explanations for new patterns
+- Exposes /metrics for Prometheus scraping
 
 You can run it with:
     uvicorn app.main:app --reload
@@ -13,9 +17,30 @@ For ADK:
   to inspect and debug the workflows visually.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from app.agents.master import guardian_jobs
+from app.agents.scam.explanation_store import explanation_store
+from app.agents.scam.near_duplicate import near_duplicate_index
 from app.api.router import api_router
+from app.core.llm_batch import close_batchers
+from app.core.llm_cache import response_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await guardian_jobs.start()
+    await explanation_store.start()
+    try:
+        yield
+    finally:
+        await explanation_store.stop()
+        await guardian_jobs.stop()
+        await close_batchers()
+        response_cache.flush()
+        near_duplicate_index.flush()
 
 
 def create_app() -> FastAPI:
@@ -26,6 +51,7 @@ def create_app() -> FastAPI:
             "Backend for a multi-agent financial safety assistant "
             "that protects users from UPI scams and complex loan policies."
         ),
+        lifespan=lifespan,
     )
 
     # Root ping
@@ -28,7 +28,9 @@ from .scam import (
     ScamPattern,
     ScamAnalysisRequest,
     ScamAnalysisResult,
+    ScamEnrichment,
 )
+from .jobs import JobStatusEnum, JobInfo
 
 __all__ = [
     # common
@@ -53,4 +55,8 @@ __all__ = [
     "ScamPattern",
     "ScamAnalysisRequest",
     "ScamAnalysisResult",
+    "ScamEnrichment",
+    # jobs
+    "JobStatusEnum",
+    "JobInfo",
 ]
@@ -68,6 +68,15 @@ class UserRequest(BaseModel):
         default_factory=dict,
         description="Optional arbitrary metadata (e.g. UPI ID, URL, channel).",
     )
+    defer_enrichment: bool = Field(
+        default=False,
+        description=(
+            "Two-phase mode: route without waiting for the LLM router and, for "
+            "scam checks, return the local verdict right away while the LLM "
+            "explanation is generated in the background (see "
+            "AgentResponse.enrichment_token)."
+        ),
+    )
 
 
 class AgentResponse(BaseModel):
@@ -90,6 +99,21 @@ class AgentResponse(BaseModel):
         default=None,
         description="Filled when an error occurs in any stage of the pipeline.",
     )
+    degraded: bool = Field(
+        default=False,
+        description=(
+            "True when the LLM circuit was open and the request was served in "
+            "local-only mode (keyword routing, no LLM explanations)."
+        ),
+    )
+    enrichment_token: Optional[str] = Field(
+        default=None,
+        description=(
+            "Set when defer_enrichment was requested and the explanation is still "
+            "being generated: fetch it from GET /guardian/enrichment/{token} "
+            "(or its /stream SSE variant)."
+        ),
+    )
     debug_info: Optional[Dict[str, Any]] = Field(
         default=None,
         description=(
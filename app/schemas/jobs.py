@@ -0,0 +1,47 @@
+"""
+Pydantic models for the asynchronous job API (/guardian/jobs).
+"""
+
+from datetime import datetime
+from enum import Enum
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+
+class JobStatusEnum(str, Enum):
+    """Lifecycle of a queued job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobInfo(BaseModel):
+    """State of a job as returned by POST / GET /guardian/jobs."""
+
+    id: str = Field(..., description="Opaque job id used for polling.")
+    status: JobStatusEnum = Field(..., description="Current lifecycle state.")
+    priority: int = Field(
+        default=0, description="Higher priorities are picked up first."
+    )
+    created_at: datetime = Field(..., description="When the job was submitted.")
+    started_at: Optional[datetime] = Field(
+        default=None, description="When a worker picked the job up."
+    )
+    finished_at: Optional[datetime] = Field(
+        default=None, description="When the job succeeded, failed or was cancelled."
+    )
+    expires_at: Optional[datetime] = Field(
+        default=None,
+        description="After this time the finished job and its result are deleted.",
+    )
+    result: Optional[Any] = Field(
+        default=None,
+        description="Job output once succeeded (an AgentResponse for guardian jobs).",
+    )
+    error: Optional[str] = Field(
+        default=None, description="Error message when the job failed."
+    )
@@ -8,7 +8,7 @@ These schemas cover:
 """
 
 from enum import Enum
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field, HttpUrl
 
@@ -136,3 +136,19 @@ class ScamAnalysisResult(BaseModel):
         default_factory=list,
         description="More detailed bullet points educating the user about this scam type.",
     )
+
+
+class ScamEnrichment(BaseModel):
+    """
+    Deferred educator output for a two-phase scam check
+    (UserRequest.defer_enrichment).
+    """
+
+    token: str = Field(..., description="AgentResponse.enrichment_token.")
+    status: Literal["pending", "done", "failed"] = Field(
+        ..., description="'done' once the enriched result is available."
+    )
+    result: Optional[ScamAnalysisResult] = Field(
+        default=None,
+        description="The verdict with the educator's explanation, when done.",
+    )
@@ -0,0 +1,51 @@
+"""
+Shared fixtures.
+
+The app keeps its stores in module-level singletons that default to files
+under the repo's .cache/. isolate_state (autouse) points each of them at the
+test's tmp_path, or disables it, so no test run writes outside tmp_path.
+This covers the app lifespan started by `with TestClient(app)` too, which
+also skips the explanation prefill loop. It also empties the LLM response
+cache, closes the circuit and restores the default backend afterwards.
+"""
+import pytest
+
+from app.agents.master import guardian_jobs
+from app.agents.master.local_classifier import decision_log, local_classifier
+from app.agents.scam.explanation_store import explanation_store
+from app.agents.scam.near_duplicate import near_duplicate_index
+from app.agents.scam.pattern_extractor import extraction_checkpoint
+from app.core import llm_backend, llm_cache
+from app.core.circuit_breaker import llm_breaker
+from app.core.fake_llm import FakeBackend
+from app.core.job_queue import SqliteJobStore
+
+
+@pytest.fixture(autouse=True)
+def isolate_state(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_cache.response_cache, "disk", None)
+    llm_cache.response_cache.clear()
+    monkeypatch.setattr(decision_log, "path", None)
+    monkeypatch.setattr(local_classifier, "model", None)
+    monkeypatch.setattr(local_classifier, "_model_checked", True)
+    monkeypatch.setattr(explanation_store, "path", str(tmp_path / "scam_explanations.json"))
+    monkeypatch.setattr(explanation_store, "_entries", None)
+    monkeypatch.setattr(explanation_store, "fill_interval", -1)
+    monkeypatch.setattr(guardian_jobs, "store", SqliteJobStore())
+    monkeypatch.setattr(near_duplicate_index, "path", str(tmp_path / "scam_minhash.npz"))
+    monkeypatch.setattr(near_duplicate_index, "reports_path", str(tmp_path / "scam_reports.jsonl"))
+    monkeypatch.setattr(near_duplicate_index, "lsh", None)
+    monkeypatch.setattr(near_duplicate_index, "_synced_version", 0)
+    monkeypatch.setattr(extraction_checkpoint, "path", None)
+    llm_breaker.reset()
+    yield
+    llm_breaker.reset()
+    llm_backend.set_backend(None)
+
+
+@pytest.fixture
+def fake_backend():
+    """Install a FakeBackend (default latency model) for the test."""
+    backend = FakeBackend()
+    llm_backend.set_backend(backend)
+    return backend
@@ -0,0 +1,158 @@
+"""Tests for the declarative DAG runtime."""
+import asyncio
+import time
+
+import pytest
+
+from app.core import agents_runtime
+from app.core.agents_runtime import Pipeline, Stage, Uncached, execute, run_agents
+
+
+def _sleeper(delay, value):
+    async def fn(**_):
+        await asyncio.sleep(delay)
+        return value
+    return fn
+
+
+def test_independent_stages_run_concurrently():
+    async def join(a, b):
+        return a + b
+
+    pipeline = Pipeline("t", [
+        Stage("a", _sleeper(0.1, 1), inputs=["x"], output="a"),
+        Stage("b", _sleeper(0.1, 2), inputs=["x"], output="b"),
+        Stage("join", join, inputs=["a", "b"], output="out"),
+    ], result="out")
+
+    t0 = time.perf_counter()
+    result, trace = asyncio.run(execute(pipeline, x=0))
+    assert result == 3
+    assert time.perf_counter() - t0 < 0.18
+    assert [e["stage"] for e in trace][-1] == "join"
+
+
+def test_retry_then_timeout(monkeypatch):
+    monkeypatch.setattr(agents_runtime, "RETRY_BACKOFF_SECONDS", 0)
+    calls = {"n": 0}
+
+    async def flaky():
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise RuntimeError("first attempt fails")
+        return "ok"
+
+    pipeline = Pipeline("t", [Stage("flaky", flaky, inputs=[], output="out", retries=1)], result="out")
+    assert asyncio.run(run_agents(pipeline)) == "ok"
+    assert calls["n"] == 2
+
+    slow = Pipeline("t", [Stage("slow", _sleeper(1, "late"), inputs=[], output="out", timeout=0.05)], result="out")
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run_agents(slow))
+
+    blocking = Pipeline("t", [
+        Stage("blocking", lambda: time.sleep(0.3), inputs=[], output="out", timeout=0.05, threaded=True),
+    ], result="out")
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run_agents(blocking))
+    with pytest.raises(ValueError, match="timeout"):
+        Stage("inline", lambda: "x", inputs=[], output="out", timeout=0.05)  # could not be enforced
+
+
+def test_failure_cancels_running_stages():
+    cancelled = []
+
+    async def long():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def boom():
+        raise ValueError("boom")
+
+    pipeline = Pipeline("t", [
+        Stage("long", long, inputs=[], output="a"),
+        Stage("boom", boom, inputs=[], output="b"),
+        Stage("join", lambda a, b: (a, b), inputs=["a", "b"], output="out"),
+    ], result="out")
+
+    async def main():
+        with pytest.raises(ValueError):
+            await run_agents(pipeline)
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert cancelled == [True]
+
+
+def test_memoized_stage_runs_once_per_input():
+    agents_runtime.memo.clear()
+    calls = []
+
+    def square(x):
+        calls.append(x)
+        return {"sq": x * x}
+
+    pipeline = Pipeline("t", [Stage("square", square, inputs=["x"], output="out", memo_ttl=60)], result="out")
+    first = asyncio.run(run_agents(pipeline, x=3))
+    first["sq"] = -1  # callers get copies, the memo is not mutated
+    second, trace = asyncio.run(execute(pipeline, x=3))
+    asyncio.run(run_agents(pipeline, x=4))
+
+    assert second == {"sq": 9}
+    assert trace[0]["status"] == "memo"
+    assert calls == [3, 4]
+
+
+def test_degraded_and_fallback_outputs_are_not_memoized(monkeypatch):
+    monkeypatch.setattr(agents_runtime, "RETRY_BACKOFF_SECONDS", 0)
+    agents_runtime.memo.clear()
+    calls = []
+
+    async def fetch(x):
+        calls.append(x)
+        if len(calls) <= 2:
+            raise RuntimeError("source down")
+        return Uncached(["partial"]) if len(calls) == 3 else ["full"]
+
+    pipeline = Pipeline("t", [
+        Stage("fetch", fetch, inputs=["x"], output="out", retries=1, memo_ttl=60, fallback=lambda x: []),
+    ], result="out")
+    result, trace = asyncio.run(execute(pipeline, x=1))
+    assert result == [] and trace[0]["status"] == "fallback"
+    assert asyncio.run(run_agents(pipeline, x=1)) == ["partial"]
+    assert asyncio.run(run_agents(pipeline, x=1)) == ["full"]
+    assert asyncio.run(run_agents(pipeline, x=1)) == ["full"]
+    assert len(calls) == 4
+
+
+def test_seeded_output_skips_stage_and_its_inputs():
+    calls = []
+
+    def fetch():
+        calls.append("fetch")
+        return [1, 2]
+
+    pipeline = Pipeline("t", [
+        Stage("fetch", fetch, inputs=[], output="docs"),
+        Stage("count", lambda items: len(items), inputs={"items": "docs"}, output="out"),
+    ], result="out")
+
+    result, trace = asyncio.run(execute(pipeline, docs=[1, 2, 3]))
+    assert result == 3
+    assert calls == []
+    assert {e["stage"]: e["status"] for e in trace} == {"fetch": "prefilled", "count": "ok"}
+
+
+def test_pipeline_validation():
+    with pytest.raises(ValueError, match="cycle"):
+        Pipeline("t", [
+            Stage("a", len, inputs=["b"], output="a"),
+            Stage("b", len, inputs=["a"], output="b"),
+        ], result="a")
+    with pytest.raises(ValueError, match="produced by both"):
+        Pipeline("t", [Stage("a", len, inputs=[], output="x"), Stage("b", len, inputs=[], output="x")], result="x")
+    with pytest.raises(ValueError, match="missing inputs"):
+        asyncio.run(run_agents(Pipeline("t", [Stage("a", len, inputs=["x"], output="y")], result="y")))
@@ -0,0 +1,105 @@
+"""Tests for the bulk scam scan (library + /guardian/scam/scan)."""
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.agents.scam import bulk_scan
+from app.main import app
+from app.schemas import ScamAnalysisResult
+
+
+async def _chunks(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def _collect(agen):
+    return [item async for item in agen]
+
+
+def _result(text, risk):
+    scam = risk >= 0.5
+    return ScamAnalysisResult(
+        classification="Fake KYC" if scam else "probably safe",
+        risk_score=risk,
+        is_scam=scam,
+        recommended_action="Ignore it.",
+        short_warning="local",
+    )
+
+
+def test_parsers_handle_chunking_quotes_and_bad_rows():
+    ndjson = b'{"id": 1, "text": "hello"}\n"plain string"\n\n[1]\n{"text": ""}\n{"text": "last"}'
+    items = asyncio.run(_collect(bulk_scan.parse(_chunks(ndjson), "ndjson", language="hi")))
+    assert [(i, ident) for i, ident, _ in items] == [(0, "1"), (1, None), (2, None), (3, None), (4, None)]
+    assert items[0][2].text == "hello" and items[0][2].language == "hi"
+    assert isinstance(items[2][2], ValueError) and isinstance(items[3][2], ValueError)
+    assert items[4][2].text == "last"
+
+    csv_data = 'id,Text,language\nm1,"Pay now,\nor else",en\nm2,,en\nm3,hi there,ta\n'.encode()
+    items = asyncio.run(_collect(bulk_scan.parse(_chunks(csv_data), "csv")))
+    assert items[0][1] == "m1" and items[0][2].text == "Pay now,\nor else"
+    assert isinstance(items[1][2], ValueError)
+    assert items[2][2].language == "ta"
+
+    try:
+        asyncio.run(_collect(bulk_scan.parse(_chunks(b"body\nx\n"), "csv")))
+    except bulk_scan.ScanInputError:
+        pass
+    else:
+        raise AssertionError("expected ScanInputError")
+
+
+def test_educator_runs_once_per_distinct_high_risk_hit(monkeypatch):
+    risks = {"scam a": 0.9, "scam a again": 0.9, "weak": 0.6, "safe": 0.1}
+    calls = []
+
+    def fake_batch(requests):
+        return [_result(req.text, risks[req.text]) for req in requests]
+
+    async def fake_enrich(result):
+        calls.append(result.classification)
+        await asyncio.sleep(0.01)
+        result.short_warning = "educated"
+        return result
+
+    monkeypatch.setattr(bulk_scan, "risk_analyze_batch", fake_batch)
+    monkeypatch.setattr(bulk_scan, "enrich_explanation", fake_enrich)
+    texts = ["scam a", "safe", "scam a again", "weak", "bad"]
+    items = [(i, None, bulk_scan._request({"text": t}, "en")) for i, t in enumerate(texts[:4])]
+    items.append((4, None, ValueError("missing 'text'")))
+
+    async def source():
+        for item in items:
+            yield item
+
+    lines = asyncio.run(_collect(bulk_scan.scan_messages(source(), educate=True, batch_size=2)))
+    by_index = {line["index"]: line for line in lines}
+    assert sorted(by_index) == [0, 1, 2, 3, 4]
+    assert calls == ["Fake KYC"]  # identical local results share one call
+    assert by_index[0]["result"]["short_warning"] == "educated"
+    assert by_index[2]["result"]["short_warning"] == "educated"
+    assert by_index[3]["result"]["short_warning"] == "local"  # below SCAM_SCAN_EDUCATE_MIN_RISK
+    assert by_index[4]["error"]["message"] == "missing 'text'"
+
+
+def test_scan_endpoint_streams_one_line_per_message():
+    client = TestClient(app)
+    body = "\n".join(json.dumps({"id": f"m{i}", "text": t}) for i, t in enumerate([
+        "Dear customer your account will be blocked, share OTP to verify",
+        "see you at lunch",
+    ]))
+    resp = client.post("/guardian/scam/scan", content=body, headers={"content-type": "application/x-ndjson"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = {line["id"]: line for line in map(json.loads, resp.text.splitlines())}
+    assert lines["m0"]["result"]["is_scam"] is True
+    assert lines["m1"]["result"]["is_scam"] is False
+
+    resp = client.post("/guardian/scam/scan", content="text\nsee you at lunch\n", headers={"content-type": "text/csv"})
+    assert [json.loads(line)["index"] for line in resp.text.splitlines()] == [0]
+
+    resp = client.post("/guardian/scam/scan", content="message\nhi\n", headers={"content-type": "text/csv"})
+    assert "text" in json.loads(resp.text.splitlines()[-1])["error"]["message"]
+    assert client.post("/guardian/scam/scan?format=xml", content="<x/>").status_code == 415
@@ -0,0 +1,66 @@
+"""Tests for the LLM circuit breaker and local-only degraded mode."""
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, llm_breaker
+from app.main import app
+
+
+@pytest.fixture
+def open_circuit(fake_backend):
+    llm_breaker._open()
+    return fake_backend
+
+
+def test_trips_on_error_rate_and_recovers_through_probe():
+    breaker = CircuitBreaker(min_calls=4, error_rate=0.5, cooldown_seconds=0.05, half_open_probes=1)
+    for _ in range(2):
+        breaker.record_success(0.1)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe slot
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+
+
+def test_trips_on_slow_calls_and_failed_probe_reopens():
+    breaker = CircuitBreaker(min_calls=3, slow_seconds=1, slow_rate=0.6, cooldown_seconds=0.05)
+    for _ in range(3):
+        breaker.record_success(2.0)
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+
+
+def test_open_circuit_serves_requests_locally(open_circuit):
+    client = TestClient(app)
+
+    scam = client.post("/guardian", json={"text": "Your KYC expires today, click this link"}).json()
+    assert scam["final_route"] == "SCAM_CHECK"
+    assert scam["degraded"] is True
+    assert scam["error"] is None
+
+    loan = client.post("/guardian", json={"file_id": "sample:payday_loan_highrisk"}).json()
+    assert loan["final_route"] == "LOAN_DOC"
+    assert loan["error"] is None
+    assert loan["data"]["risk"]["overall_risk_level"] == "high"
+
+    policy = client.post("/guardian", json={"text": "What does RBI say about recovery agents?"}).json()
+    assert policy["final_route"] == "POLICY_QA"
+    assert policy["error"] is None
+    assert policy["data"]["source_ids"]
+
+    assert sum(open_circuit.calls.values()) == 0
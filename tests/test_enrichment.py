@@ -0,0 +1,104 @@
+"""Tests for two-phase scam checks (instant verdict, deferred enrichment)."""
+import asyncio
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from app.agents.scam import educator, enrichment, pipeline
+from app.agents.scam.explanation_store import ExplanationStore
+from app.core import llm_backend
+from app.core.fake_llm import FakeBackend, LatencyModel
+from app.main import app
+from app.schemas import ScamAnalysisResult
+
+SCAM_TEXT = "Dear customer your account will be blocked, share OTP to verify"
+
+
+def _result():
+    return ScamAnalysisResult(
+        classification="Fake KYC", risk_score=0.9, is_scam=True,
+        recommended_action="Ignore it.", short_warning="local",
+    )
+
+
+def test_registry_reports_pending_done_failed_and_expires(monkeypatch):
+    async def fake_enrich(result):
+        await asyncio.sleep(0.02)
+        if result.classification == "boom":
+            raise RuntimeError("boom")
+        result.short_warning = "educated"
+        return result
+
+    monkeypatch.setattr(enrichment, "enrich_explanation", fake_enrich)
+
+    async def main():
+        registry = enrichment.EnrichmentRegistry(ttl=60)
+        base = _result()
+        token = registry.submit(base)
+        failing = registry.submit(base.model_copy(update={"classification": "boom"}))
+        assert registry.get(token).status == "pending"
+        done = await registry.wait(token, timeout=1)
+        assert done.status == "done" and done.result.short_warning == "educated"
+        assert base.short_warning == "local"  # the returned verdict is not mutated
+        assert (await registry.wait(failing, timeout=1)).status == "failed"
+
+        registry.ttl = 0
+        assert registry.get(token) is None
+        assert registry.get("nope") is None
+
+        small = enrichment.EnrichmentRegistry(max_entries=1)
+        first = small.submit(base)
+        small.submit(base)
+        assert small.get(first) is None
+
+    asyncio.run(main())
+
+
+def test_guardian_returns_verdict_before_the_llm(monkeypatch):
+    store = ExplanationStore(None)
+    monkeypatch.setattr(educator, "explanation_store", store)
+    monkeypatch.setattr(pipeline, "explanation_store", store)
+    llm_backend.set_backend(FakeBackend(stage_latency={"scam.educator": LatencyModel("fixed", 300)}))
+    payload = {"text": SCAM_TEXT, "route_hint": "SCAM_CHECK", "defer_enrichment": True}
+    with TestClient(app) as client:
+        started = time.monotonic()
+        body = client.post("/guardian", json=payload).json()
+        assert time.monotonic() - started < 0.3
+        assert body["data"]["is_scam"] is True
+        assert body["data"]["short_warning"].startswith("⚠️ Suspicious")
+        token = body["enrichment_token"]
+        assert client.get(f"/guardian/enrichment/{token}").json()["status"] == "pending"
+
+        with client.stream("GET", f"/guardian/enrichment/{token}/stream") as resp:
+            events = resp.read().decode()
+        data = json.loads(events.split("data: ", 1)[1])
+        assert events.startswith("event: enrichment")
+        assert data["status"] == "done"
+        assert data["result"]["short_warning"].startswith("This message looks like a scam")
+        assert client.get(f"/guardian/enrichment/{token}").json()["status"] == "done"
+        assert client.get("/guardian/enrichment/nope").status_code == 404
+
+        # Now stored: the same check is complete at once, with no token.
+        again = client.post("/guardian", json=payload).json()
+        assert again["enrichment_token"] is None
+        assert again["data"]["short_warning"] == data["result"]["short_warning"]
+
+
+def test_llm_failure_is_reported_and_pipeline_keeps_local_verdict(monkeypatch):
+    async def no_explanation(result):
+        return None
+
+    store = ExplanationStore(None)
+    monkeypatch.setattr(educator, "explanation_store", store)
+    monkeypatch.setattr(educator, "generate_explanation", no_explanation)
+
+    async def main():
+        registry = enrichment.EnrichmentRegistry()
+        token = registry.submit(_result())
+        assert (await registry.wait(token, timeout=1)).status == "failed"
+
+        result = await pipeline.run(SCAM_TEXT)
+        assert result.is_scam and result.short_warning.startswith("⚠️ Suspicious")
+
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""Tests for pre-generated scam educator explanations."""
+import asyncio
+
+from app.agents.scam import educator
+from app.agents.scam.explanation_store import ExplanationStore, pattern_fingerprint
+from app.agents.scam.pattern_index import compile_patterns, pattern_index
+from app.agents.scam.risk_analyzer import risk_analyze
+from app.core import llm_hedge, llm_scheduler
+from app.schemas import ScamAnalysisRequest
+
+SCAM_TEXT = "Dear customer your account will be blocked, share OTP to verify"
+
+
+def test_prefilled_patterns_need_no_llm_call(monkeypatch, tmp_path, fake_backend):
+    store = ExplanationStore(str(tmp_path / "explanations.json"))
+    monkeypatch.setattr(educator, "explanation_store", store)
+    added = asyncio.run(educator.prefill_explanations(["en"], store=store))
+    n_patterns = len({pattern_fingerprint(p) for p in pattern_index.snapshot().patterns})
+    assert added == n_patterns + 1  # + the shared "probably safe" entry
+    assert asyncio.run(educator.prefill_explanations(["en"], store=store)) == 0
+    assert fake_backend.calls[educator.PREFILL_STAGE] == added  # not the interactive stage
+    calls = fake_backend.calls.get("scam.educator", 0)
+
+    scam = asyncio.run(educator.enrich_explanation(risk_analyze(ScamAnalysisRequest(text=SCAM_TEXT))))
+    safe = asyncio.run(educator.enrich_explanation(risk_analyze(ScamAnalysisRequest(text="see you at lunch"))))
+    assert fake_backend.calls.get("scam.educator", 0) == calls
+    assert scam.short_warning.startswith("This message looks like a scam")
+    assert safe.short_warning == "No known scam signs, but stay careful."
+
+    # A language that was not prefilled costs one call, then it is stored.
+    for _ in range(2):
+        asyncio.run(educator.enrich_explanation(risk_analyze(ScamAnalysisRequest(text=SCAM_TEXT, language="hi"))))
+    assert fake_backend.calls.get("scam.educator", 0) == calls + 1
+    assert store.stats()["hits"] == 3
+
+    store.flush()  # puts are written in the background
+    reopened = ExplanationStore(str(tmp_path / "explanations.json"))
+    assert reopened.stats()["entries"] == 0  # loaded lazily
+    subject = pattern_fingerprint(pattern_index.snapshot().patterns[0])
+    assert reopened.get(subject, "en") is not None
+    assert reopened.get(subject, "ta") is None
+
+
+def test_prefill_stage_is_background_and_not_hedged():
+    assert llm_scheduler.priority_for_stage(educator.PREFILL_STAGE) == llm_scheduler.Priority.BACKGROUND
+    assert llm_scheduler.priority_for_stage("scam.educator") == llm_scheduler.Priority.INTERACTIVE
+    assert educator.PREFILL_STAGE not in llm_hedge.HEDGED_STAGES
+
+
+def test_editing_a_pattern_invalidates_its_explanation():
+    (before,), _, _ = compile_patterns([{"scam_name": "KYC Scam", "red_flags": ["Urgent link"]}])
+    (after,), _, _ = compile_patterns([{"scam_name": "KYC Scam", "red_flags": ["Urgent link", "Asks OTP"]}])
+    (same,), _, _ = compile_patterns([{"scam_name": "KYC Scam", "red_flags": ["Urgent link"], "key_phrases": ["kyc"]}])
+    assert pattern_fingerprint(before) != pattern_fingerprint(after)
+    assert pattern_fingerprint(before) == pattern_fingerprint(same)  # key phrases don't change the explanation
+
+
+def test_fill_loop_prefills_at_start_and_flushes_on_stop(monkeypatch, tmp_path):
+    store = ExplanationStore(str(tmp_path / "explanations.json"), fill_interval=3600)
+    explanation = {"short_warning": "w", "detailed_explanation": ["d"], "recommended_action": "a"}
+
+    async def prefill(store):
+        store.put("safe", "en", explanation)
+        filled.set()
+        return 1
+
+    async def run():
+        await store.start()
+        await asyncio.wait_for(filled.wait(), 1)  # not after a full interval
+        await store.stop()
+
+    filled = asyncio.Event()
+    monkeypatch.setattr(educator, "prefill_explanations", prefill)
+    asyncio.run(run())
+    assert ExplanationStore(str(tmp_path / "explanations.json")).get("safe", "en") == explanation
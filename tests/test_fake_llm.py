@@ -0,0 +1,41 @@
+"""Tests for the pluggable LLM backend and the local fake."""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.core import llm_backend
+from app.core.fake_llm import LatencyModel
+from app.core.gemini import run_gemini
+from app.main import app
+from app.schemas import LoanIngestionRequest, LoanSummaryResponse
+
+
+def test_latency_model_parse():
+    model = LatencyModel.parse("uniform:20:80")
+    assert model.kind == "uniform"
+    assert model.a == 20 and model.b == 80
+
+
+def test_missing_api_key_is_reported_on_first_call(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    llm_backend.set_backend(llm_backend.GeminiBackend())
+    out = asyncio.run(run_gemini({"system_instruction": "x", "user": {}}, stage="policy.qa"))
+    assert "GEMINI_API_KEY" in out["error"]
+
+
+def test_loan_pipeline_runs_offline(fake_backend):
+    from app.agents.loan.pipeline import run_loan_pipeline
+
+    request = LoanIngestionRequest(source={"file_id": "sample:payday_loan_highrisk"})
+    summary = asyncio.run(run_loan_pipeline(request))
+    assert isinstance(summary, LoanSummaryResponse)
+    assert fake_backend.calls["loan.narrator"] == 1
+
+
+def test_guardian_routes_with_fake_router(fake_backend):
+    client = TestClient(app)
+    resp = client.post("/guardian", json={"text": "Your KYC expires today, click this link"})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["final_route"] == "SCAM_CHECK"
+    assert body["error"] is None
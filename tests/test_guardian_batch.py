@@ -0,0 +1,61 @@
+"""Tests for /guardian/batch and bounded batch routing."""
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.agents.master import batch
+from app.api.routes import guardian
+from app.main import app
+from app.schemas import AgentResponse, RouteEnum, UserRequest
+
+
+def test_route_batch_dedupes_and_bounds_concurrency(monkeypatch):
+    calls = []
+    active = {"now": 0, "max": 0}
+
+    async def fake_route(req):
+        calls.append(req.text)
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        if req.text == "boom":
+            raise RuntimeError("boom")
+        return AgentResponse(final_route=RouteEnum.SCAM_CHECK, data=req.text)
+
+    monkeypatch.setattr(batch, "route_request", fake_route)
+    texts = ["a", "b", "a", "c", "d", "boom", "e", "b"]
+
+    async def main():
+        return [r async for r in batch.route_batch([UserRequest(text=t) for t in texts], concurrency=2)]
+
+    results = asyncio.run(main())
+    assert sorted(calls) == ["a", "b", "boom", "c", "d", "e"]
+    assert active["max"] == 2
+    by_index = {i: outcome for indices, outcome in results for i in indices}
+    assert sorted(by_index) == list(range(len(texts)))
+    assert by_index[2].data == "a"
+    assert isinstance(by_index[5], RuntimeError)
+
+
+def test_batch_endpoint_streams_ndjson(fake_backend):
+    items = [
+        {"text": "Your KYC expires today, click this link"},
+        {"route_hint": "LOAN_DOC", "file_id": "sample:nbfc_microloan"},
+        {"text": "Your KYC expires today, click this link"},
+    ]
+    resp = TestClient(app).post("/guardian/batch", json=items)
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    routes = {line["index"]: line["response"]["final_route"] for line in lines}
+    assert routes == {0: "SCAM_CHECK", 1: "LOAN_DOC", 2: "SCAM_CHECK"}
+
+
+def test_batch_endpoint_rejects_oversized_batches(monkeypatch):
+    monkeypatch.setattr(guardian, "BATCH_MAX_ITEMS", 2)
+    resp = TestClient(app).post("/guardian/batch", json=[{"text": "x"}] * 3)
+    assert resp.status_code == 413
@@ -0,0 +1,18 @@
+"""Tests for the SSE /guardian/stream endpoint."""
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_guardian_stream_emits_stage_and_token_events(fake_backend):
+    client = TestClient(app)
+    payload = {"route_hint": "LOAN_DOC", "file_id": "sample:payday_loan_highrisk"}
+    with client.stream("POST", "/guardian/stream", json=payload) as resp:
+        assert resp.status_code == 200
+        body = "".join(resp.iter_text())
+
+    names = [line[len("event: "):] for line in body.splitlines() if line.startswith("event: ")]
+    assert names[0] == "route_selected"
+    assert names[1] == "stage_started"
+    assert "token" in names
+    assert names[-1] == "result"
@@ -0,0 +1,150 @@
+"""Tests for the persistent job queue and /guardian/jobs."""
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from app.agents.master.jobs import guardian_jobs
+from app.core.job_queue import JobQueue, QueueFullError, SqliteJobStore
+from app.main import app
+from app.schemas import JobStatusEnum
+
+
+async def _wait_for(queue, job_id, status, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while (await queue.get(job_id)).status != status:
+        assert time.monotonic() < deadline, await queue.get(job_id)
+        await asyncio.sleep(0.005)
+    return await queue.get(job_id)
+
+
+def test_priorities_bounded_workers_and_failures():
+    order = []
+    active = {"now": 0, "max": 0}
+
+    async def handler(payload):
+        order.append(payload["n"])
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        if payload["n"] == "boom":
+            raise RuntimeError("boom")
+        return {"n": payload["n"]}
+
+    async def main():
+        queue = JobQueue(handler, SqliteJobStore(), workers=2)
+        low = await queue.submit({"n": "low"}, priority=0)
+        jobs = [await queue.submit({"n": n}, priority=5) for n in ("a", "b", "boom")]
+        await queue.start()
+        done = await _wait_for(queue, low.id, JobStatusEnum.SUCCEEDED)
+        failed = await _wait_for(queue, jobs[2].id, JobStatusEnum.FAILED)
+        await queue.stop()
+        return done, failed
+
+    done, failed = asyncio.run(main())
+    assert order[-1] == "low"
+    assert active["max"] == 2
+    assert done.result == {"n": "low"} and done.expires_at is not None
+    assert failed.error == "boom"
+
+
+def test_cancel_queued_and_running_jobs():
+    async def main():
+        running = asyncio.Event()
+
+        async def handler(payload):
+            running.set()
+            await asyncio.sleep(10)
+
+        queue = JobQueue(handler, SqliteJobStore(), workers=1)
+        first = await queue.submit({})
+        second = await queue.submit({})
+        await queue.start()
+        await running.wait()
+
+        assert (await queue.cancel(second.id)).status == JobStatusEnum.CANCELLED
+        assert (await queue.cancel(first.id)).status == JobStatusEnum.CANCELLED
+        await asyncio.sleep(0.01)
+        assert queue.stats()["busy_workers"] == 0
+        assert (await queue.get(first.id)).status == JobStatusEnum.CANCELLED
+        await queue.stop()
+
+    asyncio.run(main())
+
+
+def test_results_expire_and_interrupted_jobs_are_requeued(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = SqliteJobStore(path)
+    job = store.add("j1", {"x": 1}, priority=0)
+    store.claim()  # "running" when the process died
+    store.add("j2", {}, priority=0)
+    store.finish("j2", JobStatusEnum.SUCCEEDED, result={}, ttl=-1)
+
+    reopened = SqliteJobStore(path)
+    assert reopened.get("j2") is None
+    assert reopened.requeue_running() == 1
+    assert reopened.get(job.id).status == JobStatusEnum.QUEUED
+    assert reopened.payload(job.id) == {"x": 1}
+
+
+def test_submit_rejects_when_queue_is_full_without_counting_rows(monkeypatch):
+    async def handler(payload):
+        return None
+
+    async def main():
+        queue = JobQueue(handler, SqliteJobStore(), max_pending=2)
+        first = await queue.submit({})
+        monkeypatch.setattr(queue.store, "counts", lambda: {})  # tracked in memory now
+        await queue.submit({})
+        try:
+            await queue.submit({})
+        except QueueFullError:
+            pass
+        else:
+            raise AssertionError("expected QueueFullError")
+        await queue.cancel(first.id)  # frees a slot
+        await queue.submit({})
+
+    asyncio.run(main())
+
+
+def test_expired_jobs_are_purged_on_a_timer():
+    async def handler(payload):
+        return None
+
+    async def main():
+        store = SqliteJobStore()
+        purges = []
+        purge_expired = store.purge_expired
+        store.purge_expired = lambda: purges.append(1) or purge_expired()
+        queue = JobQueue(handler, store, poll_interval=0.001, purge_interval=0.05)
+        await queue.start()
+        await asyncio.sleep(0.12)  # many idle polls, two purges
+        await queue.stop()
+        return purges
+
+    assert 1 <= len(asyncio.run(main())) <= 3
+
+
+def test_jobs_endpoints(monkeypatch, fake_backend):
+    monkeypatch.setattr(guardian_jobs, "poll_interval", 0.01)
+    with TestClient(app) as client:
+        resp = client.post(
+            "/guardian/jobs?priority=3",
+            json={"route_hint": "LOAN_DOC", "file_id": "sample:nbfc_microloan"},
+        )
+        assert resp.status_code == 202
+        job = resp.json()
+        assert job["status"] in ("queued", "running")
+
+        deadline = time.monotonic() + 5
+        while job["status"] in ("queued", "running") and time.monotonic() < deadline:
+            time.sleep(0.02)
+            job = client.get(f"/guardian/jobs/{job['id']}").json()
+
+        assert job["status"] == "succeeded"
+        assert job["priority"] == 3
+        assert job["result"]["final_route"] == "LOAN_DOC"
+        assert client.get("/guardian/jobs/nope").status_code == 404
+        assert client.delete(f"/guardian/jobs/{job['id']}").json()["status"] == "succeeded"
@@ -0,0 +1,97 @@
+"""Tests for LLM micro-batching."""
+import asyncio
+import json
+
+import pytest
+
+from app.core import llm_backend
+from app.core.llm_backend import LLMBackend, LLMResponse
+from app.core.llm_batch import MicroBatcher
+
+
+class _EchoBackend(LLMBackend):
+    """Echoes each batch item back, drops items whose input has "drop", fails on "down"."""
+
+    name = "echo"
+
+    def __init__(self):
+        self.requests = []
+
+    async def generate(self, *, model, system_instruction, user_message, temperature, stage=None):
+        user = json.loads(user_message)
+        self.requests.append(user)
+        if "down" in user_message:
+            raise RuntimeError("503 unavailable")
+        if "items" in user:
+            body = {
+                "results": [
+                    {"index": it["index"], "output": {"echo": it["input"]["n"]}}
+                    for it in user["items"]
+                    if "drop" not in it["input"]
+                ]
+            }
+        else:
+            body = {"echo": user["n"], "single": True}
+        return LLMResponse(json.dumps(body))
+
+
+@pytest.fixture
+def echo_backend():
+    backend = _EchoBackend()
+    llm_backend.set_backend(backend)
+    return backend
+
+
+def test_items_are_packed_and_fanned_out(echo_backend):
+    batcher = MicroBatcher("sys", stage="policy.summarizer", max_batch_size=4, max_wait=0.01)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit({"n": i}) for i in range(10)))
+
+    results = asyncio.run(main())
+    assert [r["echo"] for r in results] == list(range(10))
+    assert batcher.stats()["batches"] == 3
+    assert len(echo_backend.requests) == 3
+
+
+def test_bad_item_is_retried_alone(echo_backend):
+    batcher = MicroBatcher("sys", stage="policy.summarizer", max_batch_size=3, max_wait=0.01)
+
+    async def main():
+        return await asyncio.gather(
+            batcher.submit({"n": 1}),
+            batcher.submit({"n": 2, "drop": True}),
+            batcher.submit({"n": 3}),
+        )
+
+    results = asyncio.run(main())
+    assert results[0] == {"echo": 1}
+    assert results[1] == {"echo": 2, "single": True}
+    assert results[2] == {"echo": 3}
+    assert batcher.stats()["fallbacks"] == 1
+
+
+def test_failed_batch_call_is_not_retried_per_item(echo_backend):
+    batcher = MicroBatcher("sys", stage="policy.summarizer", max_batch_size=3, max_wait=0.01)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit({"n": i, "down": True}) for i in range(3)))
+
+    results = asyncio.run(main())
+    assert all("503" in r["error"] for r in results)
+    assert len(echo_backend.requests) == 1
+    assert batcher.stats()["fallbacks"] == 0
+
+
+def test_in_flight_batches_are_held_and_awaited_on_close(echo_backend):
+    batcher = MicroBatcher("sys", stage="policy.summarizer", max_batch_size=2, max_wait=10)
+
+    async def main():
+        waiters = [asyncio.ensure_future(batcher.submit({"n": i})) for i in range(3)]
+        await asyncio.sleep(0)
+        assert len(batcher._tasks) == 1  # a full batch is in flight, one item queued
+        await batcher.close()  # sends the queued item instead of waiting max_wait
+        assert not batcher._tasks
+        return await asyncio.gather(*waiters)
+
+    assert [r["echo"] for r in asyncio.run(main())] == [0, 1, 2]
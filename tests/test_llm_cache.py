@@ -0,0 +1,48 @@
+"""Tests for the two-tier LLM response cache."""
+import asyncio
+
+from app.core.llm_cache import MemoryLRU, ResponseCache, SqliteCache, cache_key
+
+
+def test_cache_key_is_canonical():
+    a = cache_key("m", 0.3, "sys", {"text": "hi", "metadata": {"a": 1, "b": 2}})
+    b = cache_key("m", 0.3, "sys", {"metadata": {"b": 2, "a": 1}, "text": "hi"})
+    assert a == b
+    assert a != cache_key("m", 0.5, "sys", {"text": "hi", "metadata": {"a": 1, "b": 2}})
+
+
+def test_memory_then_disk_hits(tmp_path):
+    disk = SqliteCache(str(tmp_path / "cache.sqlite3"))
+    cache = ResponseCache(memory=MemoryLRU(max_entries=1), disk=disk)
+
+    cache.set("k1", {"route": "SCAM_CHECK"}, ttl=60)
+    cache.set("k2", {"route": "LOAN_DOC"}, ttl=60)  # evicts k1 from memory
+
+    assert cache.get("k2") == {"route": "LOAN_DOC"}
+    assert cache.get("k1") == {"route": "SCAM_CHECK"}
+    assert cache.get("missing") is None
+
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["disk_hits"] == 1
+    assert stats["misses"] == 1
+    disk.close()
+
+
+def test_zero_ttl_is_not_stored():
+    cache = ResponseCache()
+    cache.set("k", {"a": 1}, ttl=0)
+    assert cache.get("k") is None
+
+
+def test_disk_writes_are_queued_and_evicted_in_batches(tmp_path):
+    disk = SqliteCache(str(tmp_path / "cache.sqlite3"), max_entries=10, evict_batch=5)
+    cache = ResponseCache(memory=MemoryLRU(max_entries=1), disk=disk)
+    for i in range(11):
+        cache.set(f"k{i}", {"i": i}, ttl=60)
+    cache.flush()
+    assert len(disk) == 5 and disk.evictions == 6  # one batch down to max - evict_batch
+    cache.memory.clear()
+    found = [asyncio.run(cache.aget(f"k{i}")) for i in range(11)]
+    assert len([f for f in found if f is not None]) == 5
+    disk.close()
@@ -0,0 +1,51 @@
+"""Tests for LLM deadlines and hedged requests."""
+import asyncio
+
+import pytest
+
+from app.core.llm_hedge import Hedger
+
+
+def _warm(hedger, stage, latency=0.01, n=20):
+    stats = hedger._stats(stage)
+    for _ in range(n):
+        stats.calls += 1
+        stats.record(latency)
+
+
+def test_slow_call_is_hedged_and_hedge_wins():
+    hedger = Hedger(budget=1.0, min_samples=20)
+    _warm(hedger, "master.router")
+    delays = iter([1.0, 0.0])
+
+    async def call():
+        await asyncio.sleep(next(delays))
+        return "ok"
+
+    assert asyncio.run(hedger.call(call, stage="master.router", deadline=2)) == "ok"
+    stats = hedger.stats()["master.router"]
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+def test_hedge_budget_is_respected():
+    hedger = Hedger(budget=0.0, min_samples=20)
+    _warm(hedger, "master.router")
+
+    async def call():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    assert asyncio.run(hedger.call(call, stage="master.router", deadline=1)) == "ok"
+    assert hedger.stats()["master.router"]["hedges"] == 0
+
+
+def test_deadline_raises_timeout():
+    hedger = Hedger()
+
+    async def call():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(hedger.call(call, stage="policy.qa", deadline=0.01))
+    assert hedger.stats()["policy.qa"]["timeouts"] == 1
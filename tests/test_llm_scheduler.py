@@ -0,0 +1,54 @@
+"""Tests for the Gemini request scheduler."""
+import asyncio
+
+from app.core.llm_scheduler import AIMDLimiter, LLMScheduler, Priority, TokenBucket
+
+
+class _QuotaError(Exception):
+    code = 429
+
+
+def test_interactive_calls_are_admitted_before_background():
+    scheduler = LLMScheduler(
+        bucket=TokenBucket(rate=1000, burst=1000),
+        limiter=AIMDLimiter(initial=1, min_limit=1, max_limit=1),
+    )
+    order = []
+
+    def job(name):
+        async def fn():
+            order.append(name)
+            await asyncio.sleep(0.001)
+        return fn
+
+    async def main():
+        blocker = asyncio.ensure_future(scheduler.run(job("first"), Priority.NORMAL))
+        await asyncio.sleep(0)
+        background = asyncio.ensure_future(scheduler.run(job("bg"), Priority.BACKGROUND))
+        interactive = asyncio.ensure_future(scheduler.run(job("ui"), Priority.INTERACTIVE))
+        await asyncio.gather(blocker, background, interactive)
+
+    asyncio.run(main())
+    assert order == ["first", "ui", "bg"]
+
+
+def test_quota_errors_are_retried_and_shrink_window():
+    scheduler = LLMScheduler(
+        bucket=TokenBucket(rate=1000, burst=1000),
+        limiter=AIMDLimiter(initial=8),
+        retry_base=0.001,
+    )
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise _QuotaError("RESOURCE_EXHAUSTED")
+        return "ok"
+
+    assert asyncio.run(scheduler.run(flaky)) == "ok"
+    assert attempts == 3
+    assert scheduler.stats()["overloads"] == 2
+    assert scheduler.limiter.limit < 8
+    assert scheduler.in_flight == 0
@@ -0,0 +1,85 @@
+"""Tests for the local fast-path router."""
+import time
+
+from app.agents.master.local_classifier import (
+    DecisionLog,
+    HashedNgramModel,
+    LocalClassifier,
+    redact,
+    train,
+)
+from app.agents.master.types import RouterDecision
+from app.schemas import RouteEnum, UserRequest
+
+_EXAMPLES = [
+    ("someone sent me a parcel customs fee message", RouteEnum.SCAM_CHECK),
+    ("got a call saying my account will be blocked", RouteEnum.SCAM_CHECK),
+    ("message says I won a lottery prize", RouteEnum.SCAM_CHECK),
+    ("please explain the emi schedule in this document", RouteEnum.LOAN_DOC),
+    ("what does the foreclosure clause in my contract mean", RouteEnum.LOAN_DOC),
+    ("explain the emi and tenure of this offer", RouteEnum.LOAN_DOC),
+    ("how do I report fraud to the ombudsman", RouteEnum.POLICY_QA),
+    ("what are the grievance redressal timelines for banks", RouteEnum.POLICY_QA),
+    ("can a bank charge me for a failed transaction as per guidelines", RouteEnum.POLICY_QA),
+]
+
+
+def _classifier(model=None):
+    return LocalClassifier(model=model, model_path=None)
+
+
+def test_keyword_rules_route_confidently():
+    clf = _classifier()
+    decision = clf.decide(UserRequest(text="Share the OTP to get your refund"))
+    assert decision.route == RouteEnum.SCAM_CHECK
+    decision = clf.decide(UserRequest(text="Please check this", file_id="sample:nbfc_microloan"))
+    assert decision.route == RouteEnum.LOAN_DOC
+
+
+def test_conflicting_or_missing_signals_fall_back_to_llm():
+    clf = _classifier()
+    assert clf.decide(UserRequest(text="hello there")) is None
+    assert clf.decide(UserRequest(text="Is a loan app allowed to ask for my KYC?")) is None
+
+
+def test_model_trained_from_decision_log(tmp_path):
+    log = DecisionLog(str(tmp_path / "decisions.jsonl"))
+    for text, route in _EXAMPLES * 3:
+        log.append(UserRequest(text=text), RouterDecision(route=route, reason="llm"))
+    log.flush()
+
+    model = train(log.path, str(tmp_path / "model.npz"))
+    loaded = HashedNgramModel.load(str(tmp_path / "model.npz"))
+    assert (loaded.weights == model.weights).all()
+
+    clf = _classifier(loaded)
+    decision, confidence = clf.classify("explain the emi in this document")
+    assert decision.route == RouteEnum.LOAN_DOC
+    assert confidence > 0.5
+    decision, _ = clf.classify("how do I report fraud to the bank ombudsman")
+    assert decision.route == RouteEnum.POLICY_QA
+
+
+def test_decision_log_is_redacted_and_bounded(tmp_path):
+    assert redact("OTP 482913, pay to fraud@okaxis or call +91 98765-43210 via https://x.io/a") == (
+        "OTP <num> , pay to <upi> or call <num> via <url>"
+    )
+    log = DecisionLog(str(tmp_path / "decisions.jsonl"), max_entries=8)
+    for i in range(10):
+        log.append(UserRequest(text=f"share OTP {1000 + i} now"), RouterDecision(route=RouteEnum.SCAM_CHECK, reason="llm"))
+    log.flush()
+    lines = (tmp_path / "decisions.jsonl").read_text().splitlines()
+    assert len(lines) <= 8
+    texts, _ = DecisionLog(log.path).read()
+    assert set(texts) == {"share OTP <num> now"}
+    assert DecisionLog().path is None  # opt-in
+
+
+def test_local_routing_is_fast():
+    clf = _classifier(HashedNgramModel())
+    req = UserRequest(text="Dear customer your KYC is pending, update via this link to avoid block")
+    clf.decide(req)
+    started = time.perf_counter()
+    for _ in range(200):
+        clf.decide(req)
+    assert (time.perf_counter() - started) / 200 < 0.002
@@ -0,0 +1,27 @@
+"""Tests for the Prometheus /metrics endpoint."""
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_metrics_endpoint_reports_stage_and_route(fake_backend):
+    client = TestClient(app)
+    client.post("/guardian", json={"text": "Explain my loan agreement: Processing Fee: 5%"})
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert 'finpal_llm_calls_total{stage="loan.clause_extractor"' in resp.text
+    assert 'finpal_router_decisions_total{source="local"}' in resp.text
+    assert 'finpal_request_duration_seconds_count{final_route="LOAN_DOC"}' in resp.text
+
+
+def test_component_collectors_are_exported(fake_backend):
+    text = TestClient(app).get("/metrics").text
+    for name in (
+        "finpal_llm_cache_events_total",
+        "finpal_stage_memo_total",
+        "finpal_jobs",
+        "finpal_scam_pattern_index",
+        "finpal_scam_near_duplicate_messages",
+        "finpal_scam_explanation_store",
+    ):
+        assert f"# TYPE {name} " in text
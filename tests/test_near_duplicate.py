@@ -0,0 +1,83 @@
+"""Tests for the MinHash/LSH near-duplicate scam message index."""
+import json
+import random
+from types import SimpleNamespace
+
+from app.agents.scam import risk_analyzer
+from app.agents.scam.near_duplicate import MinHashLSH, NearDuplicateIndex
+from app.agents.scam.risk_analyzer import risk_analyze
+from app.schemas.scam import ScamAnalysisRequest
+
+KNOWN = (
+    "Dear customer, your electricity connection will be disconnected tonight at 9.30 pm "
+    "because your previous month bill was not updated. Please immediately contact our "
+    "officer Mr. Sharma on 9876543210"
+)
+MUTATED = (
+    "Dear customer your electricity connection will be disconnected tonight at 10.45 pm "
+    "because your previous month bill was not updated. Please immediately contact our "
+    "officer Mr. Verma on 9123456780 !!"
+)
+
+
+def test_mutated_message_is_found_among_many():
+    rng = random.Random(5)
+    words = ["loan", "offer", "meeting", "lunch", "train", "ticket", "cricket", "match", "photo", "family"]
+    lsh = MinHashLSH()
+    for i in range(2000):
+        lsh.add(" ".join(rng.choices(words, k=20)) + f" #{i}", f"noise-{i}", "report")
+    lsh.add(KNOWN, "Electricity Bill Scam", "report")
+
+    found = lsh.query(MUTATED)
+    assert found[0].label == "Electricity Bill Scam"
+    assert found[0].similarity > 0.7
+    assert lsh.query("Are we still on for lunch tomorrow at the usual place?") == []
+    assert not lsh.add(KNOWN, "Electricity Bill Scam", "report")  # already indexed
+
+
+def test_reports_persist_and_reload_incrementally(tmp_path):
+    path, reports = str(tmp_path / "lsh.npz"), str(tmp_path / "reports.jsonl")
+    index = NearDuplicateIndex(path, reports)
+    assert index.record_report(KNOWN, "Electricity Bill Scam")
+    assert not index.record_report(KNOWN, "Electricity Bill Scam")
+    index.flush()  # saved in the background; flush waits for it
+
+    # A report appended by another process is added on load, not rebuilt.
+    with open(reports, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"text": "Your parcel is held at customs, pay Rs 49 fee at this link", "scam_name": "Parcel"}) + "\n")
+    reloaded = NearDuplicateIndex(path, reports)
+    assert reloaded.query(MUTATED)[0].label == "Electricity Bill Scam"
+    assert reloaded.query("your parcel is held at customs pay rs 99 fee at this link")[0].label == "Parcel"
+    assert reloaded.stats()["messages"] == 2
+
+
+def test_removed_pattern_examples_are_pruned(tmp_path):
+    def snapshot(version, *names):
+        patterns = [SimpleNamespace(example_message=KNOWN, scam_name=name) for name in names]
+        return SimpleNamespace(version=version, patterns=patterns)
+
+    path = str(tmp_path / "lsh.npz")
+    index = NearDuplicateIndex(path, None)
+    index.record_report("Your parcel is held at customs, pay Rs 49 fee at this link", "Parcel")
+    index.sync(snapshot(1, "Electricity Bill Scam"))
+    assert index.query(MUTATED)[0].label == "Electricity Bill Scam"
+
+    index.sync(snapshot(2, "Power Cut Scam"))  # the pattern was renamed
+    assert [d.label for d in index.query(MUTATED)] == ["Power Cut Scam"]
+    assert index.stats()["messages"] == 2  # the report survives the prune
+
+    index.flush()
+    reloaded = NearDuplicateIndex(path, None)
+    assert [d.label for d in reloaded.query(MUTATED)] == ["Power Cut Scam"]
+
+
+def test_near_duplicate_raises_risk_without_key_phrases(monkeypatch):
+    index = NearDuplicateIndex(None, None)
+    index.record_report(KNOWN, "Electricity Bill Scam")
+    monkeypatch.setattr(risk_analyzer, "near_duplicate_index", index)
+
+    result = risk_analyze(ScamAnalysisRequest(text=MUTATED))
+    assert result.is_scam
+    assert result.classification == "Electricity Bill Scam"
+    assert 0.75 < result.risk_score <= 1.0
+    assert any("known scam message" in line for line in result.detailed_explanation)
@@ -0,0 +1,80 @@
+"""Tests for concurrent, deduplicated, checkpointed pattern extraction."""
+import asyncio
+import json
+
+from app.agents.scam.pattern_extractor import ExtractionCheckpoint, extract_patterns, parse_output
+from app.core import llm_backend
+from app.core.circuit_breaker import llm_breaker
+from app.core.llm_backend import LLMBackend, LLMResponse
+
+
+class _ArticleBackend(LLMBackend):
+    """Pattern per article; "bad" articles get an invalid one, "flaky" ones error."""
+
+    name = "articles"
+
+    def __init__(self):
+        self.seen = []
+        self.flaky = True
+
+    def _output(self, article):
+        self.seen.append(article)
+        if "bad" in article:
+            return {"scam_name": "Bad", "modus_operandi": "x", "key_phrases": [], "recommended_user_action": "y"}
+        return {
+            "scam_name": article.split()[0].title() + " Scam",
+            "channel": "SMS",
+            "modus_operandi": article,
+            "key_phrases": [article.split()[0]],
+            "red_flags": ["Urgency", " "],
+            "recommended_user_action": "Report to 1930.",
+        }
+
+    async def generate(self, *, model, system_instruction, user_message, temperature, stage=None):
+        user = json.loads(user_message)
+        items = user["items"] if "items" in user else [{"index": None, "input": user}]
+        if self.flaky and any("flaky" in it["input"]["article"] for it in items):
+            raise RuntimeError("backend down")
+        outputs = [{"index": it["index"], "output": self._output(it["input"]["article"])} for it in items]
+        body = {"results": outputs} if "items" in user else outputs[0]["output"]
+        return LLMResponse(json.dumps(body))
+
+
+def test_parse_output_validates_schema():
+    ok, reason = parse_output({"raw_output": json.dumps({
+        "scam_name": " KYC ", "modus_operandi": "m", "key_phrases": ["kyc", ""], "recommended_user_action": "a",
+    })})
+    assert ok.scam_name == "KYC" and ok.key_phrases == ["kyc"] and reason is None
+    assert parse_output({"scam_name": "x"})[1] is not None
+    assert parse_output({"error": "timeout"}) == (None, None)
+
+
+def test_dedup_checkpoint_and_resume(tmp_path):
+    backend = _ArticleBackend()
+    llm_backend.set_backend(backend)
+    path = str(tmp_path / "extraction.jsonl")
+    articles = [
+        {"raw_text": "kyc update fraud via sms link", "url": "https://news.example/kyc"},
+        {"raw_text": "lottery prize fee demanded", "url": "not a url"},
+        {"raw_text": "KYC  update fraud via SMS link"},  # same content
+        {"raw_text": "bad article"},
+        {"raw_text": "flaky refund story"},
+        {"raw_text": "   "},
+    ]
+    first = asyncio.run(extract_patterns(articles, checkpoint=ExtractionCheckpoint(path), concurrency=2))
+    assert [p.scam_name for p in first] == ["Kyc Scam", "Lottery Scam"]
+    assert first[0].red_flags == ["Urgency"]
+    assert str(first[0].source_url) == "https://news.example/kyc" and first[1].source_url is None
+    assert backend.seen.count("kyc update fraud via sms link") == 1
+
+    # Resume: only the articles whose batch call errored are sent again.
+    backend.seen.clear()
+    backend.flaky = False
+    llm_breaker.reset()
+    second = asyncio.run(extract_patterns(articles, checkpoint=ExtractionCheckpoint(path)))
+    assert "flaky refund story" in backend.seen
+    assert set(backend.seen) <= {"bad article", "flaky refund story"}  # "bad" if batched with "flaky"
+    assert [p.scam_name for p in second] == ["Kyc Scam", "Lottery Scam", "Flaky Scam"]
+    assert [p.id for p in second[:2]] == [p.id for p in first]  # stable ids
+    assert len(ExtractionCheckpoint(path)) == 4  # kyc, lottery, bad (rejected), flaky
+
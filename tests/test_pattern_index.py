@@ -0,0 +1,86 @@
+"""Tests for the compiled, hot-reloading scam pattern index."""
+import json
+import os
+import threading
+import time
+
+from app.agents.scam import pattern_index as pattern_index_module
+from app.agents.scam.pattern_index import FilePatternSource, PatternIndex
+
+
+def _write(path, phrases, bump_ns=0):
+    path.write_text(
+        json.dumps([{"scam_name": "Demo", "key_phrases": phrases, "red_flags": ["flag"]}]),
+        encoding="utf-8",
+    )
+    if bump_ns:
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump_ns))
+
+
+def test_snapshot_is_built_once_and_interned(tmp_path, monkeypatch):
+    path = tmp_path / "patterns.json"
+    _write(path, ["  Share OTP ", "KYC"])
+    loads = []
+    real_load = pattern_index_module.load_patterns
+    monkeypatch.setattr(pattern_index_module, "load_patterns", lambda p: loads.append(p) or real_load(p))
+
+    index = PatternIndex(FilePatternSource(path), reload_interval=3600)
+    first = index.snapshot()
+    assert index.snapshot() is first
+    assert len(loads) == 1
+    assert first.patterns[0].key_phrases == ("share otp", "kyc")
+    assert first.matcher.payloads("please SHARE   otp") == [0]
+
+
+def test_changed_source_is_rebuilt_in_background_and_swapped(tmp_path):
+    path = tmp_path / "patterns.json"
+    _write(path, ["old phrase"])
+    index = PatternIndex(FilePatternSource(path), reload_interval=0)
+    old = index.snapshot()
+
+    _write(path, ["new phrase"], bump_ns=1_000_000)
+    assert index.snapshot() is old  # readers keep the old snapshot meanwhile
+
+    deadline = time.monotonic() + 2
+    while index.snapshot().version == old.version:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    new = index.snapshot()
+    assert new.version == 2
+    assert new.matcher.payloads("a new phrase") == [0]
+    assert new.matcher.payloads("an old phrase") == []
+
+
+def test_broken_source_keeps_previous_snapshot(tmp_path):
+    path = tmp_path / "patterns.json"
+    _write(path, ["otp"])
+    index = PatternIndex(FilePatternSource(path), reload_interval=-1)
+    old = index.snapshot()
+
+    path.write_text("{not json", encoding="utf-8")
+    assert index.refresh() is old
+    assert index.failures == 1
+
+
+def test_concurrent_readers_during_rebuilds(tmp_path):
+    path = tmp_path / "patterns.json"
+    _write(path, ["otp"])
+    index = PatternIndex(FilePatternSource(path), reload_interval=0)
+    errors = []
+
+    def reader():
+        for _ in range(300):
+            snap = index.snapshot()
+            if len(snap.patterns) != 1 or snap.matcher.n_phrases != 1:
+                errors.append(snap)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for i in range(5):
+        _write(path, [f"phrase {i}"], bump_ns=(i + 1) * 1_000_000)
+        index.refresh()
+    for t in threads:
+        t.join()
+    assert errors == []
@@ -0,0 +1,100 @@
+"""Tests for the append-only scam pattern log and its compaction."""
+import json
+import threading
+
+from app.agents.scam import pattern_log as pattern_log_module
+from app.agents.scam.pattern_index import FilePatternSource, PatternIndex
+from app.agents.scam.pattern_log import PatternLog
+
+
+def _pattern(i):
+    return {"id": f"p{i}", "scam_name": f"Scam {i}", "key_phrases": [f"phrase {i}"]}
+
+
+def _snapshot(tmp_path, records=()):
+    path = tmp_path / "patterns.json"
+    path.write_text(json.dumps(list(records)), encoding="utf-8")
+    return path
+
+
+def test_append_dedupes_and_reads_incrementally(tmp_path, monkeypatch):
+    path = _snapshot(tmp_path, [{"name": "Legacy", "description": "no id"}, _pattern(0)])
+    log = PatternLog(path, compact_entries=100)
+    assert log.append([_pattern(0), _pattern(1), _pattern(1)]) == 1
+    assert [r.get("id") for r in log.read()] == [None, "p0", "p1"]
+
+    parses = []
+    real_load = json.load
+    monkeypatch.setattr(pattern_log_module.json, "load", lambda f: parses.append(1) or real_load(f))
+    other = PatternLog(path, compact_entries=100)  # e.g. another process
+    assert len(other.read()) == 3
+    assert other.append([_pattern(2)]) == 1
+    assert [r["id"] for r in log.read()[1:]] == ["p0", "p1", "p2"]
+    assert len(parses) == 1  # the snapshot was parsed once; only the tail was read after
+
+    # A line cut short by a crashed writer is ignored, then dropped.
+    with open(log.log_path, "ab") as f:
+        f.write(b'{"id": "p9", "scam_na')
+    assert len(log.read()) == 4
+    log.append([_pattern(3)])
+    assert [r.get("id") for r in PatternLog(path).read()][-2:] == ["p2", "p3"]
+
+
+def test_append_checks_ids_without_rereading_everything(tmp_path, monkeypatch):
+    path = _snapshot(tmp_path, [_pattern(i) for i in range(50)])
+    log = PatternLog(path, compact_entries=100)
+    log.append([_pattern(50)])
+
+    dedupes = []
+    real_dedupe = pattern_log_module._dedupe
+    monkeypatch.setattr(pattern_log_module, "_dedupe", lambda r: dedupes.append(1) or real_dedupe(r))
+    assert log.append([_pattern(0), _pattern(50), _pattern(51)]) == 1
+    assert dedupes == []  # the id set is maintained incrementally
+
+    log.compact()
+    assert log.append([_pattern(51), _pattern(52)]) == 1  # still known after a compaction
+
+
+def test_compaction_is_atomic_and_crash_safe(tmp_path):
+    path = _snapshot(tmp_path)
+    log = PatternLog(path, compact_entries=3)
+    log.append([_pattern(0), _pattern(1)])
+    assert log.log_path.stat().st_size > 0
+    log.append([_pattern(2)])  # reaches the threshold
+    assert log.compactions == 1
+    assert log.log_path.stat().st_size == 0
+    assert [r["id"] for r in json.loads(path.read_text())] == ["p0", "p1", "p2"]
+
+    # Crash after the rename but before the log was emptied: no duplicates.
+    log.append([_pattern(3)])
+    lines = log.log_path.read_bytes()
+    log.compact()
+    log.log_path.write_bytes(lines)
+    assert [r["id"] for r in PatternLog(path).read()] == ["p0", "p1", "p2", "p3"]
+
+
+def test_concurrent_writers_never_corrupt_the_log(tmp_path):
+    path = _snapshot(tmp_path)
+
+    def writer(w):
+        log = PatternLog(path, compact_entries=40)
+        for i in range(30):
+            log.append([_pattern(f"{w}-{i}")])
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    records = PatternLog(path).read()
+    assert len(records) == 120
+    assert len({r["id"] for r in records}) == 120
+
+
+def test_appended_patterns_reach_the_index(tmp_path):
+    path = _snapshot(tmp_path, [_pattern(0)])
+    index = PatternIndex(FilePatternSource(path), reload_interval=-1)
+    assert index.snapshot().matcher.payloads("phrase 1") == []
+
+    pattern_log_module.pattern_log(path).append([_pattern(1)])
+    assert index.refresh().matcher.payloads("phrase 1") == [1]
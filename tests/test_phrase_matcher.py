@@ -0,0 +1,39 @@
+"""Tests for the Aho-Corasick phrase matcher behind risk_analyze."""
+import random
+
+from app.agents.scam.phrase_matcher import PhraseMatcher
+from app.agents.scam.risk_analyzer import risk_analyze
+from app.schemas.scam import ScamAnalysisRequest
+
+
+def test_offsets_overlaps_and_word_boundaries():
+    matcher = PhraseMatcher([("OTP", "otp"), ("click this link", "link"), ("she", "she"), ("he", "he"), ("hers", "hers")])
+    text = "Share  your OTP now! Click   this LINK. otplus, ushers; she"
+    found = [(m.payload, text[m.start:m.end]) for m in matcher.find(text)]
+    assert found == [("otp", "OTP"), ("link", "Click   this LINK"), ("she", "she")]
+
+
+def test_phrases_with_punctuation_edges_and_duplicates():
+    matcher = PhraseMatcher([("₹1", 0), ("rs.", 1), ("OTP", 2), (" otp ", 2), ("", 3)])
+    assert matcher.n_phrases == 3
+    assert matcher.payloads("Pay Rs.10 now, OTP: 1234, win ₹1 lakh, not ₹10") == [1, 2, 0]
+
+
+def test_agrees_with_regex_scan_at_10k_patterns():
+    rng = random.Random(3)
+    vocab = ["".join(rng.choice("abcdefgh") for _ in range(rng.randint(2, 6))) for _ in range(3000)]
+    patterns = [[" ".join(rng.sample(vocab, rng.randint(1, 2))) for _ in range(3)] for _ in range(10_000)]
+    matcher = PhraseMatcher((p, i) for i, phrases in enumerate(patterns) for p in phrases)
+
+    for _ in range(20):
+        msg = " ".join(rng.choices(vocab, k=25))
+        padded = f" {msg} "  # vocab is [a-h]+, so word-bounded == space-delimited
+        expected = {i for i, phrases in enumerate(patterns) if any(f" {p} " in padded for p in phrases)}
+        assert set(matcher.payloads(msg)) == expected
+
+
+def test_risk_analyze_reports_every_matched_pattern():
+    result = risk_analyze(ScamAnalysisRequest(text="URGENT: your account blocked, share OTP to verify your account"))
+    assert result.is_scam
+    assert result.matched_patterns
+    assert len(result.matched_patterns) == len(set(result.matched_patterns))
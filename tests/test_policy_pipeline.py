@@ -0,0 +1,37 @@
+"""Tests for the policy pipeline's memoization of degraded results."""
+import asyncio
+
+from app.agents.policy import policy_fetch, policy_summarizer
+from app.agents.policy.pipeline import POLICY_PIPELINE
+from app.core import agents_runtime
+from app.core.agents_runtime import execute
+from app.schemas import PolicyQARequest
+
+
+def test_degraded_fetch_and_summaries_are_not_memoized(monkeypatch, fake_backend):
+    monkeypatch.setattr(agents_runtime, "RETRY_BACKOFF_SECONDS", 0)
+    scrapes = []
+    monkeypatch.setattr(policy_fetch, "scrape_rbi_page", lambda url: scrapes.append(url))  # RBI down
+    real_batch = policy_summarizer.run_gemini_batch
+
+    async def failing_batch(items, **kwargs):
+        return [{"error": "LLM unavailable (circuit open)"} for _ in items]
+
+    monkeypatch.setattr(policy_summarizer, "run_gemini_batch", failing_batch)
+    agents_runtime.memo.clear()
+    request = PolicyQARequest(question="What does RBI say about recovery agents?")
+
+    def statuses():
+        response, trace = asyncio.run(execute(POLICY_PIPELINE, request=request))
+        assert response.answer
+        return {e["stage"]: e["status"] for e in trace}
+
+    first = statuses()
+    assert first["policy.fetch_remote"] == "fallback"
+    assert len(scrapes) == 2 * len(policy_fetch.RBI_SOURCES)  # the retry fired
+
+    monkeypatch.setattr(policy_summarizer, "run_gemini_batch", real_batch)
+    second = statuses()
+    assert second["policy.fetch_remote"] == "fallback"
+    assert second["policy.summarizer"] == "ok"  # fallback entries were not memoized
+    assert statuses()["policy.summarizer"] == "memo"
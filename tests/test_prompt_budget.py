@@ -0,0 +1,45 @@
+"""Tests for prompt payload compaction and token budgets."""
+import json
+
+from app.core import prompt_budget
+
+
+def test_compact_drops_empty_fields():
+    obj = {"a": None, "b": "", "c": [], "d": {}, "e": 0, "f": {"g": None, "h": "x"}}
+    assert prompt_budget.compact(obj) == {"e": 0, "f": {"h": "x"}}
+
+
+def test_fit_truncates_low_priority_fields_first(monkeypatch):
+    monkeypatch.setitem(prompt_budget.STAGE_TOKEN_BUDGETS, "loan.narrator", 500)
+    user = {
+        "language": "en",
+        "raw_text": "r" * 1500,
+        "clauses": [{"title": "Fee", "raw_text_snippet": "s" * 1500}],
+    }
+    fitted, truncated, _ = prompt_budget.fit(user, stage="loan.narrator")
+
+    assert truncated
+    assert prompt_budget.estimate_tokens(prompt_budget.encode(fitted)) <= 500
+    assert fitted["language"] == "en"
+    # snippets are cut before the main document text
+    assert len(fitted["clauses"][0]["raw_text_snippet"]) < len(fitted["raw_text"])
+    # caller's object is untouched
+    assert len(user["raw_text"]) == 1500
+
+
+def test_batch_items_are_budgeted_individually(monkeypatch):
+    monkeypatch.setitem(prompt_budget.STAGE_TOKEN_BUDGETS, "policy.summarizer", 400)
+    items = [{"index": i, "input": {"raw_text": "x" * 1000}} for i in range(4)]
+    fitted, truncated, _ = prompt_budget.fit({"items": items}, stage="policy.summarizer")
+    assert not truncated
+    assert all(len(it["input"]["raw_text"]) == 1000 for it in fitted["items"])
+
+
+def test_original_size_is_estimated_without_reencoding():
+    user = {
+        "language": "en", "score": 0.75, "flags": [True, None, 3], "empty": {}, "none": None,
+        "clauses": [{"title": "Fee", "tags": []}, {"title": "Rate", "raw_text_snippet": "s" * 100}],
+    }
+    fitted = prompt_budget.fit(user)
+    expected = prompt_budget.estimate_tokens(json.dumps(user, indent=2))
+    assert fitted.original_tokens == expected
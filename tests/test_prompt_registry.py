@@ -0,0 +1,44 @@
+"""Tests for the prompt registry."""
+import os
+
+from app.core.llm_cache import cache_key
+from app.core.prompt_registry import PROMPT_FILES, PromptRegistry, prompts
+
+
+def _registry(tmp_path, text="v1", interval=0.0):
+    (tmp_path / "p.txt").write_text(text, encoding="utf-8")
+    return PromptRegistry({"demo": "p.txt"}, base_dir=tmp_path, reload_interval=interval)
+
+
+def test_all_prompts_load_independent_of_cwd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    registry = PromptRegistry()
+    assert set(registry.versions()) == set(PROMPT_FILES)
+    assert "MASTER ROUTER AGENT" in registry.get("master.router")
+
+
+def test_changed_file_is_reloaded_with_new_version(tmp_path):
+    registry = _registry(tmp_path)
+    old = registry.version("demo")
+
+    path = tmp_path / "p.txt"
+    path.write_text("v2", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert registry.get("demo") == "v2"
+    assert registry.version("demo") != old
+    assert registry.reloads == 1
+
+
+def test_reload_is_throttled(tmp_path):
+    registry = _registry(tmp_path, interval=3600)
+    (tmp_path / "p.txt").write_text("v2", encoding="utf-8")
+    assert registry.get("demo") == "v1"
+
+
+def test_registered_prompt_keys_by_version():
+    text = prompts.get("policy.qa")
+    version = prompts.version_of(text)
+    assert version == prompts.version("policy.qa")
+    assert cache_key("m", 0.3, text, {}, prompt_version=version) != cache_key("m", 0.3, text, {})
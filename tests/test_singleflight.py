@@ -0,0 +1,43 @@
+"""Tests for single-flight coalescing of identical in-flight calls."""
+import asyncio
+
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = 0
+
+    async def slow():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"route": "SCAM_CHECK"}
+
+    async def main():
+        return await asyncio.gather(*(flights.do("k", slow) for _ in range(10)))
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert all(r == {"route": "SCAM_CHECK"} for r in results)
+    assert flights.stats()["coalesced"] == 9
+    assert flights.in_flight() == 0
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    flights = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flights.do("k", slow))
+        second = asyncio.ensure_future(flights.do("k", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "done"
+    assert flights.stats()["cancelled_waiters"] == 1
+    assert flights.stats()["abandoned"] == 0
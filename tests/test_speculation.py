@@ -0,0 +1,53 @@
+"""Tests for speculative dispatch while the LLM router decides."""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.agents.master import speculation
+from app.agents.master.local_classifier import LocalClassifier
+from app.core import metrics
+from app.main import app
+from app.schemas import RouteEnum, UserRequest
+
+
+def test_candidate_routes_follow_local_distribution():
+    clf = LocalClassifier(model_path=None)
+    ambiguous = UserRequest(text="Is a loan app allowed to ask for my KYC?")
+    assert speculation.candidate_routes(ambiguous, clf) == [RouteEnum.SCAM_CHECK, RouteEnum.LOAN_DOC]
+    assert speculation.candidate_routes(UserRequest(text="hello"), clf) == [RouteEnum.SCAM_CHECK]
+
+
+def test_take_returns_winner_and_cancels_losers():
+    user_req = UserRequest(text="Your KYC is pending, update via this link", file_id="sample:nbfc_microloan")
+
+    async def main():
+        spec = speculation.Speculation(user_req, [RouteEnum.SCAM_CHECK, RouteEnum.LOAN_DOC])
+        prefetched = await spec.take(RouteEnum.SCAM_CHECK)
+        return spec, prefetched
+
+    wasted_before = metrics.SPECULATION_BRANCHES.value(route="LOAN_DOC", outcome="wasted")
+    spec, prefetched = asyncio.run(main())
+    assert prefetched["base"].classification
+    assert spec.branches[RouteEnum.LOAN_DOC].task.done()
+    assert metrics.SPECULATION_BRANCHES.value(route="LOAN_DOC", outcome="wasted") == wasted_before + 1
+
+
+def test_branches_only_do_local_work(monkeypatch):
+    async def no_scrape():
+        raise AssertionError("speculation must not scrape RBI")
+
+    monkeypatch.setattr("app.agents.policy.policy_fetch.fetch_remote_documents", no_scrape)
+    req = UserRequest(text="What does RBI say about recovery agents?", file_id="sample:nbfc_microloan")
+    policy = asyncio.run(speculation.BRANCHES[RouteEnum.POLICY_QA](req))
+    loan = asyncio.run(speculation.BRANCHES[RouteEnum.LOAN_DOC](req))
+    assert list(policy) == ["local_docs"] and policy["local_docs"]
+    assert list(loan) == ["raw_text"]
+
+
+def test_guardian_uses_speculated_scam_check(fake_backend):
+    used_before = metrics.SPECULATION_BRANCHES.value(route="SCAM_CHECK", outcome="used")
+    resp = TestClient(app).post("/guardian", json={"text": "Is a loan app allowed to ask for my KYC?"})
+    body = resp.json()
+    assert body["final_route"] == "SCAM_CHECK"
+    assert body["error"] is None
+    assert metrics.SPECULATION_BRANCHES.value(route="SCAM_CHECK", outcome="used") == used_before + 1
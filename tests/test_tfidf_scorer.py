@@ -0,0 +1,51 @@
+"""Tests for the vectorized TF-IDF scam scorer."""
+import numpy as np
+
+from app.agents.scam.pattern_index import compile_patterns
+from app.agents.scam.tfidf_scorer import TfidfScorer
+
+PATTERNS = [
+    {"scam_name": "KYC Update Scam", "key_phrases": ["kyc update", "account blocked"],
+     "red_flags": ["Urgent KYC deadline"], "modus_operandi": "Asks to update KYC via link"},
+    {"scam_name": "Lottery Scam", "key_phrases": ["you have won", "lottery prize"],
+     "red_flags": ["Processing fee before prize"], "modus_operandi": "Prize needs a fee"},
+    {"scam_name": "Electricity Bill Scam", "key_phrases": ["electricity disconnected", "bill not updated"],
+     "red_flags": ["Threat of disconnection tonight"], "modus_operandi": "Call officer or lose power"},
+]
+
+
+def _scorer():
+    compiled, _, _ = compile_patterns(PATTERNS)
+    return TfidfScorer(compiled)
+
+
+def test_top_k_ranks_the_right_pattern_and_calibrates():
+    scorer = _scorer()
+    best = scorer.top_k(["you have won the lottery prize, pay processing fee"], k=2)[0]
+    assert best[0].index == 1
+    assert best[0].score > 0.9
+    assert len(best) <= 2 and (len(best) == 1 or best[1].score < best[0].score)
+
+    exact = scorer.top_k(["kyc update . account blocked"])[0][0]
+    assert exact.index == 0 and exact.score > 0.99
+    assert scorer.top_k(["see you at lunch"], min_score=0.5)[0] == []
+
+
+def test_single_and_batch_paths_agree():
+    scorer = _scorer()
+    texts = ["KYC update needed or account blocked", "electricity disconnected tonight", "hello", ""]
+    batch = scorer.scores(texts).toarray()
+    for row, text in enumerate(texts):
+        (cols, scores), = scorer.rows([text])
+        single = np.zeros(len(PATTERNS))
+        single[cols] = scores
+        np.testing.assert_allclose(single, batch[row], rtol=1e-5)
+    assert [len(c) for c, _ in scorer.rows(texts)] == [np.count_nonzero(r) for r in batch]
+
+
+def test_idf_downweights_terms_shared_by_patterns():
+    scorer = _scorer()
+    (cols, scores), = scorer.rows(["prize"])
+    (cols2, scores2), = scorer.rows(["scam"])  # in every pattern name
+    assert 1 in cols
+    assert max(scores2, default=0.0) < scores[list(cols).index(1)]